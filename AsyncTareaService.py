@@ -0,0 +1,89 @@
+# AsyncTareaService.py
+import asyncio
+import inspect
+from functools import wraps
+from itertools import islice
+
+from pymongo.errors import ConnectionFailure
+
+from db import manager
+from TareaService import TareaService
+
+
+class _EnHilo(type):
+    """
+    Metaclase que expone cada método de TareaService como corrutina.
+
+    La llamada real se ejecuta en un hilo con asyncio.to_thread(); los
+    backends son thread-safe (el pool de conexiones de pymongo, el lock de
+    SQLiteBackend...), así que el event loop de Textual nunca se bloquea
+    esperando a la base.
+
+    Si el servidor se cae a media operación se avisa al ConnectionManager.
+    Las lecturas (LECTURAS) se repiten: con el manager en backoff la
+    colección es None y devuelven su valor "sin conexión" (None, [], 0...).
+    Las escrituras no: si la caída ocurrió antes de enviarlas TareaService
+    ya las dejó en el registro local (ver TareaService._caida()), y lo que
+    llega aquí es una caída con la escritura ya enviada, que pudo aplicarse:
+    repetirla duplicaría un insert o un $inc. Se relanza el ConnectionFailure
+    para que la pantalla lo informe; las siguientes escrituras van al
+    registro local (ver TareaService.sync()).
+
+    Los generadores (stream, cursor, records) se exponen como iteradores
+    asíncronos: cada lote de LOTE elementos se pide en un hilo, de modo que
+    la lectura y la decodificación tampoco corren en el event loop. Una
+    caída a medio recorrido no se repite (duplicaría lo ya entregado).
+    """
+
+    LECTURAS = frozenset({
+        "available", "list", "page", "count", "query", "explain_query",
+        "search", "stats", "version", "get", "diff", "existing_ids", "pending",
+    })
+    LOTE = TareaService.BATCH_SIZE
+
+    def __getattr__(cls, nombre):
+        atributo = getattr(TareaService, nombre)
+        if nombre.startswith("_") or not callable(atributo):
+            return atributo
+
+        if inspect.isgeneratorfunction(atributo):
+            @wraps(atributo)
+            async def por_lotes(*args, **kwargs):
+                iterador = atributo(*args, **kwargs)
+                try:
+                    while lote := await asyncio.to_thread(_lote, iterador, cls.LOTE):
+                        for item in lote:
+                            yield item
+                except ConnectionFailure:
+                    manager.report_failure()
+                    raise
+                finally:
+                    await asyncio.to_thread(iterador.close)
+
+            return por_lotes
+
+        @wraps(atributo)
+        async def en_hilo(*args, **kwargs):
+            try:
+                return await asyncio.to_thread(atributo, *args, **kwargs)
+            except ConnectionFailure:
+                manager.report_failure()
+                if nombre not in cls.LECTURAS:
+                    raise
+                return await asyncio.to_thread(atributo, *args, **kwargs)
+
+        return en_hilo
+
+
+def _lote(iterador, n: int) -> list:
+    return list(islice(iterador, n))
+
+
+class AsyncTareaService(metaclass=_EnHilo):
+    """
+    Variante asíncrona de TareaService con la misma superficie CRUD:
+
+        tarea = await AsyncTareaService.get(5)
+        async for tarea in AsyncTareaService.cursor():
+            ...
+    """
@@ -0,0 +1,161 @@
+# ConkyCache.py
+"""
+Snapshot en disco de la salida para Conky.
+
+conky ejecuta `./app.py --conky` cada 2 segundos; en lugar de consultar
+MongoDB en cada llamada se imprime el texto ya formateado desde un archivo.
+El snapshot se guarda junto con la versión de la colección (un contador que
+TareaService incrementa en cada escritura) y se regenera cuando:
+
+    - TareaService escribe (borra el snapshot: se regenera en la siguiente llamada),
+    - el refresco en segundo plano (`./app.py --conky-daemon`) ve otra versión
+      (o cambió el día: las tareas vencidas dependen de la fecha),
+    - o el snapshot es más viejo que CONKY_CACHE_TTL segundos (cambios hechos
+      desde otras máquinas sin el daemon corriendo).
+
+Este módulo no importa TareaService a nivel de módulo: leer el snapshot no
+debe abrir conexión a MongoDB.
+"""
+import os
+import time
+from datetime import date
+from pathlib import Path
+
+CONKY_CACHE_PATH = Path(
+    os.getenv("CONKY_CACHE", "~/.cache/tareas/conky.txt")
+).expanduser()
+CONKY_CACHE_TTL = float(os.getenv("CONKY_CACHE_TTL", "60"))
+
+FONT = "DejaVu Sans Mono"
+COLOR_DATE = "white"
+STATS_BAR = 20      # Ancho máximo de las barras de tareas por semana
+
+
+def render(tareas) -> str:
+    """Formatea las tareas con la sintaxis de Conky."""
+    lineas = []
+    for t in tareas:
+        sp = 30 - len(t['titulo'])
+        if sp < 1:
+            sp = 1
+        sp = "." * sp
+        lineas.append(
+            f"${{color green}}{t['id']}${{color}} "
+            f"${{color yellow}}{t['titulo']}${{color}}"
+            f"${{color gray}}{sp}${{color}}"
+        )
+        sp = (" " * 30)
+        lineas.append(
+            f"   ${{font {FONT}:size=10}}{sp}"
+            f"${{color {COLOR_DATE}}}{t['fecha']}${{color}}${{font}}"
+        )
+    return "\n".join(lineas) + "\n" if lineas else ""
+
+
+def render_stats(stats: dict) -> str:
+    """Resumen de TareaService.stats() con la sintaxis de Conky."""
+    if not stats:
+        return ""
+    por_status = "  ".join(f"{nombre} {n}" for nombre, n in stats["por_status"].items())
+    lineas = [
+        f"${{color white}}Tareas: {stats['total']}${{color}}  "
+        f"${{color red}}vencidas: {stats['vencidas']}${{color}}",
+        f"${{color gray}}{por_status}${{color}}",
+    ]
+    maximo = max((n for _, n in stats["semanas"]), default=0) or 1
+    for inicio, n in stats["semanas"]:
+        barra = "▮" * round(STATS_BAR * n / maximo) or "·"
+        lineas.append(f"${{color gray}}{inicio:%d/%m}${{color}} ${{color yellow}}{barra} {n}${{color}}")
+    return "\n".join(lineas) + "\n${hr}\n"
+
+
+# ----------------------------------------------------------------------
+# SNAPSHOT
+# ----------------------------------------------------------------------
+def read(path: Path = CONKY_CACHE_PATH, ttl: float = CONKY_CACHE_TTL) -> tuple[int, str] | None:
+    """Devuelve (versión, texto) del snapshot, o None si no existe o caducó."""
+    try:
+        if time.time() - path.stat().st_mtime > ttl:
+            return None
+        version, _, texto = path.read_text().partition("\n")
+        return int(version), texto
+    except (OSError, ValueError):
+        return None
+
+
+def write(version: int, texto: str, path: Path = CONKY_CACHE_PATH):
+    """Escribe el snapshot de forma atómica (conky nunca lee un archivo a medias)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(f"{version}\n{texto}")
+    os.replace(tmp, path)
+
+
+def invalidate(path: Path = CONKY_CACHE_PATH):
+    try:
+        path.unlink(missing_ok=True)
+    except OSError:
+        pass
+
+
+def refresh(path: Path = CONKY_CACHE_PATH) -> str | None:
+    """Regenera el snapshot desde el backend y devuelve el texto (None sin conexión)."""
+    from pymongo.errors import PyMongoError
+    from db import manager
+    from TareaService import TareaService
+
+    if not TareaService.available():
+        return None
+    try:
+        # La versión se lee antes que las tareas: si alguien escribe en medio,
+        # el snapshot queda con la versión vieja y se regenera en la siguiente vuelta
+        version = TareaService.version()
+        texto = render_stats(TareaService.stats()) + render(TareaService.records(campos=("titulo", "fecha")))
+    except PyMongoError:
+        manager.report_failure()
+        return None
+
+    try:
+        write(version, texto, path)
+    except OSError:
+        pass
+    return texto
+
+
+def output(path: Path = CONKY_CACHE_PATH) -> str:
+    """Texto para Conky: del snapshot si está vigente, si no desde MongoDB."""
+    snapshot = read(path)
+    if snapshot is not None:
+        return snapshot[1]
+
+    texto = refresh(path)
+    if texto is None:
+        # Servidor caído: mejor el último snapshot (aunque viejo) que nada
+        snapshot = read(path, ttl=float("inf"))
+        texto = snapshot[1] if snapshot is not None else ""
+    return texto
+
+
+def daemon(interval: float = 2.0, path: Path = CONKY_CACHE_PATH):
+    """Mantiene el snapshot caliente: una consulta a la versión por intervalo."""
+    from pymongo.errors import PyMongoError
+    from db import manager
+    from TareaService import TareaService
+
+    while True:
+        snapshot = read(path, ttl=float("inf"))
+        try:
+            # Las vencidas cambian con el día aunque nadie escriba
+            vigente = (snapshot is not None and snapshot[0] == TareaService.version()
+                       and date.fromtimestamp(path.stat().st_mtime) == date.today())
+        except PyMongoError:
+            manager.report_failure()
+            vigente = False
+        except OSError:
+            vigente = False     # El snapshot se borró entre read() y stat()
+
+        if vigente:
+            path.touch()    # Sigue vigente: evita que caduque por TTL
+        else:
+            refresh(path)
+        time.sleep(interval)
@@ -0,0 +1,202 @@
+# LiveSync.py
+import os
+import threading
+from collections.abc import Callable
+from pathlib import Path
+
+from bson import json_util
+from pymongo.errors import OperationFailure, PyMongoError
+
+import TareaCodec
+from db import manager
+from TareaService import TareaService
+
+# Códigos de MongoDB que indican que el resume token ya no sirve
+# (ChangeStreamHistoryLost / ChangeStreamFatalError).
+TOKEN_INVALIDO = {280, 286}
+
+RESUME_TOKEN_PATH = Path(
+    os.getenv("TAREAS_RESUME_TOKEN", "~/.cache/tareas/resume_token.json")
+).expanduser()
+
+
+class LiveSync:
+    """
+    Sigue los cambios de la colección 'tareas' y los reporta con un callback
+    (solo con el backend de MongoDB; los demás no se comparten en red).
+
+    Usa un change stream (requiere replica set) y guarda el resume token en
+    disco para reanudar tras una reconexión. Si el servidor no soporta change
+    streams (p.ej. un mongod standalone) cae a polling sobre `updated_at`.
+
+    El callback recibe (operación, id, tarea):
+        - "insert" / "update" / "replace": la tarea completa.
+        - "delete": el id borrado (tarea None).
+        - "resync": no se sabe qué se borró; hay que revalidar lo visible
+          (las tareas en caché ya se revisaron, esas no hace falta).
+    """
+
+    POLL_INTERVAL = 2.0     # segundos entre consultas en modo polling
+    RETRY_INTERVAL = 5.0    # espera antes de reintentar tras un error de red
+
+    def __init__(self, on_change: Callable[[str, int | None, dict | None], None],
+                 token_path: Path = RESUME_TOKEN_PATH):
+        self._callback = on_change
+        self.token_path = token_path
+        self.mode = "change_stream"
+
+    def on_change(self, op: str, id_value: int | None, tarea: dict | None):
+        """
+        Mantiene al día la caché de TareaService y avisa al callback. Solo se
+        tocan los ids que cambiaron: un "resync" llega después de revisar las
+        tareas en caché (_borradas), así que no la vacía.
+        """
+        if tarea is not None:
+            TareaService.cache.put(tarea)
+        elif op == "delete":
+            TareaService.cache.invalidate(id_value)
+        self._callback(op, id_value, tarea)
+
+    # ----------------------------------------------------------------------
+    # BUCLE PRINCIPAL (bloqueante: correr en un hilo)
+    # ----------------------------------------------------------------------
+    def run(self, stop: threading.Event):
+        while not stop.is_set():
+            collection = TareaService.backend.collection
+            if collection is None:
+                # Sin conexión: el manager reintenta con backoff
+                stop.wait(self.RETRY_INTERVAL)
+                continue
+
+            try:
+                if self.mode == "change_stream":
+                    self._watch(collection, stop)
+                else:
+                    self._poll(collection, stop)
+            except (OperationFailure, NotImplementedError) as e:
+                if getattr(e, "code", None) in TOKEN_INVALIDO:
+                    self._save_token(None)
+                else:
+                    # Sin change streams: standalone, mongomock, permisos...
+                    self.mode = "poll"
+            except PyMongoError:
+                # Servidor caído: se reintenta y se reanuda con el token
+                manager.report_failure()
+                stop.wait(self.RETRY_INTERVAL)
+
+    # ----------------------------------------------------------------------
+    # CHANGE STREAM
+    # ----------------------------------------------------------------------
+    def _watch(self, collection, stop: threading.Event):
+        with collection.watch(
+            full_document="updateLookup",
+            full_document_before_change="whenAvailable",
+            resume_after=self._load_token(),
+            max_await_time_ms=1000,
+        ) as stream:
+            token = None
+            while not stop.is_set() and stream.alive:
+                change = stream.try_next()
+                if change is not None:
+                    self._dispatch(change, collection)
+                if stream.resume_token != token:
+                    token = stream.resume_token
+                    self._save_token(token)
+
+    def _dispatch(self, change: dict, collection):
+        op = change["operationType"]
+        if op in ("insert", "update", "replace"):
+            tarea = change.get("fullDocument")
+            if tarea is not None:   # Borrada antes del lookup: llegará su delete
+                TareaCodec.decode(tarea)
+                self.on_change(op, tarea["id"], tarea)
+        elif op == "delete":
+            # El evento solo trae el _id; el id llega con la pre-imagen si la
+            # colección la tiene habilitada (changeStreamPreAndPostImages); sin
+            # ella se busca entre las tareas de la caché
+            antes = change.get("fullDocumentBeforeChange")
+            if antes is not None:
+                self.on_change("delete", antes["id"], None)
+            else:
+                self._borradas(collection, 1)
+        elif op in ("drop", "rename", "invalidate"):
+            TareaService.cache.invalidate()     # La colección ya no es la que se cacheó
+            self.on_change("resync", None, None)
+
+    def _load_token(self) -> dict | None:
+        try:
+            return json_util.loads(self.token_path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _save_token(self, token: dict | None):
+        try:
+            if token is None:
+                self.token_path.unlink(missing_ok=True)
+                return
+            self.token_path.parent.mkdir(parents=True, exist_ok=True)
+            self.token_path.write_text(json_util.dumps(token))
+        except OSError:
+            pass
+
+    # ----------------------------------------------------------------------
+    # POLLING (fallback)
+    # ----------------------------------------------------------------------
+    def _poll(self, collection, stop: threading.Event):
+        """
+        Pide solo lo modificado desde la última consulta (índice en
+        updated_at) y solo avisa si algo cambió.
+
+        updated_at se guarda truncado a milisegundos: se pide con $gte para no
+        perder escrituras del mismo milisegundo que la consulta anterior, y
+        las ya avisadas se descartan por (id, rev). Los ids nuevos (mayores
+        que el último visto) son inserts. Los borrados no dejan rastro en
+        updated_at: se notan porque el total (estimated_document_count, sin
+        leer la colección) queda por debajo de lo esperado.
+        """
+        ultimo = collection.find_one(
+            {"updated_at": {"$exists": True}}, {"_id": 0, "updated_at": 1},
+            sort=[("updated_at", -1)],
+        )
+        desde = ultimo["updated_at"] if ultimo else None
+        vistas = {(tarea["id"], tarea.get("rev")) for tarea in
+                  collection.find({"updated_at": desde}, {"_id": 0, "id": 1, "rev": 1})} if desde else set()
+        mayor = collection.find_one({}, {"_id": 0, "id": 1}, sort=[("id", -1)])
+        max_id = mayor["id"] if mayor else 0
+        total = collection.estimated_document_count()
+
+        while not stop.wait(self.POLL_INTERVAL):
+            filtro = {"updated_at": {"$gte": desde}} if desde else {"updated_at": {"$exists": True}}
+            nuevas = 0
+            for tarea in collection.find(filtro, {"_id": 0}).sort("updated_at", 1):
+                clave = (tarea["id"], tarea.get("rev"))
+                if clave in vistas:
+                    continue
+                if tarea["updated_at"] != desde:
+                    desde, vistas = tarea["updated_at"], set()
+                vistas.add(clave)
+                op = "update"
+                if tarea["id"] > max_id:
+                    op, max_id = "insert", tarea["id"]
+                    nuevas += 1
+                self.on_change(op, tarea["id"], TareaCodec.decode(tarea))
+
+            actual = collection.estimated_document_count()
+            if actual < total + nuevas:
+                self._borradas(collection, total + nuevas - actual)
+            total = actual
+
+    def _borradas(self, collection, n: int | None = None):
+        """
+        Se borraron `n` tareas (None: no se sabe cuántas) sin saber cuáles. Se
+        revisan las de la caché en una consulta y se avisa un "delete" por
+        cada una que ya no existe; si eso no explica todos, "resync".
+        """
+        ids = TareaService.cache.ids()
+        existentes = {tarea["id"] for tarea in
+                      collection.find({"id": {"$in": ids}}, {"_id": 0, "id": 1})} if ids else set()
+        borradas = [id_value for id_value in ids if id_value not in existentes]
+        for id_value in borradas:
+            self.on_change("delete", id_value, None)
+        if n is None or len(borradas) < n:
+            self.on_change("resync", None, None)
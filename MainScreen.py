@@ -1,19 +1,38 @@
 # MainScreen.py
+import threading
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+
+from pymongo.errors import ConnectionFailure
 from textual.app import ComposeResult
 from textual.screen import Screen, ModalScreen
-from textual.widgets import Header, Footer, DataTable, Static, Button
+from textual.widgets import Header, Footer, DataTable, Static, Button, Input
 from textual.containers import Container, Grid
 from textual.binding import Binding
 
 # Módulos locales del proyecto
 from TareaFormScreen import TareaFormScreen
-from TareaService import TareaService
+from StatsScreen import StatsScreen
+from MetricsScreen import MetricsScreen
+from AsyncTareaService import AsyncTareaService
+from LiveSync import LiveSync
+from TareaBackend import Conflicto
+import Metrics
+import TareaCodec
 
 
 class TareaModal(ModalScreen):
-    def __init__(self, title, content, **kwargs):
+    # (etiqueta, variante, id): dismiss() devuelve como acción lo que sigue a "btn_"
+    BOTONES = (
+        ("🗙  Cerrar", "default", "btn_close"),
+        ("✏️  Editar", "warning", "btn_edit"),
+        ("🗑  Borrar", "error", "btn_delete"),
+    )
+
+    def __init__(self, title, content, botones=None, **kwargs):
         self.modal_title = title
         self.modal_content = content
+        self.botones = botones or self.BOTONES
         super().__init__(**kwargs)
 
     def compose(self):
@@ -21,9 +40,8 @@ class TareaModal(ModalScreen):
             Static(self.modal_title, classes="tarea_title"),
             Static(self.modal_content, classes="tarea_content"),
             Grid(
-                Button("🗙  Cerrar", variant="default", id="btn_close", classes="btn_modal"),
-                Button("✏️  Editar", variant="warning", id="btn_edit", classes="btn_modal"),
-                Button("🗑  Borrar", variant="error", id="btn_delete", classes="btn_modal"),
+                *(Button(etiqueta, variant=variante, id=id_boton, classes="btn_modal")
+                  for etiqueta, variante, id_boton in self.botones),
                 id="botones",
             ),
             id="modal_tarea",
@@ -44,10 +62,20 @@ class MainScreen(Screen):
         Binding("r", "read_task", "Read"),
         Binding("u", "update_task", "Update"),
         Binding("d", "delete_task", "Delete"),
+        Binding("f", "cycle_status", "Status"),
+        Binding("w", "toggle_week", "Semana"),
+        Binding("o", "cycle_sort", "Orden"),
+        Binding("slash", "search", "Buscar"),
+        Binding("s", "stats", "Stats"),
+        Binding("m", "metrics", "Métricas"),
     ]
 
+    # Valores del filtro de status que recorre la tecla "f" (None = todos)
+    STATUS_FILTERS = (None, "pendiente", "en_progreso", "completado")
+
     def compose(self) -> ComposeResult:
         yield Header(name="Tareas Mongo CRUD")
+        yield Input(placeholder="Buscar en título y descripción…", id="search")
         self.table = DataTable(
             id="task_table",
             cursor_type="row",  # Selección por fila completa
@@ -59,36 +87,459 @@ class MainScreen(Screen):
         self.table.add_column("Status", key="status")
         self.table.add_column("Fecha", key="fecha")
         yield self.table
+        yield Static("", id="table_status")
         yield Footer()
 
-    def on_mount(self):
-        self.refresh_table()
+    async def on_mount(self):
+        # Filtros y orden activos; se resuelven en el backend con TareaService.query()
+        self._filters = {"status": None, "desde": None, "hasta": None}
+        self._sort = "id"
+        self._search = ""           # Texto buscado ("" = sin búsqueda)
+        self._search_timer = None
+        self._pending = 0           # Escrituras sin conexión aún sin sincronizar
+        self._syncing = False
+        self.table.focus()      # La barra de búsqueda solo toma el foco con "/"
+        await self.refresh_table()
+        self._start_live_sync()
+        self.set_interval(self.SYNC_INTERVAL, self._schedule_sync)
+        self._schedule_sync()
+
+    def on_unmount(self):
+        self._live_stop.set()
+
+    # ---------- tabla virtual ----------
+    # El DataTable solo contiene una ventana de MAX_PAGES páginas alrededor del
+    # cursor; las demás se piden a TareaService bajo demanda (keyset sobre los
+    # campos del orden activo).
+    PAGE_SIZE = 100
+    MAX_PAGES = 3
+    PREFETCH_ROWS = 20   # Filas antes del borde en que se pide la siguiente página
+
+    async def refresh_table(self):
+        """Recarga la tabla desde la primera página (o los resultados de la búsqueda)."""
+        if not await AsyncTareaService.available():
+            # Sin esto la tabla vacía parecería una lista sin tareas
+            self.app.notify(f"Sin conexión a la base ({AsyncTareaService.backend.name}).",
+                            severity="error")
+        if self._search:
+            # Los resultados (ordenados por puntaje) caben en una sola página
+            first = await AsyncTareaService.search(self._search, limit=self.SEARCH_LIMIT, **self._filters)
+            self._total = len(first)
+        else:
+            self._total = await AsyncTareaService.count(**self._filters)
+            first = await AsyncTareaService.query(**self._filters, sort=self._sort, limit=self.PAGE_SIZE)
+
+        self._pages = [first] if first else []
+        self._offset = 0    # Posición global de la primera fila de la ventana
+        self._has_before = False
+        self._has_after = not self._search and len(first) == self.PAGE_SIZE
+        self._loading = False
+
+        self._render_window(cursor_row=0)
+
+    def _add_tarea_row(self, tarea):
+        row_id = str(tarea["id"])  # key de la fila
+
+        self.table.add_row(
+            str(tarea["id"]),  # ID como string visible en la primera columna
+            tarea["titulo"],
+            tarea["descripcion"],
+            tarea["status"],
+            tarea["fecha"],
+            key=row_id,
+        )
 
-    # ---------- tabla ----------
-    def refresh_table(self):
-        """Recarga todos los registros en la tabla."""
-        # Limpia la tabla completamente
+    def _render_window(self, cursor_row=None, selected=None):
+        """
+        Reconstruye el DataTable con la ventana actual (costo acotado, no O(N)).
+        El cursor va a `selected` (row key) si sigue en la ventana, si no a `cursor_row`.
+        """
         self.table.clear()
+        for page in self._pages:
+            for tarea in page:
+                self._add_tarea_row(tarea)
+
+        if selected is not None and selected in self.table.rows:
+            cursor_row = self.table.get_row_index(selected)
+        if self.table.row_count > 0:
+            row = min(max(cursor_row or 0, 0), self.table.row_count - 1)
+            self.table.move_cursor(row=row, column=0)
+
+        self._update_status()
+
+    def _update_status(self):
+        rows = self.table.row_count
+        first = self._offset + 1 if rows else 0
+        if self._search:
+            text = f"{self._total} resultados para «{self._search}»"
+        else:
+            text = f"Tareas {first}-{self._offset + rows} de {self._total}"
+        if self._pending:
+            text += f" · {self._pending} cambios sin sincronizar"
+        self.query_one("#table_status", Static).update(text)
+
+    def on_data_table_row_highlighted(self, event):
+        if event.data_table is self.table:
+            self._maybe_load_page()
+
+    def _maybe_load_page(self):
+        """Pide la página siguiente/anterior cuando el cursor se acerca al borde."""
+        # Una sola carga en vuelo; al terminar se vuelve a evaluar el cursor.
+        # Se usa la posición actual y no la del evento: tras reconstruir la
+        # ventana pueden llegar eventos con posiciones ya obsoletas.
+        if self._loading:
+            return
+
+        row = self.table.cursor_row
+        if self._has_after and row >= self.table.row_count - self.PREFETCH_ROWS:
+            load = self._load_next_page
+        elif self._has_before and row < self.PREFETCH_ROWS:
+            load = self._load_previous_page
+        else:
+            return
+
+        self._loading = True
+        self.run_worker(self._worker_load_page(load), group="paginas")
+
+    async def _worker_load_page(self, load):
+        try:
+            await load()
+        finally:
+            self._loading = False
+        self._maybe_load_page()
+
+    async def _load_next_page(self):
+        page = await AsyncTareaService.query(
+            **self._filters, sort=self._sort, limit=self.PAGE_SIZE, after=self._pages[-1][-1]
+        )
+        self._has_after = len(page) == self.PAGE_SIZE
+        if not page:
+            return
+
+        self._pages.append(page)
+        if len(self._pages) <= self.MAX_PAGES:
+            # La ventana aún cabe: basta con agregar las filas al final
+            for tarea in page:
+                self._add_tarea_row(tarea)
+            self._update_status()
+            return
+
+        # Desaloja la página más lejana al cursor
+        evicted = self._pages.pop(0)
+        self._offset += len(evicted)
+        self._has_before = True
+        self._render_window(self.table.cursor_row - len(evicted))
+
+    async def _load_previous_page(self):
+        page = await AsyncTareaService.query(
+            **self._filters, sort=self._sort, limit=self.PAGE_SIZE, before=self._pages[0][0]
+        )
+        self._has_before = len(page) == self.PAGE_SIZE
+        if not page:
+            return
+
+        # El DataTable no permite insertar al inicio: se reconstruye la ventana
+        self._pages.insert(0, page)
+        self._offset = max(self._offset - len(page), 0)
+        if len(self._pages) > self.MAX_PAGES:
+            self._pages.pop()
+            self._has_after = True
+        self._render_window(self.table.cursor_row + len(page))
+
+    # ---------- filtros y orden ----------
+    async def action_cycle_status(self):
+        """Recorre el filtro de status: todos → pendiente → ... → todos."""
+        i = self.STATUS_FILTERS.index(self._filters["status"])
+        self._filters["status"] = self.STATUS_FILTERS[(i + 1) % len(self.STATUS_FILTERS)]
+        await self._apply_view()
+
+    async def action_toggle_week(self):
+        """Solo las tareas con fecha entre hoy y dentro de 7 días."""
+        if self._filters["desde"] is None:
+            hoy = date.today()
+            self._filters.update(desde=hoy, hasta=hoy + timedelta(days=7))
+        else:
+            self._filters.update(desde=None, hasta=None)
+        await self._apply_view()
+
+    async def action_cycle_sort(self):
+        sorts = list(AsyncTareaService.SORTS)
+        self._sort = sorts[(sorts.index(self._sort) + 1) % len(sorts)]
+        await self._apply_view()
+
+    async def _apply_view(self):
+        partes = [f"orden: {self._sort}"]
+        if self._filters["status"]:
+            partes.append(f"status: {self._filters['status']}")
+        if self._filters["desde"]:
+            partes.append("esta semana")
+        if self._search:
+            partes.append(f"buscar: {self._search}")
+        self.sub_title = " · ".join(partes)
+        await self.refresh_table()
+
+    def _matches(self, tarea) -> bool:
+        """¿La tarea pasa los filtros activos? (mismo criterio que build_filter)"""
+        status, desde, hasta = self._filters["status"], self._filters["desde"], self._filters["hasta"]
+        if status is not None and tarea.get("status") != status:
+            return False
+        if desde is not None:
+            # Una fecha v1 inválida (texto) no cae en ningún rango, como en el backend
+            fecha = tarea.get("fecha")
+            if not isinstance(fecha, date) or not desde <= fecha <= hasta:
+                return False
+        return True
+
+    # Orden de tipos de BSON (null, números, texto, fechas) para _sort_key()
+    BSON_ORDER = (type(None), (int, float), str, (date, datetime), object)
+
+    def _sort_key(self, tarea) -> tuple:
+        # Codificada como en MongoDB: el status se ordena por su código. Una
+        # fecha o status v1 inválidos quedan como texto y, como en el orden de
+        # tipos de BSON, van después de los números y antes de las fechas
+        key = []
+        for field, _ in AsyncTareaService.SORTS[self._sort]:
+            value = tarea.get(field)
+            try:
+                value = TareaCodec.encode({field: value})[field]
+            except ValueError:
+                pass
+            rank = next(i for i, tipos in enumerate(self.BSON_ORDER) if isinstance(value, tipos))
+            key.append((rank, value))
+        return tuple(key)
+
+    def action_stats(self):
+        self.app.push_screen(StatsScreen())
+
+    def action_metrics(self):
+        self.app.push_screen(MetricsScreen())
+
+    # ---------- búsqueda ----------
+    # Cada tecla reinicia un temporizador; al vencer se lanza la búsqueda en un
+    # worker exclusivo, que cancela la búsqueda anterior si seguía en vuelo.
+    SEARCH_DEBOUNCE = 0.15   # Segundos sin teclear antes de buscar
+    SEARCH_LIMIT = 200
+
+    def action_search(self):
+        self.query_one("#search", Input).focus()
+
+    def on_input_changed(self, event):
+        if event.input.id != "search":
+            return
+        if self._search_timer is not None:
+            self._search_timer.stop()
+        texto = event.value.strip()
+        self._search_timer = self.set_timer(self.SEARCH_DEBOUNCE, lambda: self._start_search(texto))
+
+    def on_input_submitted(self, event):
+        if event.input.id == "search":
+            self.table.focus()
+
+    def on_key(self, event):
+        search = self.query_one("#search", Input)
+        if event.key == "escape" and search.has_focus:
+            # Escape limpia la búsqueda y vuelve a la lista completa
+            event.stop()
+            search.value = ""
+            self.table.focus()
+
+    def _start_search(self, texto):
+        if texto == self._search:
+            return
+        self._search = texto
+        self.run_worker(self._apply_view(), group="busqueda", exclusive=True)
+
+    # ---------- parches incrementales ----------
+    # Tras crear/actualizar/borrar solo se toca la fila afectada: ninguna
+    # consulta extra a la base y a lo más una reconstrucción de la ventana.
+    COLUMNS = ("id", "titulo", "descripcion", "status", "fecha")
+
+    def _locate(self, id_value):
+        """Devuelve (página, posición) de un id en la ventana o None."""
+        for page in self._pages:
+            for pos, tarea in enumerate(page):
+                if tarea["id"] == id_value:
+                    return page, pos
+        return None
+
+    def _in_window(self, tarea) -> bool:
+        """¿La tarea cae dentro del rango (según el orden activo) que cubre la ventana?"""
+        if self._search:
+            return False    # Los resultados de una búsqueda no reciben filas nuevas
+        if not self._pages:
+            return not self._has_after
+        key = self._sort_key(tarea)
+        after_first = not self._has_before or key > self._sort_key(self._pages[0][0])
+        before_last = not self._has_after or key < self._sort_key(self._pages[-1][-1])
+        return after_first and before_last
+
+    def _insert_row(self, tarea):
+        """Coloca la fila en su posición según el orden activo (si cae en la ventana)."""
+        if not self._matches(tarea) or not self._in_window(tarea):
+            return
+
+        if not self._pages:
+            self._pages.append([])
+        key = self._sort_key(tarea)
+        page = next((p for p in self._pages if p and key < self._sort_key(p[-1])), self._pages[-1])
+        page.insert(bisect_left([self._sort_key(t) for t in page], key), tarea)
 
-        # Obtiene todas las tareas desde MongoDB
-        tareas = TareaService.list()
+        if page is self._pages[-1] and page[-1] is tarea:
+            # Quedó al final: basta con agregarla
+            self._add_tarea_row(tarea)
+        else:
+            # El DataTable no inserta en medio: se reconstruye la ventana
+            # (acotada) y el cursor vuelve a la fila que estaba seleccionada
+            self._render_window(selected=self._selected_row_key())
+
+    def _patch_insert(self, tarea):
+        """Agrega la fila de una tarea nueva."""
+        if self._matches(tarea) and not self._search:
+            self._total += 1
+        if self._locate(tarea["id"]) is None:
+            self._insert_row(tarea)
+        self._update_status()
+
+    def _patch_update(self, tarea):
+        """Actualiza solo las celdas que cambiaron (o mueve la fila si cambió de lugar)."""
+        found = self._locate(tarea["id"])
+        if found is None:
+            # Pudo haber entrado al filtro con el cambio
+            self._insert_row(tarea)
+            self._update_status()
+            return
 
-        # Inserta cada fila en el DataTable
-        for tarea in tareas:
-            row_id = str(tarea["id"])  # key de la fila
+        page, pos = found
+        merged = {**page[pos], **tarea}
+        moved = not self._search and self._sort_key(merged) != self._sort_key(page[pos])
+        if not self._matches(merged) or moved:
+            # Salió del filtro o cambió de posición: se quita y se reubica
+            if not self._matches(merged):
+                self._total = max(self._total - 1, 0)
+            self._remove_row(tarea["id"])
+            self._insert_row(merged)
+            self._update_status()
+            return
+
+        row_key = str(tarea["id"])
+        for column in self.COLUMNS[1:]:
+            if column in tarea and tarea[column] != page[pos].get(column):
+                self.table.update_cell(row_key, column, tarea[column])
+        page[pos] = merged
+
+    def _patch_delete(self, id_value):
+        """
+        Quita solo la fila borrada. El cursor se queda sobre la fila que tenía
+        seleccionada o, si era la borrada, pasa a la siguiente.
+        """
+        self._total = max(self._total - 1, 0)
+        self._remove_row(id_value)
+        self._update_status()
+
+    def _remove_row(self, id_value):
+        found = self._locate(id_value)
+        if found is None:
+            return
 
-            self.table.add_row(
-                str(tarea["id"]),  # ID como string visible en la primera columna
-                tarea["titulo"],
-                tarea["descripcion"],
-                tarea["status"],
-                tarea["fecha"],
-                key=row_id,
+        page, pos = found
+        del page[pos]
+        if not page:
+            self._pages.remove(page)
+
+        selected = self._selected_row_key()
+        self.table.remove_row(str(id_value))
+        if selected is not None and selected.value != str(id_value):
+            self.table.move_cursor(row=self.table.get_row_index(selected))
+
+    # ---------- sincronización en vivo ----------
+    def _start_live_sync(self):
+        """Aplica en la tabla los cambios hechos por otros clientes (solo MongoDB)."""
+        self._live_stop = threading.Event()
+        if AsyncTareaService.backend.name != "mongo":
+            return
+        sync = LiveSync(
+            lambda op, id_value, tarea: self.app.call_from_thread(
+                self._apply_change, op, id_value, tarea
             )
+        )
+        self.run_worker(
+            lambda: sync.run(self._live_stop), thread=True, group="live_sync", exit_on_error=False
+        )
 
-        # Si hay filas, mueve el cursor al primer renglón
-        if self.table.row_count > 0:
-            self.table.move_cursor(row=0, column=0)
+    # ---------- escrituras sin conexión ----------
+    SYNC_INTERVAL = 5.0     # Segundos entre intentos de vaciar el registro local
+
+    def _schedule_sync(self):
+        if not self._syncing:
+            self._syncing = True
+            self.run_worker(self._worker_sync(), group="sync", exit_on_error=False)
+
+    async def _worker_sync(self):
+        """Reproduce en el backend el registro local (ver TareaService.sync())."""
+        try:
+            self._pending = await AsyncTareaService.pending()
+            if not self._pending:
+                return
+            resultado = await AsyncTareaService.sync()
+        finally:
+            self._syncing = False
+
+        self._pending = resultado["pendientes"]
+        if not resultado["aplicadas"] and not resultado["descartadas"]:
+            return      # Sigue sin conexión
+        mensaje = f"{resultado['aplicadas']} cambios sincronizados."
+        if resultado["descartadas"]:
+            mensaje += f" {resultado['descartadas']} descartados: otro cliente escribió después."
+        self.app.notify(mensaje, severity="warning" if resultado["descartadas"] else "information")
+        # Las tareas creadas sin conexión cambian su id provisional por el definitivo
+        await self.refresh_table()
+
+    async def _notify_write(self, mensaje, severity="success"):
+        """Avisa de una escritura; si quedó en el registro local lo indica."""
+        self._pending = await AsyncTareaService.pending()
+        if self._pending:
+            self.app.notify(f"{mensaje} Guardado sin conexión: se sincronizará al reconectar.",
+                            severity="warning")
+            self._schedule_sync()
+        else:
+            self.app.notify(mensaje, severity=severity)
+        self._update_status()
+
+    async def _notify_lost(self, accion):
+        """Se cayó la conexión a media escritura: no se sabe si el servidor la aplicó."""
+        self.app.notify(f"Se perdió la conexión al {accion}: revisa la tabla al reconectar.",
+                        severity="error")
+        self._update_status()
+
+    async def _apply_change(self, op, id_value, tarea):
+        match op:
+            case "insert" | "update" | "replace":
+                self._patch_update(tarea)
+            case "delete":
+                self._patch_delete(id_value)
+            case "resync":
+                await self._resync_window()
+
+        # El total se relee en lugar de contar los eventos, que también
+        # incluyen los ecos de nuestras propias escrituras
+        if not self._search:
+            self._total = await AsyncTareaService.count(**self._filters)
+        self._update_status()
+
+    async def _resync_window(self):
+        """Quita de la ventana las tareas que ya no existen (una consulta acotada)."""
+        ids = [tarea["id"] for page in self._pages for tarea in page]
+        if not ids:
+            return
+        existing = await AsyncTareaService.existing_ids(ids)
+        for id_value in ids:
+            if id_value not in existing:
+                self._patch_delete(id_value)
+
+    def _selected_row_key(self):
+        if self.table.row_count == 0:
+            return None
+        return self.table.coordinate_to_cell_key(self.table.cursor_coordinate).row_key
 
     def _get_selected_row_id(self):
         """Obtiene el ID desde la primera columna (ID) del renglón seleccionado."""
@@ -126,14 +577,17 @@ class MainScreen(Screen):
             return
 
         data = result["data"]
-        nueva = TareaService.insert(data)
+        try:
+            nueva = await AsyncTareaService.insert(data)
+        except ConnectionFailure:
+            await self._notify_lost("crear la tarea")
+            return
         if nueva:
-            self.app.notify(f"Tarea {nueva['id']} creada.", severity="success")
+            self._patch_insert(nueva)
+            await self._notify_write(f"Tarea {nueva['id']} creada.")
         else:
             self.app.notify("Error al crear la tarea.", severity="error")
 
-        self.refresh_table()
-
     def action_update_task(self):
         """Inicia worker para actualizar (abre modal y espera respuesta)."""
         self.app.run_worker(self._worker_update_task(), exclusive=True)
@@ -143,7 +597,7 @@ class MainScreen(Screen):
         if task_id is None:
             return
 
-        tarea = TareaService.get(task_id)
+        tarea = await AsyncTareaService.get(task_id)
         if not tarea:
             self.app.notify("Tarea no encontrada.", severity="error")
             return
@@ -154,14 +608,53 @@ class MainScreen(Screen):
             self.app.notify("Actualización cancelada.")
             return
 
-        data = result["data"]
+        # Solo se envía lo que cambió en el formulario
+        cambios = await AsyncTareaService.diff(tarea, result["data"])
+        if not cambios:
+            self.app.notify("Sin cambios.")
+            return
+        await self._save_update(tarea, cambios)
 
-        if TareaService.update(task_id, data):
-            self.app.notify(f"Tarea {task_id} actualizada.", severity="success")
+    async def _save_update(self, tarea, cambios):
+        """Actualiza si `tarea` sigue en la revisión que se editó; si no, pregunta."""
+        try:
+            actualizada = await AsyncTareaService.update(tarea["id"], dict(cambios), rev=tarea.get("rev", 0))
+        except Conflicto as e:
+            await self._resolve_conflict(e.actual, cambios)
+            return
+        except ConnectionFailure:
+            await self._notify_lost(f"actualizar la tarea {tarea['id']}")
+            return
+
+        if actualizada:
+            self._patch_update(actualizada)
+            await self._notify_write(f"Tarea {tarea['id']} actualizada.")
         else:
-            self.app.notify("Error al actualizar.", severity="error")
+            self.app.notify("Tarea no encontrada: quizá otro cliente la eliminó.", severity="error")
 
-        self.refresh_table()
+    async def _resolve_conflict(self, actual, cambios):
+        """Otro cliente modificó la tarea mientras se editaba: recargar o sobrescribir."""
+        self._patch_update(actual)
+        campos = ", ".join(cambios)
+        content = (
+            f"Otro cliente modificó la tarea {actual['id']} mientras la editabas.\n\n"
+            f"Guardada ahora: {actual['titulo']} ({actual['status']}, {actual['fecha']})\n"
+            f"Tus cambios: {campos}\n\n"
+            "Recargar descarta tus cambios; Sobrescribir los aplica sobre la versión guardada."
+        )
+        result = await self.app.push_screen_wait(TareaModal(
+            "Conflicto de edición", content,
+            botones=(
+                ("🔄  Recargar", "primary", "btn_reload"),
+                ("💾  Sobrescribir", "error", "btn_overwrite"),
+            ),
+        ))
+
+        if result and result.get("action") == "overwrite":
+            await self._save_update(actual, cambios)
+        else:
+            self.app.notify(f"Se recargó la tarea {actual['id']}; tus cambios se descartaron.",
+                            severity="warning")
 
     async def action_read_task(self):
         """Mostrar modal de solo lectura."""
@@ -169,7 +662,7 @@ class MainScreen(Screen):
         if task_id is None:
             return
 
-        tarea = TareaService.get(task_id)
+        tarea = await AsyncTareaService.get(task_id)
         if not tarea:
             self.app.notify("Tarea no encontrada.", severity="error")
             return
@@ -197,17 +690,37 @@ class MainScreen(Screen):
                 case 'edit':
                     self.action_update_task()
                 case 'delete':
-                    self.action_delete_task()
+                    await self.action_delete_task()
 
 
-    def action_delete_task(self):
+    async def action_delete_task(self):
         """Borrar tarea seleccionada."""
         task_id = self._get_selected_row_id()
         if task_id is None:
             return
 
-        if TareaService.delete(task_id):
-            self.app.notify(f"Tarea {task_id} eliminada.", severity="warning")
-            self.refresh_table()
+        try:
+            eliminada = await AsyncTareaService.delete(task_id)
+        except ConnectionFailure:
+            await self._notify_lost(f"eliminar la tarea {task_id}")
+            return
+        if eliminada:
+            self._patch_delete(task_id)
+            await self._notify_write(f"Tarea {task_id} eliminada.", severity="warning")
         else:
             self.app.notify("Error al eliminar.", severity="error")
+
+
+# Con Metrics activo: acciones, workers y lo que cuesta pintar la tabla
+# (_add_tarea_row es un DataTable.add_row); en los modales, compose/on_mount
+# es el costo de abrirlos. Los workers que esperan un formulario o modal
+# (push_screen_wait) no se miden: sumarían el tiempo que el usuario tarda en
+# responder; lo que hacen después sí (_save_update, _patch_*, TareaService)
+Metrics.registro.objetivo(MainScreen, "MainScreen", [
+    nombre for nombre in vars(MainScreen)
+    if nombre.startswith(("action_", "_worker_", "_load_", "_patch_"))
+    and nombre not in ("_worker_create_task", "_worker_update_task", "_worker_read_task")
+] + ["on_mount", "refresh_table", "_render_window", "_add_tarea_row", "_apply_change", "_save_update"])
+Metrics.registro.objetivo(TareaModal, "TareaModal", ["compose"])
+Metrics.registro.objetivo(TareaFormScreen, "TareaFormScreen", ["compose", "on_mount"])
+Metrics.registro.objetivo(StatsScreen, "StatsScreen", ["compose", "on_mount", "action_reload"])
@@ -0,0 +1,203 @@
+# MemoryBackend.py
+from __future__ import annotations
+
+import heapq
+import threading
+from collections.abc import Iterable, Iterator
+from datetime import date, datetime
+
+from TareaBackend import Conflicto, compute_stats, matches, normalize, seed_ids, sort_key
+
+
+def _newer(tarea: dict, updated_at: datetime) -> bool:
+    """¿La tarea guardada se escribió después de `updated_at`? (last writer wins)"""
+    return tarea.get("updated_at") is not None and tarea["updated_at"] > updated_at
+
+
+def _apply(tarea: dict, cambios: dict):
+    tarea.update(cambios)
+    tarea["rev"] = tarea.get("rev", 0) + 1
+
+
+class MemoryBackend:
+    """
+    Tareas en un diccionario del proceso: sin servidor ni archivo. Para
+    pruebas y benchmarks (`./conformance.py`, `./bench.py --backend memory`);
+    todo se pierde al salir.
+
+    Guarda y devuelve copias: quien recibe una tarea puede modificarla sin
+    tocar lo almacenado.
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self._tareas: dict[int, dict] = {}
+        self._seq: int | None = None    # None: sin contador, se parte del mayor id
+        self._version = 0
+        self._lock = threading.RLock()
+        self._archivos: dict[str, MemoryBackend] = {}
+
+    def available(self) -> bool:
+        return True
+
+    def setup(self) -> bool:
+        return True
+
+    # ----------------------------------------------------------------------
+    # LECTURA
+    # ----------------------------------------------------------------------
+    def list(self) -> list[dict]:
+        return self.query({})
+
+    def get(self, id_value: int) -> dict | None:
+        tarea = self._tareas.get(id_value)
+        return dict(tarea) if tarea is not None else None
+
+    def cursor(self, batch_size: int) -> Iterator[dict]:
+        with self._lock:
+            ids = sorted(self._tareas)
+        for id_value in ids:
+            tarea = self.get(id_value)
+            if tarea is not None:   # Borrada mientras se recorría
+                yield tarea
+
+    def query(self, filtros: dict, sort: str = "id", limit: int | None = None,
+              after: dict | None = None, before: dict | None = None,
+              campos: Iterable[str] | None = None) -> list[dict]:
+        desde = sort_key(after, sort) if after is not None else None
+        hasta = sort_key(before, sort) if before is not None else None
+        with self._lock:
+            candidatas = [
+                (llave, tarea) for tarea in self._tareas.values() if matches(tarea, filtros)
+                for llave in (sort_key(tarea, sort),)
+                if (desde is None or llave > desde) and (hasta is None or llave < hasta)
+            ]
+
+        # Hacia atrás: las `limit` más cercanas a `before`, en orden ascendente
+        backwards = before is not None and after is None
+        if limit and backwards:
+            page = heapq.nlargest(limit, candidatas, key=lambda item: item[0])[::-1]
+        elif limit:
+            page = heapq.nsmallest(limit, candidatas, key=lambda item: item[0])
+        else:
+            page = sorted(candidatas, key=lambda item: item[0])
+        return [dict(tarea) for _, tarea in page]
+
+    def count(self, filtros: dict) -> int:
+        with self._lock:
+            return sum(1 for tarea in self._tareas.values() if matches(tarea, filtros))
+
+    def existing_ids(self, ids: list[int]) -> set[int]:
+        return set(ids) & self._tareas.keys()
+
+    def search(self, texto: str, limit: int, filtros: dict) -> list[dict]:
+        raise NotImplementedError("MemoryBackend no tiene índice de texto: se usa TextIndex")
+
+    def stats(self, semanas: int, hoy: date) -> dict:
+        with self._lock:
+            return compute_stats(list(self._tareas.values()), semanas, hoy)
+
+    # ----------------------------------------------------------------------
+    # ARCHIVO
+    # ----------------------------------------------------------------------
+    def archives(self) -> list[str]:
+        return sorted(self._archivos)
+
+    def archive(self, nombre: str) -> MemoryBackend:
+        with self._lock:
+            if nombre not in self._archivos:
+                self._archivos[nombre] = MemoryBackend()
+            return self._archivos[nombre]
+
+    # ----------------------------------------------------------------------
+    # CONTADORES
+    # ----------------------------------------------------------------------
+    def reserve_ids(self, n: int) -> int:
+        with self._lock:
+            if self._seq is None:
+                seed_ids(self)     # También los ids archivados
+            self._seq += n
+            return self._seq - n + 1
+
+    def advance_ids(self, max_id: int | None = None) -> int:
+        with self._lock:
+            if max_id is None:
+                max_id = max(self._tareas, default=0)
+            self._seq = max(self._seq or 0, max_id)
+            return self._seq
+
+    def version(self) -> int:
+        return self._version
+
+    def touch(self) -> int:
+        with self._lock:
+            self._version += 1
+            return self._version
+
+    # ----------------------------------------------------------------------
+    # ESCRITURA
+    # ----------------------------------------------------------------------
+    def insert(self, tarea: dict):
+        tarea = normalize(tarea)
+        with self._lock:
+            if tarea["id"] in self._tareas:
+                raise ValueError(f"id duplicado: {tarea['id']}")
+            self._tareas[tarea["id"]] = tarea
+
+    def update(self, id_value: int, cambios: dict, rev: int | None = None) -> dict | None:
+        cambios = normalize(cambios)
+        with self._lock:
+            tarea = self._tareas.get(id_value)
+            if tarea is None:
+                return None
+            if rev is not None and tarea.get("rev", 0) != rev:
+                raise Conflicto(dict(tarea))
+            _apply(tarea, cambios)
+            return dict(tarea)
+
+    def delete(self, id_value: int) -> bool:
+        with self._lock:
+            return self._tareas.pop(id_value, None) is not None
+
+    def insert_many(self, tareas: list[dict], ordered: bool) -> list[bool]:
+        tareas = [normalize(tarea) for tarea in tareas]
+        ok = [False] * len(tareas)
+        with self._lock:
+            for i, tarea in enumerate(tareas):
+                if tarea["id"] in self._tareas:
+                    if ordered:
+                        break
+                    continue
+                self._tareas[tarea["id"]] = tarea
+                ok[i] = True
+        return ok
+
+    def update_many(self, updates: list[tuple[int, dict]], ordered: bool,
+                    lww: bool = False) -> list[bool]:
+        # Se valida todo antes de escribir: un status inválido lanza ValueError
+        # sin aplicar nada (como el lote de MongoDB)
+        updates = [(id_value, normalize(cambios)) for id_value, cambios in updates]
+        with self._lock:
+            ok = []
+            for id_value, cambios in updates:
+                tarea = self._tareas.get(id_value)
+                if tarea is None or (lww and _newer(tarea, cambios["updated_at"])):
+                    ok.append(False)
+                    continue
+                _apply(tarea, cambios)
+                ok.append(True)
+            return ok
+
+    def delete_many(self, ids: list[int], ordered: bool,
+                    lww: list[datetime] | None = None) -> list[bool]:
+        with self._lock:
+            ok = []
+            for i, id_value in enumerate(ids):
+                tarea = self._tareas.get(id_value)
+                if tarea is None or (lww is not None and _newer(tarea, lww[i])):
+                    ok.append(False)
+                    continue
+                del self._tareas[id_value]
+                ok.append(True)
+            return ok
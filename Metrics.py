@@ -0,0 +1,340 @@
+# Metrics.py
+"""
+Latencias de la aplicación: cuánto tarda cada método de TareaService, cada
+llamada al backend (un viaje a la base) y cada acción/worker de las
+pantallas, y cuántos documentos devuelve.
+
+    TAREAS_METRICS=1          activa el registro al arrancar
+    TAREAS_METRICS_MONGO=1    además registra un CommandListener de pymongo
+                              (tiempos por comando medidos por el driver)
+
+También se activa en caliente desde la pantalla de métricas (tecla "m") o
+con `./app.py --metrics ARCHIVO`, que guarda el volcado al salir.
+
+Los módulos declaran qué medir con objetivo(); mientras el registro está
+apagado sus métodos quedan intactos (sin envoltura y sin costo). activar()
+los reemplaza por versiones cronometradas y desactivar() devuelve los
+originales.
+"""
+from __future__ import annotations
+
+import inspect
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Mapping
+from functools import wraps
+from pathlib import Path
+
+from dotenv import load_dotenv
+from pymongo import monitoring
+
+load_dotenv()
+
+# Límites superiores (segundos) de las cubetas de los histogramas
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+           0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+ARCHIVO = os.getenv("TAREAS_METRICS_FILE", "~/.cache/tareas/metricas")
+_FALTA = object()
+
+
+class Histograma:
+    """Latencias de una operación en cubetas fijas (como un histograma de Prometheus)."""
+
+    __slots__ = ("cubetas", "n", "suma", "maximo", "documentos", "errores")
+
+    def __init__(self):
+        self.cubetas = [0] * (len(BUCKETS) + 1)    # La última es +Inf
+        self.n = 0
+        self.suma = 0.0
+        self.maximo = 0.0
+        self.documentos = 0
+        self.errores = 0
+
+    def observar(self, segundos: float, documentos: int = 0, error: bool = False):
+        self.cubetas[bisect_left(BUCKETS, segundos)] += 1
+        self.n += 1
+        self.suma += segundos
+        self.maximo = max(self.maximo, segundos)
+        self.documentos += documentos
+        self.errores += error
+
+    def cuantil(self, q: float) -> float:
+        """Estimación por interpolación dentro de la cubeta (como histogram_quantile)."""
+        if not self.n:
+            return 0.0
+        objetivo = q * self.n
+        acumulado = 0
+        for i, cuenta in enumerate(self.cubetas):
+            if acumulado + cuenta >= objetivo and cuenta:
+                if i == len(BUCKETS):
+                    return self.maximo
+                inferior = BUCKETS[i - 1] if i else 0.0
+                estimado = inferior + (BUCKETS[i] - inferior) * (objetivo - acumulado) / cuenta
+                return min(estimado, self.maximo)
+            acumulado += cuenta
+        return self.maximo
+
+    def resumen(self) -> dict:
+        return {
+            "n": self.n,
+            "total_s": self.suma,
+            "p50_s": self.cuantil(0.5),
+            "p90_s": self.cuantil(0.9),
+            "p99_s": self.cuantil(0.99),
+            "max_s": self.maximo,
+            "documentos": self.documentos,
+            "errores": self.errores,
+            "cubetas": dict(zip([*map(str, BUCKETS), "+Inf"], self.cubetas)),
+        }
+
+
+class Registro:
+    """
+    Histogramas del proceso por (ámbito, operación). El ámbito dice de dónde
+    sale la medición: "servicio" (TareaService), "backend" (un viaje a la
+    base), "mongo" (CommandListener) o el nombre de la pantalla.
+
+    Es thread-safe: observan los hilos de AsyncTareaService y el event loop.
+    """
+
+    def __init__(self):
+        self.activo = False
+        self._histogramas: dict[tuple[str, str], Histograma] = {}
+        self._lock = threading.Lock()
+        self._objetivos: list[tuple[type, str, tuple[str, ...]]] = []
+        self._originales: dict[tuple[type, str], object] = {}
+        self._contadores: dict[str, tuple[Callable[[], dict], Callable[[], None] | None]] = {}
+
+    # ----------------------------------------------------------------------
+    # MEDICIONES
+    # ----------------------------------------------------------------------
+    def observar(self, ambito: str, op: str, segundos: float, documentos: int = 0,
+                 error: bool = False):
+        with self._lock:
+            histograma = self._histogramas.get((ambito, op))
+            if histograma is None:
+                histograma = self._histogramas[(ambito, op)] = Histograma()
+            histograma.observar(segundos, documentos, error)
+
+    def reset(self):
+        with self._lock:
+            self._histogramas = {}
+        for _, reiniciar in self._contadores.values():
+            if reiniciar is not None:
+                reiniciar()
+
+    def contador(self, nombre: str, leer: Callable[[], dict],
+                 reiniciar: Callable[[], None] | None = None):
+        """
+        Contadores que lleva otro módulo (p.ej. aciertos de la caché): se leen
+        con `leer` al consultar el registro, estén o no activas las métricas.
+        """
+        self._contadores[nombre] = (leer, reiniciar)
+
+    def contadores(self) -> dict[str, dict]:
+        return {nombre: leer() for nombre, (leer, _) in self._contadores.items()}
+
+    def snapshot(self) -> dict[tuple[str, str], dict]:
+        """Resumen de cada histograma, de la operación con más tiempo acumulado a la de menos."""
+        with self._lock:
+            resumenes = {llave: h.resumen() for llave, h in self._histogramas.items()}
+        return dict(sorted(resumenes.items(), key=lambda item: -item[1]["total_s"]))
+
+    def json(self) -> str:
+        volcado = {f"{ambito}.{op}": resumen for (ambito, op), resumen in self.snapshot().items()}
+        volcado.update({f"contadores.{nombre}": valores for nombre, valores in self.contadores().items()})
+        return json.dumps(volcado, indent=2, ensure_ascii=False)
+
+    def prometheus(self) -> str:
+        """Formato de texto de Prometheus (histograma tareas_latencia_segundos + documentos)."""
+        lineas = [
+            "# HELP tareas_latencia_segundos Latencia por operación.",
+            "# TYPE tareas_latencia_segundos histogram",
+        ]
+        documentos = [
+            "# HELP tareas_documentos_total Documentos devueltos por operación.",
+            "# TYPE tareas_documentos_total counter",
+        ]
+        errores = [
+            "# HELP tareas_errores_total Llamadas que terminaron en excepción.",
+            "# TYPE tareas_errores_total counter",
+        ]
+        contadores = [
+            "# HELP tareas_contador Contadores de otros módulos (p.ej. la caché de tareas).",
+            "# TYPE tareas_contador gauge",
+        ]
+        for fuente, valores in sorted(self.contadores().items()):
+            for nombre, valor in valores.items():
+                contadores.append(f'tareas_contador{{fuente="{fuente}",nombre="{nombre}"}} {valor}')
+        with self._lock:
+            for (ambito, op), h in sorted(self._histogramas.items()):
+                etiquetas = f'ambito="{ambito}",op="{op}"'
+                acumulado = 0
+                for limite, cuenta in zip([*map(str, BUCKETS), "+Inf"], h.cubetas):
+                    acumulado += cuenta
+                    lineas.append(f'tareas_latencia_segundos_bucket{{{etiquetas},le="{limite}"}} {acumulado}')
+                lineas.append(f"tareas_latencia_segundos_sum{{{etiquetas}}} {h.suma}")
+                lineas.append(f"tareas_latencia_segundos_count{{{etiquetas}}} {h.n}")
+                documentos.append(f"tareas_documentos_total{{{etiquetas}}} {h.documentos}")
+                errores.append(f"tareas_errores_total{{{etiquetas}}} {h.errores}")
+        return "\n".join(lineas + documentos + errores + contadores) + "\n"
+
+    def dump(self, archivo: str | Path) -> Path:
+        """Guarda el volcado: Prometheus si termina en .prom o .txt, JSON en otro caso."""
+        archivo = Path(archivo).expanduser()
+        archivo.parent.mkdir(parents=True, exist_ok=True)
+        texto = self.prometheus() if archivo.suffix in (".prom", ".txt") else self.json()
+        archivo.write_text(texto, encoding="utf-8")
+        return archivo
+
+    # ----------------------------------------------------------------------
+    # INSTRUMENTACIÓN
+    # ----------------------------------------------------------------------
+    def objetivo(self, cls: type, ambito: str, nombres: Iterable[str]):
+        """Declara métodos de `cls` a medir; si el registro ya está activo se envuelven al momento."""
+        objetivo = (cls, ambito, tuple(nombres))
+        if objetivo in self._objetivos:
+            return
+        self._objetivos.append(objetivo)
+        if self.activo:
+            self._envolver(*objetivo)
+
+    def activar(self):
+        if self.activo:
+            return
+        self.activo = True
+        for objetivo in self._objetivos:
+            self._envolver(*objetivo)
+
+    def desactivar(self):
+        """Devuelve los métodos originales; lo medido se conserva hasta reset()."""
+        self.activo = False
+        for (cls, nombre), original in self._originales.items():
+            if original is _FALTA:
+                delattr(cls, nombre)
+            else:
+                setattr(cls, nombre, original)
+        self._originales = {}
+
+    def _envolver(self, cls: type, ambito: str, nombres: tuple[str, ...]):
+        for nombre in nombres:
+            if (cls, nombre) in self._originales:
+                continue
+            atributo = inspect.getattr_static(cls, nombre, None)
+            if atributo is None:
+                continue    # p.ej. un backend que delega con __getattr__
+            original = cls.__dict__.get(nombre, _FALTA)
+            if isinstance(atributo, classmethod):
+                medido = classmethod(self._medir(atributo.__func__, ambito, nombre))
+            elif isinstance(atributo, staticmethod):
+                medido = staticmethod(self._medir(atributo.__func__, ambito, nombre))
+            else:
+                medido = self._medir(atributo, ambito, nombre)
+            self._originales[(cls, nombre)] = original
+            setattr(cls, nombre, medido)
+
+    def _medir(self, func, ambito: str, op: str):
+        """Versión cronometrada de `func` (corrutina, generador o función normal)."""
+        observar = self.observar
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def medido(*args, **kwargs):
+                inicio = time.perf_counter()
+                error = True
+                try:
+                    resultado = await func(*args, **kwargs)
+                    error = False
+                    return resultado
+                finally:
+                    observar(ambito, op, time.perf_counter() - inicio,
+                             0 if error else _documentos(resultado), error)
+
+        elif inspect.isgeneratorfunction(func):
+            @wraps(func)
+            def medido(*args, **kwargs):
+                # Solo cuenta el tiempo dentro del generador, no el de quien lo consume
+                iterador = func(*args, **kwargs)
+                segundos, n, error = 0.0, 0, False
+                try:
+                    while True:
+                        inicio = time.perf_counter()
+                        try:
+                            item = next(iterador)
+                        except StopIteration:
+                            return
+                        except BaseException:
+                            error = True
+                            raise
+                        finally:
+                            segundos += time.perf_counter() - inicio
+                        n += 1
+                        yield item
+                finally:
+                    iterador.close()
+                    observar(ambito, op, segundos, n, error)
+
+        else:
+            @wraps(func)
+            def medido(*args, **kwargs):
+                inicio = time.perf_counter()
+                error = True
+                try:
+                    resultado = func(*args, **kwargs)
+                    error = False
+                    return resultado
+                finally:
+                    observar(ambito, op, time.perf_counter() - inicio,
+                             0 if error else _documentos(resultado), error)
+
+        return medido
+
+
+def _documentos(resultado) -> int:
+    """Documentos en lo que devolvió una operación: una lista de tareas o una tarea."""
+    if isinstance(resultado, (list, tuple)):
+        return len(resultado)
+    if isinstance(resultado, Mapping) and "id" in resultado:
+        return 1
+    return 0
+
+
+class MongoListener(monitoring.CommandListener):
+    """
+    Tiempos por comando según el driver (ámbito "mongo"): separa el viaje al
+    servidor del trabajo en Python. Solo observa con el registro activo.
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        if registro.activo:
+            registro.observar("mongo", event.command_name, event.duration_micros / 1e6,
+                              _documentos_respuesta(event.reply))
+
+    def failed(self, event):
+        if registro.activo:
+            registro.observar("mongo", event.command_name, event.duration_micros / 1e6, error=True)
+
+
+def _documentos_respuesta(reply) -> int:
+    cursor = reply.get("cursor")
+    if cursor is not None:
+        return len(cursor.get("firstBatch", cursor.get("nextBatch", ())))
+    return reply.get("n", 0)
+
+
+def event_listeners() -> list[monitoring.CommandListener]:
+    """Para las opciones de MongoClient: el listener solo si TAREAS_METRICS_MONGO está activo."""
+    return [MongoListener()] if os.getenv("TAREAS_METRICS_MONGO") else []
+
+
+# Registro compartido de la aplicación
+registro = Registro()
+if os.getenv("TAREAS_METRICS"):
+    registro.activar()
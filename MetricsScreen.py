@@ -0,0 +1,76 @@
+# MetricsScreen.py
+from textual.app import ComposeResult
+from textual.screen import Screen
+from textual.widgets import Header, Footer, DataTable, Static
+from textual.binding import Binding
+
+import Metrics
+
+
+def _ms(segundos: float) -> str:
+    return f"{segundos * 1000:.2f}"
+
+
+def _valor(valor) -> str:
+    return f"{valor:.1%}" if isinstance(valor, float) else str(valor)
+
+
+class MetricsScreen(Screen):
+    """
+    Latencias registradas por Metrics, de la operación más costosa a la menos,
+    y arriba los contadores (aciertos de la caché de tareas, etc.).
+    """
+
+    BINDINGS = [
+        Binding("escape", "app.pop_screen", "Volver"),
+        Binding("m", "app.pop_screen", "Volver"),
+        Binding("a", "toggle", "Activar/desactivar"),
+        Binding("r", "reset", "Reiniciar"),
+        Binding("j", "dump('json')", "JSON"),
+        Binding("p", "dump('prom')", "Prometheus"),
+    ]
+
+    REFRESH_INTERVAL = 1.0
+    COLUMNAS = ("Ámbito", "Operación", "n", "p50 ms", "p90 ms", "p99 ms", "máx ms", "total s", "docs", "errores")
+
+    def compose(self) -> ComposeResult:
+        yield Header(name="Métricas")
+        yield Static("", id="metrics_status")
+        self.table = DataTable(id="metrics_table", cursor_type="row", zebra_stripes=True)
+        self.table.add_columns(*self.COLUMNAS)
+        yield self.table
+        yield Footer()
+
+    def on_mount(self):
+        self.sub_title = "métricas"
+        self.action_reload()
+        self.set_interval(self.REFRESH_INTERVAL, self.action_reload)
+
+    def action_reload(self):
+        registro = Metrics.registro
+        estado = "activas" if registro.activo else "desactivadas (a para activar)"
+        lineas = [f"Métricas {estado}"]
+        for nombre, valores in registro.contadores().items():
+            lineas.append(f"{nombre}: " + "  ".join(f"{campo} {_valor(valor)}" for campo, valor in valores.items()))
+        self.query_one("#metrics_status", Static).update("\n".join(lineas))
+
+        self.table.clear()
+        for (ambito, op), r in registro.snapshot().items():
+            self.table.add_row(ambito, op, str(r["n"]), _ms(r["p50_s"]), _ms(r["p90_s"]),
+                               _ms(r["p99_s"]), _ms(r["max_s"]), f"{r['total_s']:.3f}",
+                               str(r["documentos"]), str(r["errores"]))
+
+    def action_toggle(self):
+        if Metrics.registro.activo:
+            Metrics.registro.desactivar()
+        else:
+            Metrics.registro.activar()
+        self.action_reload()
+
+    def action_reset(self):
+        Metrics.registro.reset()
+        self.action_reload()
+
+    def action_dump(self, formato: str):
+        archivo = Metrics.registro.dump(f"{Metrics.ARCHIVO}.{formato}")
+        self.app.notify(f"Métricas guardadas en {archivo}")
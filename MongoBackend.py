@@ -0,0 +1,558 @@
+# MongoBackend.py
+from __future__ import annotations
+
+import re
+import time
+from collections.abc import Iterable, Iterator
+from datetime import date, datetime, timedelta
+
+import TareaCodec
+from TareaCodec import SCHEMA_VERSION
+from TareaBackend import ARCHIVE, SORTS, Conflicto, seed_ids
+import db
+import bson
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from pymongo import ReturnDocument, InsertOne, UpdateOne, DeleteOne
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError, ExecutionTimeout, OperationFailure
+
+
+def _and(conditions: list[dict]) -> dict:
+    conditions = [c for c in conditions if c]
+    if len(conditions) > 1:
+        return {"$and": conditions}
+    return conditions[0] if conditions else {}
+
+
+def _keyset(keys: list[tuple[str, int]], boundary: dict, op: str) -> dict:
+    """
+    Condición keyset para un orden compuesto (todo ascendente):
+    (a, b) > (va, vb)  ⇔  a > va  o  (a = va y b > vb).
+    """
+    branches = []
+    for i, (field, _) in enumerate(keys):
+        branch = {prev: boundary[prev] for prev, _ in keys[:i]}
+        branch[field] = {op: boundary[field]}
+        branches.append(branch)
+    return branches[0] if len(branches) == 1 else {"$or": branches}
+
+
+def _lww(filtro: dict, updated_at: datetime | None) -> dict:
+    """Last writer wins: el filtro solo encuentra la tarea si no es más reciente que `updated_at`."""
+    if updated_at is None:
+        return filtro
+    return {**filtro, "$or": [{"updated_at": {"$lte": updated_at}}, {"updated_at": {"$exists": False}}]}
+
+
+class _ManagedCollection:
+    """
+    Atributo de clase que pide la colección al ConnectionManager en cada
+    acceso: conecta en el primer uso y, tras una caída, devuelve None hasta
+    que el manager logra reconectar (en vez de quedarse congelado en None).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __get__(self, obj, owner) -> Collection | None:
+        return db.manager.collection(self.name)
+
+
+class MongoBackend:
+    """Tareas en la colección 'tareas' de MongoDB (esquema de TareaCodec)."""
+
+    name = "mongo"
+
+    collection: Collection | None = _ManagedCollection("tareas")
+    # Colección de contadores: un documento {_id: "tareas", seq: <último id>}
+    counters: Collection | None = _ManagedCollection("counters")
+    COUNTER_ID = "tareas"
+    VERSION_ID = "tareas_version"   # Se incrementa en cada escritura
+    SCHEMA_ID = "tareas_schema"     # Versión de esquema (la marca migrate())
+    MIGRATION_ID = "tareas_migracion"   # Último id migrado (para reanudar)
+    BATCH_SIZE = 1000
+    SEARCH_TIMEOUT_MS = 2000    # Tope de una búsqueda en el servidor
+    INDEX_NOT_FOUND = 27        # Código de error de $text sin índice de texto
+
+    def __init__(self, collection: Collection | None = None, counters: Collection | None = None):
+        """`collection`/`counters` fijos (p.ej. de mongomock) en lugar de los del manager."""
+        if collection is not None:
+            self.collection = collection
+        if counters is not None:
+            self.counters = counters
+        self._schema: int | None = None     # Versión leída de counters (se lee una vez)
+        self._archivos: set[str] = set()    # Archivos con índices ya creados
+
+    def available(self) -> bool:
+        return self.collection is not None
+
+    def report_failure(self):
+        """Una escritura no llegó al servidor: el manager pasa a backoff (available() False)."""
+        db.manager.report_failure()
+
+    def setup(self) -> bool:
+        return db.setup()
+
+    # ----------------------------------------------------------------------
+    # LISTAR
+    # ----------------------------------------------------------------------
+    def list(self) -> list[dict]:
+        """Devuelve todas las tareas usando aggregate() con sort y project."""
+        pipeline = [
+            {"$project": {"_id": 0}},     # Ocultar _id
+            {"$sort": {"id": 1}},         # Ordenar por id ascendente
+        ]
+
+        return [TareaCodec.decode(tarea) for tarea in self.collection.aggregate(pipeline)]
+
+    def get(self, id_value: int) -> dict | None:
+        pipeline = [
+            {"$match": {"id": id_value}},   # Filtrar por ID
+            {"$project": {"_id": 0}},       # Ocultar _id
+            {"$limit": 1},
+        ]
+
+        result = list(self.collection.aggregate(pipeline))
+        return TareaCodec.decode(result[0]) if result else None
+
+    def cursor(self, batch_size: int, raw: bool = False) -> Iterator:
+        """
+        Un solo cursor del servidor, que entrega las tareas en lotes de
+        `batch_size` documentos. Con `raw` devuelve RawBSONDocument tal como
+        están guardados, sin decodificarlos.
+        """
+        collection = self.collection
+        if raw:
+            collection = collection.with_options(
+                codec_options=CodecOptions(document_class=RawBSONDocument)
+            )
+
+        cursor = collection.find({}, {"_id": 0}).sort("id", 1).batch_size(batch_size)
+        if raw:
+            yield from cursor
+        else:
+            for tarea in cursor:
+                yield TareaCodec.decode(tarea)
+
+    def raw_batches(self, batch_size: int, campos: Iterable[str] | None = None) -> Iterator[bytes]:
+        """
+        Como cursor(raw=True), pero cada elemento es un lote completo de
+        documentos BSON concatenados (find_raw_batches): pymongo no crea ni
+        un objeto por documento. Con `campos` solo se leen esos (y el id).
+        """
+        proyeccion = {"_id": 0, **({campo: 1 for campo in ("id", *campos)} if campos else {})}
+        try:
+            cursor = self.collection.find_raw_batches({}, proyeccion).sort("id", 1).batch_size(batch_size)
+        except NotImplementedError:
+            # Sin lotes crudos (mongomock): un "lote" por documento de find()
+            cursor = map(bson.encode, self.collection.find({}, proyeccion).sort("id", 1))
+        yield from cursor
+
+    def count(self, filtros: dict) -> int:
+        """Sin filtro usa estimated_document_count(): lee los metadatos, no la colección."""
+        filtro = self.build_filter(**filtros)
+        if not filtro:
+            return self.collection.estimated_document_count()
+        return self.collection.count_documents(filtro)
+
+    def existing_ids(self, ids: list[int]) -> set[int]:
+        cursor = self.collection.find({"id": {"$in": ids}}, {"_id": 0, "id": 1})
+        return {doc["id"] for doc in cursor}
+
+
+    # ----------------------------------------------------------------------
+    # CONSULTAS (filtros y orden resueltos en MongoDB)
+    # ----------------------------------------------------------------------
+    def build_filter(self, status: str | Iterable[str] | None = None,
+                     desde: date | None = None, hasta: date | None = None,
+                     texto: str | None = None, ids: Iterable[int] | None = None) -> dict:
+        """
+        Filtro de MongoDB para los `filtros` de TareaBackend.
+
+        Mientras la colección no esté migrada al esquema actual, los filtros
+        de status y fecha aceptan también el formato v1 (texto).
+        """
+        legacy = (status is not None or desde is not None or hasta is not None) and self.legacy()
+
+        conditions = []
+        if status is not None:
+            nombres = [TareaCodec.status_name(s) for s in ([status] if isinstance(status, str) else status)]
+            valores = [TareaCodec.STATUS_CODES[nombre] for nombre in nombres]
+            if legacy:
+                valores += nombres + [alias for alias, nombre in TareaCodec.STATUS_ALIASES.items()
+                                      if nombre in nombres]
+            conditions.append({"status": valores[0] if len(valores) == 1 else {"$in": valores}})
+
+        fecha = {}
+        if desde is not None:
+            fecha["$gte"] = TareaCodec.encode_fecha(desde)
+        if hasta is not None:
+            fecha["$lte"] = TareaCodec.encode_fecha(hasta)
+        if fecha and legacy:
+            texto_v1 = {op: valor.strftime("%Y-%m-%d") for op, valor in fecha.items()}
+            conditions.append({"$or": [{"fecha": fecha}, {"fecha": texto_v1}]})
+        elif fecha:
+            conditions.append({"fecha": fecha})
+
+        if texto:
+            regex = {"$regex": re.escape(texto), "$options": "i"}
+            conditions.append({"$or": [{"titulo": regex}, {"descripcion": regex}]})
+
+        if ids is not None:
+            conditions.append({"id": {"$in": list(ids)}})
+
+        return _and(conditions)
+
+    def _find_query(self, filtros: dict, sort: str, after: dict | None,
+                    before: dict | None) -> tuple[dict, list, bool]:
+        """Arma (filtro, orden, hacia_atrás) para query() y explain_query()."""
+        keys = SORTS[sort]
+        conditions = [self.build_filter(**filtros)]
+        if after is not None:
+            conditions.append(_keyset(keys, TareaCodec.encode(after), "$gt"))
+        if before is not None:
+            conditions.append(_keyset(keys, TareaCodec.encode(before), "$lt"))
+
+        # Hacia atrás se recorre el índice en orden inverso y se invierte
+        backwards = before is not None and after is None
+        direction = -1 if backwards else 1
+        return _and(conditions), [(field, order * direction) for field, order in keys], backwards
+
+    def query(self, filtros: dict, sort: str = "id", limit: int | None = None,
+              after: dict | None = None, before: dict | None = None,
+              campos: Iterable[str] | None = None) -> list[dict]:
+        query, order, backwards = self._find_query(filtros, sort, after, before)
+
+        projection = {"_id": 0}
+        if campos is not None:
+            projection.update({campo: 1 for campo in campos})
+            projection.update({field: 1 for field, _ in SORTS[sort]})
+
+        cursor = self.collection.find(query, projection).sort(order)
+        page = [TareaCodec.decode(tarea) for tarea in cursor.limit(limit or 0)]
+        return page[::-1] if backwards else page
+
+    def explain_query(self, filtros: dict, sort: str = "id", limit: int = 0) -> dict:
+        """Plan de ejecución (explain) de la consulta que haría query()."""
+        query, order, _ = self._find_query(filtros, sort, None, None)
+        return self.collection.find(query, {"_id": 0}).sort(order).limit(limit).explain()
+
+    def _search_cursor(self, texto: str, limit: int, filtros: dict):
+        """Cursor de search() y explain_search()."""
+        query = _and([{"$text": {"$search": texto}}, self.build_filter(**filtros)])
+        score = {"$meta": "textScore"}
+        return (
+            self.collection.find(query, {"_id": 0, "score": score})
+            .sort([("score", score), ("id", 1)])
+            .limit(limit)
+            .max_time_ms(self.SEARCH_TIMEOUT_MS)
+        )
+
+    def explain_search(self, texto: str, limit: int, filtros: dict) -> dict:
+        """Plan de ejecución (explain) de la búsqueda que haría search()."""
+        return self._search_cursor(texto, limit, filtros).explain()
+
+    def search(self, texto: str, limit: int, filtros: dict) -> list[dict]:
+        """Índice de texto de db.INDEXES, ordenado por textScore (campo `score`)."""
+        cursor = self._search_cursor(texto, limit, filtros)
+        tareas = []
+        try:
+            for tarea in cursor:
+                tareas.append(TareaCodec.decode(tarea))
+        except ExecutionTimeout:
+            # Pasó SEARCH_TIMEOUT_MS: lo que alcanzó a llegar (el índice sigue ahí)
+            return tareas
+        except OperationFailure as e:
+            if e.code != self.INDEX_NOT_FOUND:
+                raise
+            # Sin índice de texto: TareaService pasa al índice local
+            raise NotImplementedError(str(e)) from e
+        return tareas
+
+
+    # ----------------------------------------------------------------------
+    # ESTADÍSTICAS
+    # ----------------------------------------------------------------------
+    def stats(self, semanas: int, hoy: date) -> dict:
+        """Todo en una sola agregación ($facet)."""
+        limites = [TareaCodec.encode_fecha(hoy + timedelta(weeks=i)) for i in range(semanas + 1)]
+        # Se excluyen todas las formas de "completado" (código, texto v1 y alias)
+        abiertas = {"$nin": [TareaCodec.STATUS_CODES["completado"], "completado",
+                             *[alias for alias, nombre in TareaCodec.STATUS_ALIASES.items()
+                               if nombre == "completado"]]}
+
+        pipeline = [
+            {"$facet": {
+                "total": [{"$count": "n"}],
+                "por_status": [{"$group": {"_id": "$status", "n": {"$sum": 1}}}],
+                "vencidas": [
+                    {"$match": {"status": abiertas, "fecha": {"$lt": limites[0]}}},
+                    {"$count": "n"},
+                ],
+                "semanas": [
+                    {"$match": {"status": abiertas,
+                                "fecha": {"$gte": limites[0], "$lt": limites[-1]}}},
+                    {"$bucket": {"groupBy": "$fecha", "boundaries": limites,
+                                 "output": {"n": {"$sum": 1}}}},
+                ],
+            }},
+        ]
+        if self.legacy():
+            # Fechas v1 (texto) a fecha BSON para poder compararlas
+            pipeline.insert(0, {"$addFields": {"fecha": {
+                "$convert": {"input": "$fecha", "to": "date", "onError": None, "onNull": None}
+            }}})
+
+        facetas = next(self.collection.aggregate(pipeline))
+        por_status = {nombre: 0 for nombre in TareaCodec.STATUS_CODES}
+        for grupo in facetas["por_status"]:
+            try:
+                nombre = TareaCodec.status_name(grupo["_id"])
+            except ValueError:
+                nombre = str(grupo["_id"])
+            por_status[nombre] = por_status.get(nombre, 0) + grupo["n"]
+        por_semana = {grupo["_id"]: grupo["n"] for grupo in facetas["semanas"]}
+
+        return {
+            "total": facetas["total"][0]["n"] if facetas["total"] else 0,
+            "por_status": por_status,
+            "vencidas": facetas["vencidas"][0]["n"] if facetas["vencidas"] else 0,
+            "semanas": [(inicio.date(), por_semana.get(inicio, 0)) for inicio in limites[:-1]],
+            "hoy": hoy,
+        }
+
+
+    # ----------------------------------------------------------------------
+    # ARCHIVO (colecciones tareas_archive*, en la misma base)
+    # ----------------------------------------------------------------------
+    def archives(self) -> list[str]:
+        return sorted(nombre for nombre in self.collection.database.list_collection_names()
+                      if nombre == ARCHIVE or nombre.startswith(f"{ARCHIVE}_"))
+
+    def archive(self, nombre: str) -> MongoBackend:
+        """Los índices de db.ARCHIVE_INDEXES se crean la primera vez que se pide cada colección."""
+        coleccion = self.collection.database[nombre]
+        if nombre not in self._archivos:
+            for llaves, opciones in db.ARCHIVE_INDEXES:
+                coleccion.create_index(llaves, **opciones)
+            self._archivos.add(nombre)
+        archivo = MongoBackend(collection=coleccion, counters=self.counters)
+        archivo._schema = SCHEMA_VERSION    # Se escribe con insert_many(): siempre el esquema actual
+        return archivo
+
+    # ----------------------------------------------------------------------
+    # CONTADORES
+    # ----------------------------------------------------------------------
+    def reserve_ids(self, n: int) -> int:
+        """
+        find_one_and_update con $inc: dos procesos nunca reciben el mismo ID.
+
+        Si el contador no existe (colección anterior a él, sin `--setup`) se
+        crea primero con el mayor id guardado, archivos incluidos (seed_ids):
+        advance_ids() usa $max, así que dos procesos que lo creen a la vez
+        llegan al mismo valor.
+        """
+        inc = {"$inc": {"seq": n}}
+        counter = self.counters.find_one_and_update({"_id": self.COUNTER_ID}, inc,
+                                                    return_document=ReturnDocument.AFTER)
+        if counter is None:
+            seed_ids(self)
+            counter = self.counters.find_one_and_update({"_id": self.COUNTER_ID}, inc, upsert=True,
+                                                        return_document=ReturnDocument.AFTER)
+        return counter["seq"] - n + 1
+
+    def advance_ids(self, max_id: int | None = None) -> int:
+        """Usa $max, así que es idempotente y nunca hace retroceder el contador."""
+        if max_id is None:
+            pipeline = [
+                {"$sort": {"id": -1}},        # Orden descendente
+                {"$limit": 1},                # Solo el máximo
+                {"$project": {"id": 1}},      # Obtener solo id
+            ]
+            result = list(self.collection.aggregate(pipeline))
+            max_id = result[0]["id"] if result else 0
+
+        counter = self.counters.find_one_and_update(
+            {"_id": self.COUNTER_ID},
+            {"$max": {"seq": max_id}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return counter["seq"]
+
+    def version(self) -> int:
+        counter = self.counters.find_one({"_id": self.VERSION_ID})
+        return counter["seq"] if counter else 0
+
+    def touch(self) -> int:
+        counter = self.counters.find_one_and_update(
+            {"_id": self.VERSION_ID},
+            {"$inc": {"seq": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return counter["seq"]
+
+
+    # ----------------------------------------------------------------------
+    # ESQUEMA Y MIGRACIÓN (ver TareaCodec)
+    # ----------------------------------------------------------------------
+    def schema_version(self) -> int:
+        """Versión de esquema de la colección; 1 si nunca se migró."""
+        if self._schema is None and self.counters is not None:
+            counter = self.counters.find_one({"_id": self.SCHEMA_ID})
+            self._schema = counter["seq"] if counter else 1
+        return self._schema or 1
+
+    def legacy(self) -> bool:
+        """¿Puede haber tareas en un formato anterior al actual?"""
+        return self.schema_version() < SCHEMA_VERSION
+
+    def migrate(self, batch_size: int | None = None, pausa: float = 0.0,
+                progreso=None) -> dict:
+        """
+        Convierte en el lugar las tareas de esquemas anteriores al actual.
+
+        - Por lotes de ids (índice de `id`), con `pausa` segundos entre lotes
+          para no acaparar el servidor: la aplicación puede seguir en uso.
+        - Cada tarea se actualiza solo si sigue como se leyó (el filtro incluye
+          los valores leídos), así que nunca pisa una escritura concurrente;
+          las que cambiaron en medio se reintentan en otra pasada.
+        - Reanudable: tras cada lote guarda el último id en counters.
+
+        Las tareas con status o fecha inválidos se dejan como están y se
+        reportan. Al terminar sin inválidas marca el esquema como actual.
+        `progreso(id, migradas)` se llama tras cada lote.
+        """
+        batch_size = batch_size or self.BATCH_SIZE
+        migradas = 0
+        invalidas: set[int] = set()
+        while True:
+            checkpoint = self.counters.find_one({"_id": self.MIGRATION_ID})
+            last_id = checkpoint["seq"] if checkpoint else 0
+            cambiadas = 0
+
+            while True:
+                lote = list(
+                    self.collection.find({"id": {"$gt": last_id}, "v": {"$ne": SCHEMA_VERSION}},
+                                         {"_id": 0, "id": 1, "fecha": 1, "status": 1})
+                    .sort("id", 1)
+                    .limit(batch_size)
+                )
+                if not lote:
+                    break
+
+                ops = []
+                for doc in lote:
+                    actual = {campo: doc[campo] for campo in ("fecha", "status") if campo in doc}
+                    try:
+                        nuevo = TareaCodec.encode(actual)
+                    except ValueError:
+                        invalidas.add(doc["id"])
+                        continue
+                    ops.append(UpdateOne({"id": doc["id"], **actual},
+                                         {"$set": {**nuevo, "v": SCHEMA_VERSION}}))
+
+                if ops:
+                    result = self.collection.bulk_write(ops, ordered=False)
+                    migradas += result.modified_count
+                    cambiadas += len(ops) - result.matched_count
+
+                last_id = lote[-1]["id"]
+                self.counters.update_one({"_id": self.MIGRATION_ID}, {"$set": {"seq": last_id}},
+                                         upsert=True)
+                if progreso is not None:
+                    progreso(last_id, migradas)
+                if pausa:
+                    time.sleep(pausa)
+
+            self.counters.delete_one({"_id": self.MIGRATION_ID})
+            if not cambiadas:
+                break
+
+        if not invalidas:
+            self.counters.update_one({"_id": self.SCHEMA_ID}, {"$max": {"seq": SCHEMA_VERSION}},
+                                     upsert=True)
+            self._schema = SCHEMA_VERSION
+        return {"migradas": migradas, "invalidas": sorted(invalidas)}
+
+
+    # ----------------------------------------------------------------------
+    # ESCRITURA
+    # ----------------------------------------------------------------------
+    def insert(self, tarea: dict):
+        self.collection.insert_one({**TareaCodec.encode(tarea), "v": SCHEMA_VERSION})
+
+    def update(self, id_value: int, cambios: dict, rev: int | None = None) -> dict | None:
+        filtro = {"id": id_value}
+        if rev is not None:
+            filtro["rev"] = rev or None     # None también encuentra a las tareas sin `rev`
+        # Devuelve el documento ya actualizado: sin un get() extra
+        tarea = self.collection.find_one_and_update(
+            filtro,
+            {"$set": TareaCodec.encode(cambios), "$inc": {"rev": 1}},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER,
+        )
+        if tarea is None and rev is not None:
+            actual = self.get(id_value)
+            if actual is not None:
+                raise Conflicto(actual)
+        return TareaCodec.decode(tarea) if tarea is not None else None
+
+    def delete(self, id_value: int) -> bool:
+        return self.collection.delete_one({"id": id_value}).deleted_count > 0
+
+    def _bulk(self, ops: list, ordered: bool) -> list[bool]:
+        """
+        Ejecuta un lote con bulk_write y devuelve, por operación, si se aplicó.
+
+        En modo ordenado MongoDB se detiene en el primer error, así que las
+        operaciones posteriores también se marcan como no aplicadas.
+        """
+        ok = [True] * len(ops)
+        try:
+            self.collection.bulk_write(ops, ordered=ordered)
+        except BulkWriteError as e:
+            failed = [err["index"] for err in e.details.get("writeErrors", [])]
+            for index in failed:
+                ok[index] = False
+            if ordered and failed:
+                ok[min(failed):] = [False] * (len(ops) - min(failed))
+        return ok
+
+    def insert_many(self, tareas: list[dict], ordered: bool) -> list[bool]:
+        return self._bulk([InsertOne({**TareaCodec.encode(tarea), "v": SCHEMA_VERSION})
+                           for tarea in tareas], ordered)
+
+    def update_many(self, updates: list[tuple[int, dict]], ordered: bool,
+                    lww: bool = False) -> list[bool]:
+        ids = [id_value for id_value, _ in updates]
+        existing = self.existing_ids(ids)
+        ok = self._bulk([UpdateOne(_lww({"id": id_value}, cambios["updated_at"] if lww else None),
+                                   {"$set": TareaCodec.encode(cambios), "$inc": {"rev": 1}})
+                         for id_value, cambios in updates], ordered)
+        if lww:
+            # bulk_write solo cuenta los aplicados: se relee qué updated_at quedó
+            guardado = {doc["id"]: doc.get("updated_at") for doc in
+                        self.collection.find({"id": {"$in": ids}}, {"_id": 0, "id": 1, "updated_at": 1})}
+            ok = [applied and guardado.get(id_value) == cambios["updated_at"]
+                  for (id_value, cambios), applied in zip(updates, ok)]
+        return [applied and id_value in existing for id_value, applied in zip(ids, ok)]
+
+    def delete_many(self, ids: list[int], ordered: bool,
+                    lww: list[datetime] | None = None) -> list[bool]:
+        existing = self.existing_ids(ids)
+        ok = self._bulk([DeleteOne(_lww({"id": id_value}, lww[i] if lww is not None else None))
+                         for i, id_value in enumerate(ids)], ordered)
+        if lww is not None:
+            # Las que siguen ahí las conservó el last writer wins
+            existing -= self.existing_ids(ids)
+        results = []
+        for id_value, applied in zip(ids, ok):
+            # Un id repetido en el lote solo se elimina la primera vez
+            results.append(applied and id_value in existing)
+            if applied:
+                existing.discard(id_value)
+        return results
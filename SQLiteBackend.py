@@ -0,0 +1,393 @@
+# SQLiteBackend.py
+from __future__ import annotations
+
+import sqlite3
+import threading
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import TareaCodec
+from TareaBackend import SORTS, Conflicto, seed_ids
+
+# Mismo formato que en MongoDB (ver TareaCodec): status como código, para
+# que "orden: status" use el índice. La fecha se guarda como texto ISO, que
+# ordena igual que la fecha.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tareas (
+    id          INTEGER PRIMARY KEY,
+    titulo      TEXT NOT NULL,
+    descripcion TEXT NOT NULL DEFAULT '',
+    status      INTEGER NOT NULL,
+    fecha       TEXT NOT NULL,
+    updated_at  TEXT,
+    rev         INTEGER
+);
+-- Los mismos índices compuestos de db.INDEXES (id al final como desempate)
+CREATE INDEX IF NOT EXISTS tareas_status_fecha ON tareas (status, fecha, id);
+CREATE INDEX IF NOT EXISTS tareas_status_id ON tareas (status, id);
+CREATE INDEX IF NOT EXISTS tareas_fecha ON tareas (fecha, id);
+CREATE INDEX IF NOT EXISTS tareas_updated_at ON tareas (updated_at);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    seq  INTEGER NOT NULL
+);
+"""
+
+COLUMNAS = ("id", "titulo", "descripcion", "status", "fecha", "updated_at", "rev")
+_SELECT = f"SELECT {', '.join(COLUMNAS)} FROM tareas"
+_INSERT = f"INSERT INTO tareas ({', '.join(COLUMNAS)}) VALUES ({', '.join('?' * len(COLUMNAS))})"
+
+
+def _encode(campo: str, valor):
+    if valor is None:
+        return None
+    match campo:
+        case "status":
+            return TareaCodec.encode_status(valor)
+        case "fecha":
+            return TareaCodec.encode_fecha(valor).date().isoformat()
+        case "updated_at":
+            # Siempre con microsegundos: el texto ordena igual que la fecha
+            return valor.isoformat(timespec="microseconds")
+    return valor
+
+
+def _fila(tarea: dict) -> tuple:
+    return tuple(_encode(campo, tarea.get(campo)) for campo in COLUMNAS)
+
+
+def _decode(fila: tuple) -> dict:
+    tarea = dict(zip(COLUMNAS, fila))
+    tarea["status"] = TareaCodec.status_name(tarea["status"])
+    tarea["fecha"] = date.fromisoformat(tarea["fecha"])
+    if tarea["updated_at"] is None:
+        del tarea["updated_at"]
+    else:
+        tarea["updated_at"] = datetime.fromisoformat(tarea["updated_at"])
+    if tarea["rev"] is None:
+        del tarea["rev"]
+    return tarea
+
+
+# Last writer wins: solo si la tarea guardada no es más reciente
+_LWW = " AND (updated_at IS NULL OR updated_at <= ?)"
+
+
+def _in(n: int) -> str:
+    return f"({', '.join('?' * n)})"
+
+
+class SQLiteBackend:
+    """
+    Tareas en un archivo SQLite local: sin servidor ni red.
+
+    Una sola conexión compartida entre hilos (AsyncTareaService llama desde
+    varios) protegida con un lock; el archivo usa WAL, así que otro proceso
+    (p.ej. `./app.py --conky`) puede leer mientras la aplicación escribe.
+    """
+
+    name = "sqlite"
+
+    COUNTER_ID = "tareas"
+    VERSION_ID = "tareas_version"
+    MAX_VARIABLES = 500     # Parámetros por sentencia en las consultas IN (...)
+
+    def __init__(self, path: str | Path = ":memory:"):
+        self.path = path if path == ":memory:" else Path(path).expanduser()
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.RLock()
+        self._archivos: dict[str, SQLiteBackend] = {}
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Abre el archivo (y crea el esquema) en el primer uso."""
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    if self.path != ":memory:":
+                        self.path.parent.mkdir(parents=True, exist_ok=True)
+                    conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute("PRAGMA synchronous=NORMAL")
+                    conn.create_function("py_lower", 1, str.lower, deterministic=True)
+                    conn.executescript(SCHEMA)
+                    if "rev" not in {fila[1] for fila in conn.execute("PRAGMA table_info(tareas)")}:
+                        # Archivo creado antes de la columna
+                        conn.execute("ALTER TABLE tareas ADD COLUMN rev INTEGER")
+                    self._conn = conn
+        return self._conn
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            conn = self.conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _fetch(self, sql: str, params: Iterable = ()) -> list[tuple]:
+        with self._lock:
+            return self.conn.execute(sql, tuple(params)).fetchall()
+
+    def close(self):
+        with self._lock:
+            for archivo in self._archivos.values():
+                archivo.close()
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = None
+
+    def available(self) -> bool:
+        try:
+            return self.conn is not None
+        except (sqlite3.Error, OSError):
+            return False
+
+    def setup(self) -> bool:
+        return self.available()    # El esquema se crea al abrir el archivo
+
+    # ----------------------------------------------------------------------
+    # LECTURA
+    # ----------------------------------------------------------------------
+    def list(self) -> list[dict]:
+        return [_decode(fila) for fila in self._fetch(f"{_SELECT} ORDER BY id")]
+
+    def get(self, id_value: int) -> dict | None:
+        filas = self._fetch(f"{_SELECT} WHERE id = ?", (id_value,))
+        return _decode(filas[0]) if filas else None
+
+    def cursor(self, batch_size: int) -> Iterator[dict]:
+        """Lotes por keyset sobre la llave primaria: sin cursor abierto entre lotes."""
+        last_id = None
+        while True:
+            if last_id is None:
+                filas = self._fetch(f"{_SELECT} ORDER BY id LIMIT ?", (batch_size,))
+            else:
+                filas = self._fetch(f"{_SELECT} WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size))
+            for fila in filas:
+                yield _decode(fila)
+            if len(filas) < batch_size:
+                return
+            last_id = filas[-1][0]
+
+    def _where(self, filtros: dict) -> tuple[list[str], list]:
+        conditions, params = [], []
+        status = filtros.get("status")
+        if status is not None:
+            codigos = [TareaCodec.encode_status(s) for s in ([status] if isinstance(status, str) else status)]
+            conditions.append(f"status IN {_in(len(codigos))}")
+            params += codigos
+        if filtros.get("desde") is not None:
+            conditions.append("fecha >= ?")
+            params.append(_encode("fecha", filtros["desde"]))
+        if filtros.get("hasta") is not None:
+            conditions.append("fecha <= ?")
+            params.append(_encode("fecha", filtros["hasta"]))
+        if filtros.get("texto"):
+            # lower() de SQLite solo conoce ASCII: se usa el de Python (ver conn)
+            conditions.append("(instr(py_lower(titulo), ?) OR instr(py_lower(descripcion), ?))")
+            params += [filtros["texto"].lower()] * 2
+        if filtros.get("ids") is not None:
+            ids = list(filtros["ids"])
+            conditions.append(f"id IN {_in(len(ids))}")
+            params += ids
+        return conditions, params
+
+    def query(self, filtros: dict, sort: str = "id", limit: int | None = None,
+              after: dict | None = None, before: dict | None = None,
+              campos: Iterable[str] | None = None) -> list[dict]:
+        conditions, params = self._where(filtros)
+        fields = [field for field, _ in SORTS[sort]]
+        # Keyset con row values: (status, fecha, id) > (?, ?, ?) usa el índice
+        for boundary, op in ((after, ">"), (before, "<")):
+            if boundary is not None:
+                conditions.append(f"({', '.join(fields)}) {op} {_in(len(fields))}")
+                params += [_encode(field, boundary[field]) for field in fields]
+
+        # Hacia atrás se recorre el índice en orden inverso y se invierte
+        backwards = before is not None and after is None
+        order = ", ".join(f"{field} {'DESC' if backwards else 'ASC'}" for field in fields)
+        sql = _SELECT
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY {order}"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        page = [_decode(fila) for fila in self._fetch(sql, params)]
+        return page[::-1] if backwards else page
+
+    def count(self, filtros: dict) -> int:
+        conditions, params = self._where(filtros)
+        sql = "SELECT COUNT(*) FROM tareas"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        return self._fetch(sql, params)[0][0]
+
+    def existing_ids(self, ids: list[int]) -> set[int]:
+        existing = set()
+        for i in range(0, len(ids), self.MAX_VARIABLES):
+            chunk = ids[i:i + self.MAX_VARIABLES]
+            existing.update(fila[0] for fila in
+                            self._fetch(f"SELECT id FROM tareas WHERE id IN {_in(len(chunk))}", chunk))
+        return existing
+
+    def search(self, texto: str, limit: int, filtros: dict) -> list[dict]:
+        raise NotImplementedError("SQLiteBackend no tiene índice de texto: se usa TextIndex")
+
+    def stats(self, semanas: int, hoy: date) -> dict:
+        completado = TareaCodec.STATUS_CODES["completado"]
+        inicio = hoy.isoformat()
+        fin = (hoy + timedelta(weeks=semanas)).isoformat()
+        with self._lock:
+            por_status = {nombre: 0 for nombre in TareaCodec.STATUS_CODES}
+            for codigo, n in self._fetch("SELECT status, COUNT(*) FROM tareas GROUP BY status"):
+                por_status[TareaCodec.status_name(codigo)] += n
+            vencidas = self._fetch("SELECT COUNT(*) FROM tareas WHERE status != ? AND fecha < ?",
+                                   (completado, inicio))[0][0]
+            por_semana = dict(self._fetch(
+                "SELECT CAST((julianday(fecha) - julianday(?)) / 7 AS INTEGER) AS semana, COUNT(*)"
+                " FROM tareas WHERE status != ? AND fecha >= ? AND fecha < ? GROUP BY semana",
+                (inicio, completado, inicio, fin),
+            ))
+        return {
+            "total": sum(por_status.values()),
+            "por_status": por_status,
+            "vencidas": vencidas,
+            "semanas": [(hoy + timedelta(weeks=i), por_semana.get(i, 0)) for i in range(semanas)],
+            "hoy": hoy,
+        }
+
+    # ----------------------------------------------------------------------
+    # ARCHIVO
+    # ----------------------------------------------------------------------
+    # Cada archivo de tareas es otra base SQLite junto a la principal:
+    # tareas.db -> tareas_archive_2024.db (mis.db -> mis_archive_2024.db). La
+    # principal no crece con lo archivado y un periodo se respalda (o se
+    # descarta) copiando un solo archivo.
+    def _archive_path(self, nombre: str) -> Path:
+        return self.path.with_name(f"{self.path.stem}{nombre.removeprefix('tareas')}{self.path.suffix}")
+
+    def archives(self) -> list[str]:
+        nombres = set(self._archivos)
+        if self.path != ":memory:":
+            nombres.update(f"tareas{archivo.stem.removeprefix(self.path.stem)}" for archivo in
+                           self.path.parent.glob(f"{self.path.stem}_archive*{self.path.suffix}"))
+        return sorted(nombres)
+
+    def archive(self, nombre: str) -> SQLiteBackend:
+        with self._lock:
+            if nombre not in self._archivos:
+                path = ":memory:" if self.path == ":memory:" else self._archive_path(nombre)
+                self._archivos[nombre] = SQLiteBackend(path)
+            return self._archivos[nombre]
+
+    # ----------------------------------------------------------------------
+    # CONTADORES
+    # ----------------------------------------------------------------------
+    def _counter(self, conn: sqlite3.Connection, name: str, sql: str, valor: int) -> int:
+        return conn.execute(
+            f"INSERT INTO counters (name, seq) VALUES (?, ?)"
+            f" ON CONFLICT (name) DO UPDATE SET seq = {sql} RETURNING seq",
+            (name, valor),
+        ).fetchone()[0]
+
+    def reserve_ids(self, n: int) -> int:
+        # Sin contador (archivo anterior a él): parte del mayor id guardado,
+        # archivos incluidos; advance_ids() nunca retrocede, sembrar dos veces no daña
+        if not self._fetch("SELECT 1 FROM counters WHERE name = ?", (self.COUNTER_ID,)):
+            seed_ids(self)
+        with self._transaction() as conn:
+            return self._counter(conn, self.COUNTER_ID, "seq + excluded.seq", n) - n + 1
+
+    def advance_ids(self, max_id: int | None = None) -> int:
+        with self._transaction() as conn:
+            if max_id is None:
+                max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM tareas").fetchone()[0]
+            return self._counter(conn, self.COUNTER_ID, "MAX(seq, excluded.seq)", max_id)
+
+    def version(self) -> int:
+        filas = self._fetch("SELECT seq FROM counters WHERE name = ?", (self.VERSION_ID,))
+        return filas[0][0] if filas else 0
+
+    def touch(self) -> int:
+        with self._transaction() as conn:
+            return self._counter(conn, self.VERSION_ID, "seq + 1", 1)
+
+    # ----------------------------------------------------------------------
+    # ESCRITURA
+    # ----------------------------------------------------------------------
+    def insert(self, tarea: dict):
+        fila = _fila(tarea)
+        with self._transaction() as conn:
+            conn.execute(_INSERT, fila)
+
+    def insert_many(self, tareas: list[dict], ordered: bool) -> list[bool]:
+        """Un solo commit por lote (cada INSERT aparte: un id duplicado no tumba el lote)."""
+        filas = [_fila(tarea) for tarea in tareas]
+        ok = [False] * len(filas)
+        with self._transaction() as conn:
+            for i, fila in enumerate(filas):
+                try:
+                    conn.execute(_INSERT, fila)
+                    ok[i] = True
+                except sqlite3.IntegrityError:
+                    if ordered:
+                        break
+        return ok
+
+    def _set(self, cambios: dict) -> tuple[str, list]:
+        """SET de un UPDATE (sube `rev`); los campos que no son columnas se ignoran."""
+        campos = [campo for campo in COLUMNAS[1:-1] if campo in cambios]
+        return (", ".join([*(f"{campo} = ?" for campo in campos), "rev = COALESCE(rev, 0) + 1"]),
+                [_encode(campo, cambios[campo]) for campo in campos])
+
+    def update(self, id_value: int, cambios: dict, rev: int | None = None) -> dict | None:
+        asignaciones, params = self._set(cambios)
+        condicion, params = "id = ?", [*params, id_value]
+        if rev is not None:
+            condicion += " AND COALESCE(rev, 0) = ?"
+            params.append(rev)
+        with self._transaction() as conn:
+            aplicado = conn.execute(f"UPDATE tareas SET {asignaciones} WHERE {condicion}", params).rowcount
+            fila = conn.execute(f"{_SELECT} WHERE id = ?", (id_value,)).fetchone()
+        if fila and not aplicado:
+            raise Conflicto(_decode(fila))
+        return _decode(fila) if fila else None
+
+    def delete(self, id_value: int) -> bool:
+        with self._transaction() as conn:
+            return conn.execute("DELETE FROM tareas WHERE id = ?", (id_value,)).rowcount > 0
+
+    def update_many(self, updates: list[tuple[int, dict]], ordered: bool,
+                    lww: bool = False) -> list[bool]:
+        # Se codifica todo antes de abrir la transacción: un status inválido
+        # lanza ValueError sin escribir nada (como el lote de MongoDB)
+        sentencias = [(id_value, *self._set(cambios),
+                       [_encode("updated_at", cambios["updated_at"])] if lww else [])
+                      for id_value, cambios in updates]
+        condicion = "id = ?" + (_LWW if lww else "")
+        ok = []
+        with self._transaction() as conn:
+            for id_value, asignaciones, params, lww_params in sentencias:
+                cursor = conn.execute(f"UPDATE tareas SET {asignaciones} WHERE {condicion}",
+                                      (*params, id_value, *lww_params))
+                ok.append(cursor.rowcount > 0)
+        return ok
+
+    def delete_many(self, ids: list[int], ordered: bool,
+                    lww: list[datetime] | None = None) -> list[bool]:
+        if lww is None:
+            sentencias = [("DELETE FROM tareas WHERE id = ?", (id_value,)) for id_value in ids]
+        else:
+            sentencias = [(f"DELETE FROM tareas WHERE id = ?{_LWW}", (id_value, _encode("updated_at", valor)))
+                          for id_value, valor in zip(ids, lww)]
+        with self._transaction() as conn:
+            return [conn.execute(sql, params).rowcount > 0 for sql, params in sentencias]
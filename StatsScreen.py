@@ -0,0 +1,60 @@
+# StatsScreen.py
+from datetime import timedelta
+
+from textual.app import ComposeResult
+from textual.screen import Screen
+from textual.widgets import Header, Footer, Static
+from textual.binding import Binding
+
+from AsyncTareaService import AsyncTareaService
+
+
+def _barra(n: int, maximo: int, ancho: int = 30) -> str:
+    return "█" * round(ancho * n / maximo) if maximo else ""
+
+
+class StatsScreen(Screen):
+    """Resumen de las tareas (TareaService.stats())."""
+
+    BINDINGS = [
+        Binding("escape", "app.pop_screen", "Volver"),
+        Binding("s", "app.pop_screen", "Volver"),
+        Binding("r", "reload", "Actualizar"),
+    ]
+
+    REFRESH_INTERVAL = 5.0   # Segundos; sin escrituras solo se lee la versión
+
+    def compose(self) -> ComposeResult:
+        yield Header(name="Estadísticas")
+        yield Static("Cargando...", id="stats")
+        yield Footer()
+
+    async def on_mount(self):
+        self.sub_title = "estadísticas"
+        await self.action_reload()
+        self.set_interval(self.REFRESH_INTERVAL, self.action_reload)
+
+    async def action_reload(self):
+        stats = await AsyncTareaService.stats()
+        if not stats:
+            self.query_one("#stats", Static).update("Sin conexión a la base de datos.")
+            return
+        self.query_one("#stats", Static).update(self._format_stats(stats))
+
+    def _format_stats(self, stats: dict) -> str:
+        lineas = [
+            f"[b]Total[/b]        {stats['total']:>8}",
+            f"[b red]Vencidas[/b red]     {stats['vencidas']:>8}",
+            "",
+            "[b]Por status[/b]",
+        ]
+        maximo = max(stats["por_status"].values(), default=0)
+        for nombre, n in stats["por_status"].items():
+            lineas.append(f"  {nombre:<11}{n:>8}  [green]{_barra(n, maximo)}[/green]")
+
+        lineas += ["", f"[b]Próximas {len(stats['semanas'])} semanas[/b] (sin completar)"]
+        maximo = max((n for _, n in stats["semanas"]), default=0)
+        for inicio, n in stats["semanas"]:
+            fin = inicio + timedelta(days=6)
+            lineas.append(f"  {inicio:%d/%m} – {fin:%d/%m}{n:>6}  [yellow]{_barra(n, maximo)}[/yellow]")
+        return "\n".join(lineas)
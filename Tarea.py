@@ -0,0 +1,92 @@
+# Tarea.py
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import date, datetime
+
+import bson
+import TareaCodec
+from bson.codec_options import CodecOptions
+
+# Sin tz_aware ni document_class propios: el decodificador de C hace todo
+_CODEC_OPTIONS = CodecOptions()
+
+
+def _status(value) -> str:
+    try:
+        return TareaCodec.status_name(value)
+    except ValueError:
+        return value    # Status fuera del enum (v1): se muestra tal cual
+
+
+def _fecha(value) -> date | str | None:
+    if type(value) is date or value is None:
+        return value
+    try:
+        return TareaCodec.decode_fecha(value)
+    except ValueError:
+        return value    # Fecha de texto inválida (v1): se muestra tal cual
+
+
+@dataclass(slots=True)
+class Tarea:
+    """
+    Una tarea como registro compacto: sin el diccionario de cada dict (una
+    fracción de su memoria) y con acceso por atributo. Para recorrer muchas
+    tareas; las operaciones CRUD siguen usando dicts.
+
+    `tarea["titulo"]` y `tarea.get("rev", 0)` también funcionan, así que se
+    puede pasar a código escrito para dicts que solo lee (ConkyCache.render...).
+    """
+
+    id: int
+    titulo: str
+    descripcion: str
+    status: str
+    fecha: date
+    updated_at: datetime | None = None
+    rev: int = 0
+
+    @classmethod
+    def from_doc(cls, doc: Mapping) -> Tarea:
+        """Desde un documento de MongoDB (esquema v1 o v2) o un dict de la aplicación."""
+        return cls(
+            doc["id"],
+            doc.get("titulo", ""),
+            doc.get("descripcion", ""),
+            _status(doc.get("status")),
+            _fecha(doc.get("fecha")),
+            doc.get("updated_at"),
+            doc.get("rev", 0),
+        )
+
+    @classmethod
+    def from_bson(cls, data: bytes) -> Tarea:
+        """Desde los bytes de un documento BSON (p.ej. RawBSONDocument.raw)."""
+        return cls.from_doc(bson.decode(data, _CODEC_OPTIONS))
+
+    @classmethod
+    def from_raw_batch(cls, data: bytes) -> list[Tarea]:
+        """
+        Desde un lote de documentos BSON concatenados, como los entrega
+        find_raw_batches(): se decodifica de una vez en C y cada dict
+        intermedio se descarta en cuanto se crea su registro.
+        """
+        return [cls.from_doc(doc) for doc in bson.decode_all(data, _CODEC_OPTIONS)]
+
+    def as_dict(self) -> dict:
+        tarea = {"id": self.id, "titulo": self.titulo, "descripcion": self.descripcion,
+                 "status": self.status, "fecha": self.fecha, "rev": self.rev}
+        if self.updated_at is not None:
+            tarea["updated_at"] = self.updated_at
+        return tarea
+
+    # Lectura como dict
+    def __getitem__(self, campo: str):
+        if campo not in self.__slots__:
+            raise KeyError(campo)
+        return getattr(self, campo)
+
+    def get(self, campo: str, default=None):
+        return getattr(self, campo) if campo in self.__slots__ else default
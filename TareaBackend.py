@@ -0,0 +1,266 @@
+# TareaBackend.py
+"""
+Almacenamiento de TareaService.
+
+TareaService (caché, índice de búsqueda local, versión para conky, lotes)
+delega la lectura y escritura de tareas en un backend. Todos trabajan con
+tareas en el formato de la aplicación (fecha como date, status como nombre;
+ver TareaCodec) y cada uno decide cómo guardarlas:
+
+    mongo    MongoBackend: colección 'tareas' de MongoDB (por defecto)
+    sqlite   SQLiteBackend: archivo local, sin red (TAREAS_SQLITE)
+    memory   MemoryBackend: diccionario en memoria, sin persistencia
+
+Se elige con TAREAS_BACKEND en .env. `./conformance.py` verifica que todos
+se comporten igual.
+
+Las tareas completadas antiguas se pueden mover a un archivo aparte
+(TareaService.archive()): la colección principal, la que recorren la
+tabla, conky y las búsquedas, solo crece con las tareas vigentes.
+
+Cada tarea lleva `rev`, su número de revisión: empieza en 1 y toda escritura
+lo incrementa (las tareas anteriores al campo no lo tienen y cuentan como 0).
+update() con `rev` solo escribe si la tarea sigue en esa revisión.
+"""
+from __future__ import annotations
+
+import os
+from collections.abc import Iterable, Iterator
+from datetime import date, datetime, timedelta
+from typing import Protocol
+
+from dotenv import load_dotenv
+
+import TareaCodec
+
+load_dotenv()
+
+BACKENDS = ("mongo", "sqlite", "memory")
+SQLITE_PATH = os.getenv("TAREAS_SQLITE", "~/.local/share/tareas/tareas.db")
+
+# Archivo de tareas frías: ARCHIVE, o ARCHIVE_<periodo> con ARCHIVE_BUCKETS
+# (un archivo por año o por mes de la fecha de la tarea, para poder
+# respaldar o descartar un periodo completo)
+ARCHIVE = "tareas_archive"
+ARCHIVE_BUCKETS = {"year": "%Y", "month": "%Y_%m"}
+
+# Ordenamientos de query(). Terminan en `id` para que el keyset sea único
+# (ver los índices compuestos de db.INDEXES y SQLiteBackend.SCHEMA).
+SORTS = {
+    "id": [("id", 1)],
+    "fecha": [("fecha", 1), ("id", 1)],
+    "status": [("status", 1), ("fecha", 1), ("id", 1)],
+}
+
+
+class Conflicto(Exception):
+    """La tarea cambió desde que se leyó: su `rev` ya no coincide."""
+
+    def __init__(self, actual: dict):
+        super().__init__(f"la tarea {actual['id']} está en la revisión {actual.get('rev', 0)}")
+        self.actual = actual    # La tarea como está guardada ahora
+
+
+class TareaBackend(Protocol):
+    """
+    Operaciones que TareaService necesita de un almacenamiento.
+
+    `filtros` es un dict con las llaves opcionales status (nombre o lista),
+    desde/hasta (date, inclusivos), texto (subcadena sin distinguir
+    mayúsculas en título o descripción) e ids; los valores None se ignoran.
+    Las operaciones masivas reciben un lote y devuelven, por elemento, si se
+    aplicó; en modo ordenado se detienen en el primer error.
+    """
+
+    name: str
+
+    def available(self) -> bool:
+        """¿Se puede usar ahora? (p.ej. False mientras MongoDB está caído)"""
+
+    def setup(self) -> bool:
+        """Configuración única (`./app.py --setup`): índices, esquema..."""
+
+    # Lectura
+    def list(self) -> list[dict]: ...
+
+    def get(self, id_value: int) -> dict | None: ...
+
+    def query(self, filtros: dict, sort: str = "id", limit: int | None = None,
+              after: dict | None = None, before: dict | None = None,
+              campos: Iterable[str] | None = None) -> list[dict]:
+        """
+        Tareas filtradas, ordenadas por SORTS[sort], con keyset sobre los
+        campos del orden (`after`/`before`). `limit` None = todas; `campos`
+        puede limitar los devueltos (los del orden siempre se incluyen).
+        """
+
+    def count(self, filtros: dict) -> int: ...
+
+    def existing_ids(self, ids: list[int]) -> set[int]: ...
+
+    def cursor(self, batch_size: int) -> Iterator[dict]:
+        """Todas las tareas ordenadas por id, leídas en lotes."""
+
+    def search(self, texto: str, limit: int, filtros: dict) -> list[dict]:
+        """Búsqueda con índice de texto propio; NotImplementedError si no tiene."""
+
+    def stats(self, semanas: int, hoy: date) -> dict:
+        """Ver TareaService.stats()."""
+
+    # Escritura
+    def insert(self, tarea: dict): ...
+
+    def update(self, id_value: int, cambios: dict, rev: int | None = None) -> dict | None:
+        """
+        Aplica los cambios, incrementa `rev` y devuelve la tarea actualizada
+        (None si no existe). Con `rev`, Conflicto si la tarea ya no está en
+        esa revisión.
+        """
+
+    def delete(self, id_value: int) -> bool: ...
+
+    def insert_many(self, tareas: list[dict], ordered: bool) -> list[bool]: ...
+
+    def update_many(self, updates: list[tuple[int, dict]], ordered: bool,
+                    lww: bool = False) -> list[bool]:
+        """
+        True por par si la tarea existía y se actualizó. Con `lww` (last
+        writer wins) cada par solo se aplica si la tarea guardada no es más
+        reciente que su `cambios["updated_at"]`, y es True si la tarea quedó
+        con ese updated_at (también si ya lo tenía: repetirlo no cambia nada).
+        """
+
+    def delete_many(self, ids: list[int], ordered: bool,
+                    lww: list[datetime] | None = None) -> list[bool]:
+        """
+        True por id si la tarea existía y se eliminó. Con `lww` (un updated_at
+        por id) no se elimina la tarea que se actualizó después.
+        """
+
+    # Archivo
+    def archives(self) -> list[str]:
+        """Nombres de los archivos que existen (ver archive_name()), ordenados."""
+
+    def archive(self, nombre: str) -> TareaBackend:
+        """
+        Backend del mismo tipo sobre el archivo `nombre`; lo crea (con sus
+        índices) si no existe. Sus contadores no se usan.
+        """
+
+    # Contadores
+    def reserve_ids(self, n: int) -> int:
+        """Reserva `n` ids consecutivos de forma atómica y devuelve el primero."""
+
+    def advance_ids(self, max_id: int | None = None) -> int:
+        """Adelanta el contador a `max_id` (None = el mayor id guardado); nunca retrocede."""
+
+    def version(self) -> int:
+        """Contador de escrituras (ver ConkyCache)."""
+
+    def touch(self) -> int:
+        """Incrementa la versión y devuelve la nueva."""
+
+
+# Operaciones del protocolo: las que Metrics mide en el ámbito "backend"
+OPERACIONES = tuple(nombre for nombre, valor in vars(TareaBackend).items()
+                    if callable(valor) and not nombre.startswith("_"))
+
+
+def create(name: str | None = None) -> TareaBackend:
+    """Backend por nombre (por defecto TAREAS_BACKEND de .env)."""
+    name = name or os.getenv("TAREAS_BACKEND", "mongo")
+    match name:
+        case "mongo":
+            from MongoBackend import MongoBackend
+            return MongoBackend()
+        case "sqlite":
+            from SQLiteBackend import SQLiteBackend
+            return SQLiteBackend(SQLITE_PATH)
+        case "memory":
+            from MemoryBackend import MemoryBackend
+            return MemoryBackend()
+    raise ValueError(f"TAREAS_BACKEND inválido: {name!r} (usa {', '.join(BACKENDS)})")
+
+
+def seed_ids(backend: TareaBackend) -> int:
+    """
+    Adelanta el contador de `backend` al mayor id guardado, contando los de
+    sus archivos: un id archivado tampoco se vuelve a asignar. Es idempotente
+    (advance_ids() nunca retrocede); devuelve el valor del contador.
+    """
+    seq = backend.advance_ids()
+    for nombre in backend.archives():
+        seq = backend.advance_ids(backend.archive(nombre).advance_ids())
+    return seq
+
+
+def archive_name(fecha: date, bucket: str | None = None) -> str:
+    """Archivo que le toca a una tarea con esa fecha (`bucket`: None, "year" o "month")."""
+    if bucket is None:
+        return ARCHIVE
+    if bucket not in ARCHIVE_BUCKETS:
+        raise ValueError(f"bucket inválido: {bucket!r} (usa {', '.join(ARCHIVE_BUCKETS)})")
+    return f"{ARCHIVE}_{fecha.strftime(ARCHIVE_BUCKETS[bucket])}"
+
+
+# ----------------------------------------------------------------------
+# FILTROS Y ORDEN EN PYTHON (MemoryBackend y las verificaciones)
+# ----------------------------------------------------------------------
+def normalize(tarea: dict) -> dict:
+    """Copia en el formato de la aplicación; ValueError si status o fecha son inválidos."""
+    return TareaCodec.decode(TareaCodec.encode(tarea))
+
+
+def matches(tarea: dict, filtros: dict) -> bool:
+    """¿Pasa la tarea los `filtros`? (misma semántica que el filtro de MongoDB)"""
+    status = filtros.get("status")
+    if status is not None:
+        nombres = {TareaCodec.status_name(s) for s in ([status] if isinstance(status, str) else status)}
+        if tarea.get("status") not in nombres:
+            return False
+    if filtros.get("desde") is not None and tarea["fecha"] < filtros["desde"]:
+        return False
+    if filtros.get("hasta") is not None and tarea["fecha"] > filtros["hasta"]:
+        return False
+    texto = filtros.get("texto")
+    if texto:
+        texto = texto.lower()
+        if texto not in tarea.get("titulo", "").lower() and texto not in tarea.get("descripcion", "").lower():
+            return False
+    ids = filtros.get("ids")
+    if ids is not None and tarea["id"] not in ids:
+        return False
+    return True
+
+
+def sort_key(tarea: dict, sort: str) -> tuple:
+    """Llave del orden SORTS[sort]; el status se ordena por su código."""
+    return tuple(
+        TareaCodec.STATUS_CODES.get(tarea[field], len(TareaCodec.STATUS_CODES)) if field == "status"
+        else tarea[field]
+        for field, _ in SORTS[sort]
+    )
+
+
+def compute_stats(tareas: Iterable[dict], semanas: int, hoy: date) -> dict:
+    """stats() recorriendo las tareas (el formato lo documenta TareaService.stats())."""
+    por_status = {nombre: 0 for nombre in TareaCodec.STATUS_CODES}
+    por_semana = [0] * semanas
+    total = vencidas = 0
+    fin = hoy + timedelta(weeks=semanas)
+    for tarea in tareas:
+        total += 1
+        por_status[tarea["status"]] = por_status.get(tarea["status"], 0) + 1
+        if tarea["status"] == "completado":
+            continue
+        if tarea["fecha"] < hoy:
+            vencidas += 1
+        elif tarea["fecha"] < fin:
+            por_semana[(tarea["fecha"] - hoy).days // 7] += 1
+    return {
+        "total": total,
+        "por_status": por_status,
+        "vencidas": vencidas,
+        "semanas": [(hoy + timedelta(weeks=i), n) for i, n in enumerate(por_semana)],
+        "hoy": hoy,
+    }
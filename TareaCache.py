@@ -0,0 +1,74 @@
+# TareaCache.py
+import threading
+import time
+from collections import OrderedDict
+
+
+class TareaCache:
+    """
+    Caché LRU acotada de tareas por id, con TTL opcional.
+
+    Es thread-safe (la usan los hilos de AsyncTareaService y LiveSync) y
+    guarda copias: modificar un dict devuelto no altera la caché.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[int, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, id_value: int) -> dict | None:
+        with self._lock:
+            entry = self._data.get(id_value)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._data[id_value]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(id_value)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, tarea: dict):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[tarea["id"]] = (time.monotonic(), dict(tarea))
+            self._data.move_to_end(tarea["id"])
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, id_value: int | None = None):
+        """Olvida una tarea, o todas si no se indica id."""
+        with self._lock:
+            if id_value is None:
+                self._data.clear()
+            else:
+                self._data.pop(id_value, None)
+
+    def ids(self) -> list[int]:
+        """Ids en caché (p.ej. para revisar cuáles siguen existiendo)."""
+        with self._lock:
+            return list(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / consultas if consultas else 0.0,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = self.evictions = 0
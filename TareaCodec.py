@@ -0,0 +1,84 @@
+# TareaCodec.py
+"""
+Formato de una tarea en MongoDB (esquema v2) y en la aplicación.
+
+    campo    aplicación                MongoDB
+    fecha    datetime.date             fecha BSON (medianoche UTC)
+    status   str ("pendiente", ...)    int (STATUS_CODES)
+    v        -                         SCHEMA_VERSION
+
+Las tareas del esquema v1 (fecha como texto "%Y-%m-%d" y status como texto)
+se leen igual; `./app.py --migrate` las convierte en el lugar.
+
+Sin dependencias externas: lo importan ConkyCache y LiveSync además de
+TareaService.
+"""
+from datetime import date, datetime
+
+SCHEMA_VERSION = 2
+
+# Mismos valores que TareaSchema.StatusEnum; el código define el orden de
+# "orden: status" en la tabla
+STATUS_CODES = {"pendiente": 0, "en_progreso": 1, "completado": 2}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+# Valores de status que llegaron a guardarse y no son del enum
+STATUS_ALIASES = {"hecho": "completado"}
+
+
+def status_name(value: str | int) -> str:
+    """Nombre del status a partir de su código o de un texto (v1, alias o StatusEnum)."""
+    if isinstance(value, int):
+        if value not in STATUS_NAMES:
+            raise ValueError(f"Código de status inválido: {value!r}")
+        return STATUS_NAMES[value]
+    value = getattr(value, "value", value)
+    value = STATUS_ALIASES.get(value, value)
+    if value not in STATUS_CODES:
+        raise ValueError(f"Status inválido: {value!r}")
+    return value
+
+
+def encode_status(value: str | int) -> int:
+    return STATUS_CODES[status_name(value)]
+
+
+def encode_fecha(value: date | str) -> datetime:
+    if isinstance(value, datetime):
+        return value.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+    if isinstance(value, str):
+        value = date.fromisoformat(value)
+    return datetime(value.year, value.month, value.day)
+
+
+def decode_fecha(value: datetime | str) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    return date.fromisoformat(value)
+
+
+def encode(tarea: dict) -> dict:
+    """Copia lista para MongoDB; sirve también para $set parciales."""
+    doc = dict(tarea)
+    if doc.get("fecha") is not None:
+        doc["fecha"] = encode_fecha(doc["fecha"])
+    if doc.get("status") is not None:
+        doc["status"] = encode_status(doc["status"])
+    return doc
+
+
+def decode(doc: dict) -> dict:
+    """Convierte en el lugar un documento leído de MongoDB (v1 o v2) y lo devuelve."""
+    doc.pop("_id", None)
+    doc.pop("v", None)
+    if doc.get("fecha") is not None:
+        try:
+            doc["fecha"] = decode_fecha(doc["fecha"])
+        except ValueError:
+            pass    # Fecha de texto inválida (v1): se muestra tal cual
+    if doc.get("status") is not None:
+        try:
+            doc["status"] = status_name(doc["status"])
+        except ValueError:
+            pass    # Status fuera del enum (v1): se muestra tal cual
+    return doc
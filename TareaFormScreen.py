@@ -4,12 +4,49 @@ from textual.screen import ModalScreen
 from textual.widgets import Input, TextArea, Select, Button, Static
 from textual.containers import Container, Grid
 from datetime import date
+from functools import lru_cache
+import time
 import pendulum
 
 from TareaSchema import TareaSchema
 from pydantic import ValidationError
 
 
+# Validadores por campo: funciones puras sobre el valor, con caché (borrar y
+# volver a escribir un valor no lo revalida)
+@lru_cache(maxsize=256)
+def _texto_valido(valor: str) -> bool:
+    return bool(valor.strip())
+
+
+@lru_cache(maxsize=256)
+def _entero_en_rango(valor: str, minimo: int, maximo: int) -> bool:
+    try:
+        return minimo <= int(valor) <= maximo
+    except ValueError:
+        return False
+
+
+@lru_cache(maxsize=256)
+def _construir_fecha(year: str, month: str, day: str) -> date | None:
+    try:
+        return date(int(year or 0), int(month or 0), int(day or 0))
+    except ValueError:
+        return None
+
+
+def _tiene_texto(lineas: list[str]) -> bool:
+    return any(linea and not linea.isspace() for linea in lineas)
+
+
+_VALIDADORES = {
+    "titulo_input": _texto_valido,
+    "date_year": lambda valor: _entero_en_rango(valor, 1, 9999),
+    "date_month": lambda valor: _entero_en_rango(valor, 1, 12),
+    "date_day": lambda valor: _entero_en_rango(valor, 1, 31),
+}
+
+
 class TareaFormScreen(ModalScreen):
     """Formulario para crear/editar tarea — devuelve dict via dismiss(resultado)."""
     CSS_PATH = "style.css"
@@ -19,7 +56,7 @@ class TareaFormScreen(ModalScreen):
     STATUS_OPTIONS = [
         ("Pendiente", "pendiente"),
         ("En Proceso", "en_progreso"),
-        ("Hecho", "hecho"),
+        ("Hecho", "completado"),
     ]
 
     def __init__(self, mode: str = "create", tarea: dict | None = None, **kwargs):
@@ -28,17 +65,17 @@ class TareaFormScreen(ModalScreen):
         super().__init__(**kwargs)
 
     def compose(self) -> ComposeResult:
-        # fecha inicial
-        if self.mode == "update" and self.tarea.get("fecha"):
-            try:
-                initial_date = pendulum.parse(self.tarea["fecha"])
-            except Exception as e:
+        # fecha inicial (TareaService la entrega como date; una fecha v1
+        # inválida llega como el texto guardado)
+        fecha = self.tarea.get("fecha")
+        if self.mode == "update" and isinstance(fecha, date):
+            initial_date = fecha
+        else:
+            if self.mode == "update" and fecha:
                 self.app.notify(
-                    f"Error al interpretar la fecha almacenada: {e}",
+                    f"Error al interpretar la fecha almacenada: {fecha!r}",
                     severity="error"
                 )
-                initial_date = pendulum.today().add(weeks=1)
-        else:
             initial_date = pendulum.today().add(weeks=1)
 
         initial_title = self.tarea.get("titulo", "")
@@ -71,36 +108,95 @@ class TareaFormScreen(ModalScreen):
             id="form_grid",
         )
 
+    # ---------- validación ----------
+    # Cada evento revalida solo el campo que cambió (con la caché de
+    # _VALIDADORES) y guarda su resultado en self._validos. Lo que cruza
+    # campos (que la fecha exista y TareaSchema) corre con debounce: escribir
+    # en una descripción larga no reconstruye la fecha ni el texto completo.
+    VALIDACION_DEBOUNCE = 0.3   # Segundos sin cambios antes de la validación cruzada
+    CAMPOS_FECHA = ("date_year", "date_month", "date_day")
+
     def on_mount(self):
-        self._check_form_validity()
-
-    def on_input_changed(self, _):
-        self._check_form_validity()
-
-    def on_text_area_changed(self, _):
-        self._check_form_validity()
-
-    def on_select_changed(self, _):
-        self._check_form_validity()
-
-    def _is_date_valid(self, year, month, day) -> bool:
-        try:
-            date(int(year or 0), int(month or 0), int(day or 0))
-            return True
-        except ValueError:
-            return False
-
-    def _check_form_validity(self):
-        title = self.query_one("#titulo_input").value.strip()
-        desc = self.query_one("#descripcion_textarea").text.strip()
-        status = self.query_one("#select_status").value
-        year = self.query_one("#date_year").value
-        month = self.query_one("#date_month").value
-        day = self.query_one("#date_day").value
-        btn = self.query_one("#btn_accept")
-        is_valid = bool(title) and bool(desc) and (status is not None) and self._is_date_valid(year, month, day)
-        btn.disabled = not is_valid
-        btn.variant = "success" if is_valid else "default"
+        # Referencias a los widgets: se resuelven una sola vez
+        self._titulo = self.query_one("#titulo_input", Input)
+        self._descripcion = self.query_one("#descripcion_textarea", TextArea)
+        self._status = self.query_one("#select_status", Select)
+        self._fecha_inputs = [self.query_one(f"#{campo}", Input) for campo in self.CAMPOS_FECHA]
+        self._aceptar = self.query_one("#btn_accept", Button)
+
+        self._validos = {
+            "titulo_input": _VALIDADORES["titulo_input"](self._titulo.value),
+            "descripcion_textarea": _tiene_texto(self._descripcion.document.lines),
+            "select_status": self._status.value is not Select.NULL,
+            **{i.id: _VALIDADORES[i.id](i.value) for i in self._fecha_inputs},
+        }
+        self._validacion_timer = None
+        self._validar_cruzado()
+
+    def on_input_changed(self, event):
+        validador = _VALIDADORES.get(event.input.id)
+        if validador is None:
+            return
+        self._validos[event.input.id] = validador(event.value)
+        if event.input.id in self.CAMPOS_FECHA:
+            self._fecha = None      # Sin confirmar hasta la validación cruzada
+        self._campo_cambiado()
+
+    def on_text_area_changed(self, event):
+        # Solo busca la primera línea con texto: no arma el texto completo
+        self._validos["descripcion_textarea"] = _tiene_texto(event.text_area.document.lines)
+        self._campo_cambiado()
+
+    def on_select_changed(self, event):
+        self._validos["select_status"] = event.value is not Select.NULL
+        self._campo_cambiado()
+
+    def _campo_cambiado(self):
+        self._actualizar_boton()
+        # Un solo temporizador por ráfaga: cada tecla solo anota la hora (más
+        # barato que reiniciarlo) y al vencer se reprograma si hubo cambios
+        self._ultimo_cambio = time.monotonic()
+        if self._validacion_timer is None:
+            self._validacion_timer = self.set_timer(self.VALIDACION_DEBOUNCE, self._validar_si_quieto)
+
+    def _validar_si_quieto(self):
+        restante = self._ultimo_cambio + self.VALIDACION_DEBOUNCE - time.monotonic()
+        if restante > 0:
+            self._validacion_timer = self.set_timer(restante, self._validar_si_quieto)
+        else:
+            self._validar_cruzado()
+
+    def _validar_cruzado(self):
+        """Fecha existente y TareaSchema; deja listo el dict que devuelve _submit_form."""
+        self._validacion_timer = None
+        self._fecha = _construir_fecha(*(i.value for i in self._fecha_inputs))
+        self._errores = None if self._fecha else "Error en la fecha."
+        self._datos = None
+        if self._fecha and all(self._validos.values()):
+            data = {
+                "titulo": self._titulo.value,
+                "descripcion": self._descripcion.text.strip(),
+                "status": str(self._status.value),
+                "fecha": self._fecha,
+            }
+            if self.mode == "update":
+                data["id"] = self.tarea.get("id")
+            else:
+                # Pydantic exige id en tu modelo, para creación usamos 0 (lo asignas luego)
+                data["id"] = 0
+            try:
+                TareaSchema(**data)
+                self._datos = data
+            except ValidationError as e:
+                # Convertimos errores en líneas legibles
+                self._errores = "\n".join(err["msg"] for err in e.errors())
+        self._actualizar_boton()
+
+    def _actualizar_boton(self):
+        is_valid = self._fecha is not None and all(self._validos.values())
+        if self._aceptar.disabled == is_valid:     # Solo se toca el botón si cambia
+            self._aceptar.disabled = not is_valid
+            self._aceptar.variant = "success" if is_valid else "default"
 
     # ACCIONES
     def action_cancel(self):
@@ -110,40 +206,17 @@ class TareaFormScreen(ModalScreen):
         if event.button.id == "btn_close":
             self.action_cancel()
         elif event.button.id == "btn_accept":
-            if not self.query_one("#btn_accept").disabled:
+            if not self._aceptar.disabled:
                 self._submit_form()
 
     def _submit_form(self):
-        # --- 1) Construcción de fecha (sin tocar lo que ya tenía tu implementación)
-        try:
-            year = int(self.query_one("#date_year").value)
-            month = int(self.query_one("#date_month").value)
-            day = int(self.query_one("#date_day").value)
-            fecha = date(year, month, day).strftime("%Y-%m-%d")
-        except Exception:
-            self.app.notify("Error en la fecha.", severity="error")
-            return
-
-        # --- 2) Construir dict tal como antes
-        data = {
-            "titulo": self.query_one("#titulo_input").value,
-            "descripcion": self.query_one("#descripcion_textarea").text.strip(),
-            "status": str(self.query_one("#select_status").value),
-            "fecha": fecha,
-        }
+        # Al aceptar se valida con los valores actuales, sin esperar al debounce
+        if self._validacion_timer is not None:
+            self._validacion_timer.stop()
+        self._validar_cruzado()
 
-        if self.mode == "update":
-            data["id"] = self.tarea.get("id")
-        else:
-            # Pydantic exige id en tu modelo, para creación usamos 0 (lo asignas luego)
-            data["id"] = 0
-        try:
-            TareaSchema(**data)   # si falla: entra al except
-        except ValidationError as e:
-            # Convertimos errores en líneas legibles
-            mensajes = "\n".join(err["msg"] for err in e.errors())
-            self.app.notify(mensajes, severity="error")
+        if self._errores:
+            self.app.notify(self._errores, severity="error")
             return
-
-        # --- 4) Si todo es correcto, se devuelve tal como antes
-        self.dismiss({"ok": True, "data": data})
+        if self._datos is not None:
+            self.dismiss({"ok": True, "data": self._datos})
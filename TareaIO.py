@@ -0,0 +1,197 @@
+# TareaIO.py
+"""
+Importación y exportación de tareas (`./app.py import|export ARCHIVO`).
+
+El formato sale de la extensión: .jsonl, .csv o .bson, con .gz opcional
+(p.ej. `tareas.csv.gz`). Todo es en streaming: el archivo se procesa
+registro por registro y la base se escribe/lee por lotes, así que la memoria
+usada no depende del tamaño del archivo.
+
+- Importar valida los registros por lotes (TareaSchema.validar_lote); los
+  rechazados (y los que la base no aceptó, p.ej. un id duplicado) se
+  escriben, con el motivo, en un archivo aparte: `<archivo>.rechazadas.jsonl`.
+- Exportar .bson escribe los documentos en el formato de MongoDB (con ese
+  backend, tal como están guardados); .jsonl y .csv usan el formato de la
+  aplicación.
+"""
+import csv
+import gzip
+import json
+from collections.abc import Callable, Iterator
+from datetime import date, datetime
+from itertools import islice
+from pathlib import Path
+
+import bson
+
+import TareaCodec
+from TareaSchema import validar_lote
+from TareaService import TareaService
+
+FORMATOS = ("jsonl", "csv", "bson")
+COLUMNAS = ("id", "titulo", "descripcion", "status", "fecha", "updated_at", "rev")
+CAMPOS = ("id", "titulo", "descripcion", "status", "fecha")   # Los que se importan
+
+
+def detectar_formato(path: Path) -> tuple[str, bool]:
+    """Devuelve (formato, comprimido) según la extensión del archivo."""
+    sufijos = [sufijo.lower() for sufijo in path.suffixes]
+    comprimido = bool(sufijos) and sufijos[-1] == ".gz"
+    if comprimido:
+        sufijos.pop()
+    formato = sufijos[-1].lstrip(".") if sufijos else ""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {path.name} (usa .jsonl, .csv o .bson, con .gz opcional)")
+    return formato, comprimido
+
+
+def _abrir(path: Path, modo: str):
+    formato, comprimido = detectar_formato(path)
+    abrir = gzip.open if comprimido else open
+    if formato == "bson":
+        return abrir(path, modo + "b")
+    return abrir(path, modo + "t", encoding="utf-8", newline="")
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)   # ObjectId, Decimal128... (solo en el archivo de rechazadas)
+
+
+# ----------------------------------------------------------------------
+# LECTURA
+# ----------------------------------------------------------------------
+def leer(path: Path) -> Iterator[tuple[int, dict | str, str | None]]:
+    """Genera (número de registro, registro, error de formato o None)."""
+    formato, _ = detectar_formato(path)
+    with _abrir(path, "r") as f:
+        match formato:
+            case "jsonl":
+                for numero, linea in enumerate(f, start=1):
+                    if not linea.strip():
+                        continue
+                    try:
+                        registro = json.loads(linea)
+                    except ValueError as e:
+                        yield numero, linea.rstrip("\n"), f"JSON inválido: {e}"
+                        continue
+                    if isinstance(registro, dict):
+                        yield numero, registro, None
+                    else:
+                        yield numero, registro, "Se esperaba un objeto JSON"
+            case "csv":
+                for numero, registro in enumerate(csv.DictReader(f), start=1):
+                    yield numero, registro, None
+            case "bson":
+                for numero, registro in enumerate(bson.decode_file_iter(f), start=1):
+                    yield numero, registro, None
+
+
+def preparar(registro: dict, conservar_ids: bool = False) -> dict:
+    """
+    Los campos que se importan de un registro leído, en el formato de la
+    aplicación (acepta también el guardado en MongoDB: códigos de status,
+    fechas BSON, textos v1). Se validan por lotes con validar_lote(); lanza
+    ValueError si la fecha o el status no se pueden interpretar.
+    """
+    # Las celdas vacías de un CSV equivalen a campos ausentes
+    datos = {campo: registro[campo] for campo in CAMPOS if registro.get(campo) not in (None, "")}
+    if not conservar_ids:
+        datos.pop("id", None)
+    return TareaCodec.decode(datos)
+
+
+# ----------------------------------------------------------------------
+# IMPORTAR
+# ----------------------------------------------------------------------
+def importar(path: Path, rechazadas: Path | None = None, batch_size: int | None = None,
+             conservar_ids: bool = False,
+             progreso: Callable[[dict], None] | None = None) -> dict:
+    """
+    Importa un archivo y devuelve {"leidas", "importadas", "rechazadas", "archivo_rechazadas"}.
+    `progreso(stats)` se llama tras cada lote.
+    """
+    rechazadas = rechazadas or path.with_name(path.name + ".rechazadas.jsonl")
+    batch_size = batch_size or TareaService.BATCH_SIZE
+    stats = {"leidas": 0, "importadas": 0, "rechazadas": 0, "archivo_rechazadas": None}
+
+    with open(rechazadas, "w", encoding="utf-8") as salida:
+        def rechazar(numero, registro, errores):
+            stats["rechazadas"] += 1
+            salida.write(json.dumps({"registro": numero, "errores": errores, "datos": registro},
+                                    default=_json_default, ensure_ascii=False) + "\n")
+
+        def preparados():
+            for numero, registro, error in leer(path):
+                stats["leidas"] += 1
+                if error is not None:
+                    rechazar(numero, registro, [error])
+                    continue
+                try:
+                    yield numero, registro, preparar(registro, conservar_ids)
+                except ValueError as e:
+                    rechazar(numero, registro, [str(e)])
+
+        registros = preparados()
+        while leidos := list(islice(registros, batch_size)):
+            # Todo el lote se valida en una sola llamada (ver TareaSchema.validar_lote)
+            tareas, errores = validar_lote([datos for _, _, datos in leidos])
+            lote = []
+            for i, ((numero, registro, _), tarea) in enumerate(zip(leidos, tareas)):
+                if tarea is None:
+                    rechazar(numero, registro, errores[i])
+                elif conservar_ids and "id" not in tarea:
+                    rechazar(numero, registro, ["Falta el id (requerido con --conservar-ids)"])
+                else:
+                    lote.append((numero, registro, tarea))
+
+            insertadas = TareaService.insert_many([tarea for _, _, tarea in lote], batch_size=batch_size,
+                                                  ordered=False, conservar_ids=conservar_ids)
+            for (numero, registro, _), insertada in zip(lote, insertadas):
+                if insertada:
+                    stats["importadas"] += 1
+                else:
+                    rechazar(numero, registro, ["La base rechazó la tarea (¿id duplicado?)"])
+            if progreso is not None:
+                progreso(stats)
+
+    if stats["rechazadas"]:
+        stats["archivo_rechazadas"] = rechazadas
+    else:
+        rechazadas.unlink()
+    return stats
+
+
+# ----------------------------------------------------------------------
+# EXPORTAR
+# ----------------------------------------------------------------------
+def exportar(path: Path, batch_size: int | None = None,
+             progreso: Callable[[int], None] | None = None) -> int:
+    """Exporta todas las tareas (orden por id) y devuelve cuántas se escribieron."""
+    formato, _ = detectar_formato(path)
+    batch_size = batch_size or TareaService.BATCH_SIZE
+    n = 0
+    with _abrir(path, "w") as f:
+        if formato == "bson":
+            for doc in TareaService.cursor(raw=True, batch_size=batch_size):
+                f.write(doc.raw)
+                n += 1
+                if progreso is not None and n % batch_size == 0:
+                    progreso(n)
+            return n
+
+        if formato == "csv":
+            writer = csv.DictWriter(f, COLUMNAS, extrasaction="ignore")
+            writer.writeheader()
+            escribir = writer.writerow
+        else:
+            def escribir(tarea):
+                f.write(json.dumps(tarea, default=_json_default, ensure_ascii=False) + "\n")
+
+        for tarea in TareaService.cursor(batch_size=batch_size):
+            escribir(tarea)
+            n += 1
+            if progreso is not None and n % batch_size == 0:
+                progreso(n)
+    return n
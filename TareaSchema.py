@@ -1,6 +1,10 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, StringConstraints, TypeAdapter, ValidationError, field_validator
 from datetime import date
 from enum import Enum
+from typing import Annotated
+
+# typing.TypedDict no sirve a pydantic antes de Python 3.12
+from typing_extensions import NotRequired, TypedDict
 
 
 class StatusEnum(str, Enum):
@@ -16,8 +20,59 @@ class TareaSchema(BaseModel):
     fecha: date
     id: int | None = None   #
 
-    @validator("fecha")
+    @field_validator("fecha")
+    @classmethod
     def fecha_no_pasada(cls, v):
         if v < date.today():
             raise ValueError("La fecha no puede ser menor a la fecha actual.")
         return v
+
+
+class TareaImportSchema(TareaSchema):
+    """Tareas importadas desde archivo: se aceptan fechas pasadas (p.ej. un respaldo)."""
+
+    @field_validator("fecha")
+    @classmethod
+    def fecha_no_pasada(cls, v):
+        return v
+
+
+# ----------------------------------------------------------------------
+# VALIDACIÓN POR LOTES
+# ----------------------------------------------------------------------
+# Las mismas reglas que TareaImportSchema, como TypedDict: pydantic valida
+# la lista entera en una sola llamada a su núcleo (en Rust) y devuelve dicts,
+# sin crear un modelo por tarea ni pasar por model_dump().
+class TareaImport(TypedDict):
+    titulo: Annotated[str, StringConstraints(min_length=1)]
+    descripcion: Annotated[str, StringConstraints(min_length=1)]
+    status: NotRequired[StatusEnum]
+    fecha: date
+    id: NotRequired[int]
+
+
+_LOTE_IMPORT = TypeAdapter(list[TareaImport])
+
+
+def validar_lote(registros: list[dict]) -> tuple[list[dict | None], dict[int, list[str]]]:
+    """
+    Valida una lista de registros de una vez. Devuelve las tareas (None en
+    la posición de las inválidas) y los errores por posición.
+    """
+    errores: dict[int, list[str]] = {}
+    try:
+        tareas = _LOTE_IMPORT.validate_python(registros)
+    except ValidationError as e:
+        for err in e.errors():
+            posicion, *loc = err["loc"]
+            errores.setdefault(posicion, []).append(f"{'.'.join(map(str, loc))}: {err['msg']}")
+        # Segunda pasada solo con las válidas (la primera no devuelve nada si alguna falla)
+        validas = iter(_LOTE_IMPORT.validate_python(
+            [registro for i, registro in enumerate(registros) if i not in errores]
+        ))
+        tareas = [None if i in errores else next(validas) for i in range(len(registros))]
+
+    for tarea in tareas:
+        if tarea is not None:
+            tarea.setdefault("status", StatusEnum.pendiente)    # El default de TareaSchema
+    return tareas, errores
@@ -1,27 +1,358 @@
 # TareaService.py
-from db import db
-from pymongo.collection import Collection
+from __future__ import annotations
+
+import heapq
+import os
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from datetime import date, datetime, timedelta, timezone
+from itertools import groupby, islice
+
+import bson
+import ConkyCache
+import Metrics
+import TareaBackend
+import TareaCodec
+from TareaCodec import SCHEMA_VERSION
+from Tarea import Tarea
+from TareaBackend import Conflicto, sort_key
+from TareaCache import TareaCache
+from TextIndex import TextIndex
+from WriteAheadLog import WriteAheadLog
+from bson.raw_bson import RawBSONDocument
+from pymongo.errors import AutoReconnect, ConnectionFailure, ServerSelectionTimeoutError
+
+
+def _now() -> datetime:
+    """
+    Marca de tiempo para `updated_at`, en UTC sin tzinfo y truncada a ms: igual
+    a como la devuelve pymongo, así el dict local y el leído de la base coinciden.
+    """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[list]:
+    """Parte un iterable en listas de a lo más `size` elementos."""
+    it = iter(items)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
 
 class TareaService:
-    """Capa de servicio para manipular la colección 'tareas' en MongoDB."""
+    """
+    Capa de servicio para manipular las tareas.
+
+    El almacenamiento lo resuelve `backend` (ver TareaBackend; TAREAS_BACKEND
+    en .env). Aquí viven la caché, el índice de búsqueda local, la versión que
+    invalida el snapshot de conky y el partido en lotes de las operaciones
+    masivas, iguales para todos los backends.
+    """
+
+    backend: TareaBackend.TareaBackend = TareaBackend.create()
+    BATCH_SIZE = 1000
+    PAGE_SIZE = 500
+
+    # Caché de get() por id; se mantiene al día con las escrituras propias y
+    # acepta invalidaciones externas (p.ej. eventos de LiveSync)
+    cache = TareaCache(
+        maxsize=int(os.getenv("TAREAS_CACHE_SIZE", "1024")),
+        ttl=float(os.getenv("TAREAS_CACHE_TTL")) if os.getenv("TAREAS_CACHE_TTL") else None,
+    )
+
+    # Búsqueda de texto: "mongo" usa el índice de texto del backend (el de
+    # db.INDEXES) y "local" el índice invertido en memoria (también es el
+    # respaldo cuando el backend no tiene índice de texto)
+    SEARCH_BACKEND = os.getenv("TAREAS_SEARCH", "mongo")
+    SEARCH_LIMIT = 50
+    text_index = TextIndex()
+
+    STATS_WEEKS = 4     # Semanas hacia adelante que cuenta stats()
+    _stats_cache: dict[tuple, tuple[int, dict]] = {}   # (semanas, hoy) -> (versión, stats)
+
+    # Escrituras hechas sin conexión, pendientes de sync() (ver WriteAheadLog)
+    write_log = WriteAheadLog(os.getenv("TAREAS_WAL", "~/.local/share/tareas/pendientes.db"))
+    _sync_lock = threading.Lock()
+
+    # ----------------------------------------------------------------------
+    # BACKEND
+    # ----------------------------------------------------------------------
+    @classmethod
+    def use(cls, backend: TareaBackend.TareaBackend):
+        """Cambia de backend y descarta todo lo leído del anterior."""
+        cls.backend = backend
+        Metrics.registro.objetivo(type(backend), "backend", TareaBackend.OPERACIONES)
+        cls.cache.invalidate()
+        cls.text_index.version = None
+        cls._stats_cache = {}
+        cls.SEARCH_BACKEND = os.getenv("TAREAS_SEARCH", "mongo")
+
+    @classmethod
+    def available(cls) -> bool:
+        """False si el backend no responde (p.ej. MongoDB caído)."""
+        return cls.backend.available()
+
+    @classmethod
+    def setup(cls) -> bool:
+        """Configuración única del backend (`./app.py --setup`)."""
+        return cls.backend.setup()
+
+    @classmethod
+    def _offline(cls) -> bool:
+        """
+        ¿La escritura va al registro local? Sin backend, y también mientras
+        queden escrituras sin sincronizar: así se reproducen en orden.
+        """
+        return not cls.backend.available() or cls.write_log.pending() > 0
+
+    @classmethod
+    def _caida(cls, error: ConnectionFailure, enviada: bool = True):
+        """
+        Una escritura falló por la conexión. Si la caída ocurrió antes de que
+        llegara al servidor (sin servidor seleccionado, sin conexión del
+        pool...) se avisa al backend y el llamador la deja en el registro
+        local, como sin conexión. AutoReconnect/NetworkTimeout con la
+        escritura ya `enviada` se relanzan: pudo aplicarse y no se sabe.
+        """
+        if enviada and isinstance(error, AutoReconnect) and not isinstance(error, ServerSelectionTimeoutError):
+            raise error
+        if (report_failure := getattr(cls.backend, "report_failure", None)) is not None:
+            report_failure()
 
-    _collection: Collection | None = db.tareas if db is not None else None
 
     # ----------------------------------------------------------------------
     # LISTAR
     # ----------------------------------------------------------------------
     @classmethod
     def list(cls) -> list[dict]:
-        """Devuelve todas las tareas usando aggregate() con sort y project."""
-        if cls._collection is None:
+        """Devuelve todas las tareas ordenadas por id."""
+        if not cls.backend.available():
+            return []
+        return cls.backend.list()
+
+    @classmethod
+    def page(cls, after: int | None = None, before: int | None = None,
+             limit: int | None = None, campos: Iterable[str] | None = None,
+             **filtros) -> list[dict]:
+        """
+        Devuelve una página de tareas ordenada por id ascendente.
+
+        Paginación keyset sobre el índice de `id`, sin $skip: con `after`
+        trae las tareas siguientes a ese id y con `before` las anteriores.
+        `filtros` son los de query() y `campos` limita los campos devueltos
+        (el id siempre se incluye porque es la llave de paginación).
+        """
+        return cls.query(**filtros, sort="id", limit=limit,
+                         after={"id": after} if after is not None else None,
+                         before={"id": before} if before is not None else None,
+                         campos=campos)
+
+    @classmethod
+    def stream(cls, campos: Iterable[str] | None = None, page_size: int | None = None,
+               **filtros) -> Iterator[dict]:
+        """
+        Recorre las tareas ordenadas por id sin materializar la colección.
+
+        Pide páginas de `page_size` documentos con page(), de modo que en
+        memoria solo vive una página a la vez.
+        """
+        page_size = page_size or cls.PAGE_SIZE
+        last_id = None
+        while True:
+            page = cls.page(after=last_id, limit=page_size, campos=campos, **filtros)
+            yield from page
+
+            if len(page) < page_size:
+                return
+            last_id = page[-1]["id"]
+
+    @classmethod
+    def cursor(cls, raw: bool = False, batch_size: int | None = None) -> Iterator:
+        """
+        Recorre todas las tareas ordenadas por id leyéndolas en lotes de
+        `batch_size` (para exportar: en MongoDB es un solo cursor del
+        servidor, sin una consulta por página como stream()).
+
+        Con `raw` devuelve RawBSONDocument en el formato guardado en MongoDB;
+        ese backend los entrega sin decodificarlos.
+        """
+        if not cls.backend.available():
+            return
+        batch_size = batch_size or cls.BATCH_SIZE
+        if raw and cls.backend.name == "mongo":
+            yield from cls.backend.cursor(batch_size, raw=True)
+        elif raw:
+            for tarea in cls.backend.cursor(batch_size):
+                yield RawBSONDocument(bson.encode({**TareaCodec.encode(tarea), "v": SCHEMA_VERSION}))
+        else:
+            yield from cls.backend.cursor(batch_size)
+
+    @classmethod
+    def records(cls, batch_size: int | None = None, campos: Iterable[str] | None = None) -> Iterator[Tarea]:
+        """
+        Como cursor(), pero entrega registros Tarea (con __slots__) en lugar
+        de dicts: para recorrer o retener muchas tareas (el snapshot de Conky,
+        el índice de texto local). En MongoDB se leen lotes de BSON crudo que
+        se decodifican directo a registros; con `campos` solo se leen esos y
+        los demás quedan vacíos.
+        """
+        if not cls.backend.available():
+            return
+        batch_size = batch_size or cls.BATCH_SIZE
+        if cls.backend.name == "mongo":
+            for lote in cls.backend.raw_batches(batch_size, campos):
+                yield from Tarea.from_raw_batch(lote)
+        else:
+            for tarea in cls.backend.cursor(batch_size):
+                yield Tarea.from_doc(tarea)
+
+    @classmethod
+    def count(cls, include_archived: bool = False, **filtros) -> int:
+        """
+        Número de tareas. `filtros` son los de query() (status, desde,
+        hasta, texto); con `include_archived` se suman las archivadas.
+        """
+        if not cls.backend.available():
+            return 0
+        total = cls.backend.count(filtros)
+        if include_archived:
+            total += sum(archivo.count(filtros) for archivo in cls._archivos())
+        return total
+
+
+    # ----------------------------------------------------------------------
+    # CONSULTAS (filtros y orden resueltos en el backend)
+    # ----------------------------------------------------------------------
+    # Ordenamientos soportados. Siguen el orden de los índices compuestos de
+    # cada backend y terminan en `id` para que el keyset sea único.
+    SORTS = TareaBackend.SORTS
+
+    @classmethod
+    def query(cls, status: str | Iterable[str] | None = None,
+              desde: date | None = None, hasta: date | None = None,
+              texto: str | None = None, sort: str = "id", limit: int | None = None,
+              after: dict | None = None, before: dict | None = None,
+              campos: Iterable[str] | None = None, include_archived: bool = False) -> list[dict]:
+        """
+        Devuelve una página de tareas filtradas y ordenadas en el backend.
+
+        `desde` y `hasta` son inclusivos; `texto` busca (sin distinguir
+        mayúsculas) en título y descripción. `sort` es una llave de SORTS. La
+        paginación es keyset sobre los campos del orden: `after`/`before` son
+        la última/primera tarea de la página vecina (basta con que traiga
+        esos campos).
+
+        Con `include_archived` la página abarca también los archivos (ver
+        archive()): cada uno devuelve su propia página y se mezclan por el
+        orden. Sin él no se toca ningún archivo.
+        """
+        if not cls.backend.available():
+            return []
+
+        filtros = {"status": status, "desde": desde, "hasta": hasta, "texto": texto}
+        limit = limit or cls.PAGE_SIZE
+        page = cls.backend.query(filtros, sort, limit, after, before, campos)
+        if not include_archived:
+            return page
+
+        paginas = [page] + [archivo.query(filtros, sort, limit, after, before, campos)
+                            for archivo in cls._archivos()]
+        # Una archivación interrumpida puede dejar la tarea en ambos lados: vale
+        # la de la colección principal (heapq.merge respeta el orden de las listas)
+        vistas, mezcla = set(), []
+        for tarea in heapq.merge(*paginas, key=lambda tarea: sort_key(tarea, sort)):
+            if tarea["id"] not in vistas:
+                vistas.add(tarea["id"])
+                mezcla.append(tarea)
+        backwards = before is not None and after is None
+        return mezcla[-limit:] if backwards else mezcla[:limit]
+
+    @classmethod
+    def explain_query(cls, sort: str = "id", **filtros) -> dict:
+        """Plan de ejecución (explain) de la consulta que haría query(); solo MongoDB."""
+        if cls.backend.name != "mongo" or not cls.backend.available():
+            return {}
+        return cls.backend.explain_query(filtros, sort, cls.PAGE_SIZE)
+
+
+    # ----------------------------------------------------------------------
+    # BÚSQUEDA DE TEXTO
+    # ----------------------------------------------------------------------
+    @classmethod
+    def search(cls, texto: str, limit: int | None = None, **filtros) -> list[dict]:
+        """
+        Busca en título y descripción; devuelve las tareas de mayor a menor
+        puntaje (campo `score`). `filtros` son los de query().
+        """
+        if not cls.backend.available() or not texto.strip():
             return []
 
-        pipeline = [
-            {"$project": {"_id": 0}},     # Ocultar _id
-            {"$sort": {"id": 1}},         # Ordenar por id ascendente
-        ]
+        limit = limit or cls.SEARCH_LIMIT
+        if cls.SEARCH_BACKEND != "local":
+            try:
+                return cls.backend.search(texto, limit, filtros)
+            except NotImplementedError:
+                # Sin índice de texto en el backend: se usa el índice local
+                cls.SEARCH_BACKEND = "local"
+        return cls._search_local(texto, limit, filtros)
 
-        return list(cls._collection.aggregate(pipeline))
+    @classmethod
+    def _search_local(cls, texto: str, limit: int, filtros: dict) -> list[dict]:
+        """
+        Búsqueda con TextIndex. El índice se construye en la primera búsqueda y
+        se mantiene con las escrituras propias (ver _touch()); si la versión de
+        la colección no coincide (escribió otro proceso) se reconstruye.
+        """
+        index = cls.text_index
+        version = cls.version()
+        if index.version != version:
+            index.build(cls.records(campos=("titulo", "descripcion")), version)
+
+        filtrado = any(valor is not None for valor in filtros.values())
+        # Con filtros se piden más candidatos: algunos no pasarán el filtro
+        ranked = index.search(texto, limit * 4 if filtrado else limit)
+        if not ranked:
+            return []
+
+        scores = dict(ranked)
+        docs = cls.backend.query({**filtros, "ids": list(scores)})
+        tareas = sorted(docs, key=lambda tarea: (-scores[tarea["id"]], tarea["id"]))[:limit]
+        for tarea in tareas:
+            tarea["score"] = scores[tarea["id"]]
+        return tareas
+
+
+    # ----------------------------------------------------------------------
+    # ESTADÍSTICAS
+    # ----------------------------------------------------------------------
+    @classmethod
+    def stats(cls, semanas: int | None = None, hoy: date | None = None) -> dict:
+        """
+        Resumen de la colección (en MongoDB, una sola agregación $facet):
+
+            {"total": n, "por_status": {status: n}, "vencidas": n,
+             "semanas": [(inicio, n), ...], "hoy": date}
+
+        Vencidas son las no completadas con fecha anterior a hoy; `semanas`
+        cuenta las no completadas que vencen en cada una de las próximas
+        `semanas` semanas (a partir de hoy). El resultado se guarda junto con
+        la versión de la colección: mientras nadie escriba, basta con leer la
+        versión.
+        """
+        if not cls.backend.available():
+            return {}
+
+        semanas = semanas or cls.STATS_WEEKS
+        hoy = hoy or date.today()
+        version = cls.version()
+        cached = cls._stats_cache.get((semanas, hoy))
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        resultado = cls.backend.stats(semanas, hoy)
+        cls._stats_cache = {(semanas, hoy): (version, resultado)}
+        return resultado
 
 
     # ----------------------------------------------------------------------
@@ -29,19 +360,92 @@ class TareaService:
     # ----------------------------------------------------------------------
     @classmethod
     def next_id(cls) -> int:
-        """Obtiene el siguiente ID incremental usando aggregate()."""
-        if cls._collection is None:
+        """Reserva y devuelve el siguiente ID incremental."""
+        return cls.reserve_ids(1)
+
+    @classmethod
+    def reserve_ids(cls, n: int = 1) -> int:
+        """
+        Reserva un bloque de `n` IDs consecutivos y devuelve el primero.
+
+        La reserva es atómica en el backend (en MongoDB, find_one_and_update
+        con $inc): dos procesos concurrentes nunca reciben el mismo ID.
+        """
+        if n < 1:
+            raise ValueError("n debe ser mayor o igual a 1")
+        if not cls.backend.available():
             return 1
+        return cls.backend.reserve_ids(n)
+
+    @classmethod
+    def seed_counter(cls) -> int:
+        """
+        Migración: inicializa el contador con el id máximo existente
+        (contando las tareas archivadas).
+
+        Es idempotente y nunca hace retroceder el contador. Devuelve el valor
+        del contador tras la migración.
+        """
+        if not cls.backend.available():
+            return 0
+        return TareaBackend.seed_ids(cls.backend)
+
+
+    # ----------------------------------------------------------------------
+    # VERSIÓN DE LA COLECCIÓN
+    # ----------------------------------------------------------------------
+    @classmethod
+    def version(cls) -> int:
+        """Contador de escrituras: cambia cada vez que la colección cambia."""
+        if not cls.backend.available():
+            return 0
+        return cls.backend.version()
+
+    @classmethod
+    def _touch(cls, added: Iterable[dict] = (), removed: Iterable[int] = ()):
+        """
+        Registra una escritura: sube la versión, invalida el snapshot de conky y
+        aplica al índice de búsqueda local las tareas agregadas/eliminadas.
+        """
+        seq = cls.backend.touch()
+        ConkyCache.invalidate()
 
-        pipeline = [
-            {"$sort": {"id": -1}},        # Orden descendente
-            {"$limit": 1},                # Solo el máximo
-            {"$project": {"id": 1}},      # Obtener solo id
-        ]
+        # Si hubo escrituras ajenas desde la última versión indexada, el
+        # índice queda desfasado y la siguiente búsqueda lo reconstruye
+        index = cls.text_index
+        if index.version is not None and seq == index.version + 1:
+            for tarea in added:
+                index.add(tarea)
+            for id_value in removed:
+                index.remove(id_value)
+            index.version = seq
 
-        result = list(cls._collection.aggregate(pipeline))
-        max_id = result[0]["id"] if result else 0
-        return max_id + 1
+
+    # ----------------------------------------------------------------------
+    # MIGRACIÓN DE ESQUEMA (solo MongoDB, ver TareaCodec)
+    # ----------------------------------------------------------------------
+    @classmethod
+    def migrate(cls, batch_size: int | None = None, pausa: float = 0.0,
+                progreso=None) -> dict:
+        """
+        Convierte en el lugar las tareas de esquemas anteriores al actual (ver
+        MongoBackend.migrate()). Los demás backends siempre guardan el esquema
+        actual: no hay nada que migrar.
+        """
+        if not cls.backend.available():
+            return {}
+        if not hasattr(cls.backend, "migrate"):
+            return {"migradas": 0, "invalidas": []}
+
+        def por_lote(last_id, migradas):
+            cls.cache.invalidate()
+            if progreso is not None:
+                progreso(last_id, migradas)
+
+        resultado = cls.backend.migrate(batch_size or cls.BATCH_SIZE, pausa, por_lote)
+        if resultado["migradas"]:
+            cls._touch()
+        return resultado
 
 
     # ----------------------------------------------------------------------
@@ -49,53 +453,116 @@ class TareaService:
     # ----------------------------------------------------------------------
     @classmethod
     def insert(cls, tarea_dict: dict) -> dict:
-        """Inserta una tarea y la devuelve usando aggregate()."""
-        if cls._collection is None:
-            return {}
+        """
+        Inserta una tarea y la devuelve (el dict local, sin releerla).
+
+        Sin conexión (o si se cae antes de enviarla, ver _caida()) queda en
+        el registro local con un id provisional negativo; sync() le asigna el
+        definitivo.
+        """
+        if cls._offline():
+            return cls._insert_local(tarea_dict)
 
-        tarea_dict["id"] = cls.next_id()
-        cls._collection.insert_one(tarea_dict)
+        try:
+            id_value = cls.next_id()
+        except ConnectionFailure as e:
+            # Solo se pierden ids reservados: la tarea aún no se envió
+            cls._caida(e, enviada=False)
+            return cls._insert_local(tarea_dict)
 
-        return cls.get(tarea_dict["id"]) or {}
+        tarea = TareaBackend.normalize({**tarea_dict, "id": id_value, "updated_at": _now(), "rev": 1})
+        try:
+            cls.backend.insert(tarea)
+        except ConnectionFailure as e:
+            cls._caida(e)
+            return cls._insert_local(tarea_dict)
+        cls._touch(added=[tarea])
+
+        cls.cache.put(tarea)
+        return tarea
 
 
     # ----------------------------------------------------------------------
     # OBTENER UNA TAREA
     # ----------------------------------------------------------------------
     @classmethod
-    def get(cls, id_value: int) -> dict | None:
-        """Obtiene una tarea por id usando aggregate()."""
-        if cls._collection is None:
+    def get(cls, id_value: int, include_archived: bool = False) -> dict | None:
+        """
+        Obtiene una tarea por id: de la caché o del backend. Con
+        `include_archived`, si no está en la colección principal se busca en
+        los archivos (las archivadas no entran a la caché).
+        """
+        cached = cls.cache.get(id_value)
+        if cached is not None:
+            return cached
+        if not cls.backend.available():
             return None
 
-        pipeline = [
-            {"$match": {"id": id_value}},   # Filtrar por ID
-            {"$project": {"_id": 0}},       # Ocultar _id
-            {"$limit": 1},
-        ]
-
-        result = list(cls._collection.aggregate(pipeline))
-        return result[0] if result else None
+        tarea = cls.backend.get(id_value)
+        if tarea is not None:
+            cls.cache.put(tarea)
+        elif include_archived:
+            for archivo in cls._archivos():
+                if (tarea := archivo.get(id_value)) is not None:
+                    break
+        return tarea
 
 
     # ----------------------------------------------------------------------
     # ACTUALIZAR
     # ----------------------------------------------------------------------
     @classmethod
-    def update(cls, id_value: int, tarea_updates: dict) -> dict | None:
-        """Actualiza una tarea por id."""
-        if cls._collection is None:
-            return None
+    def update(cls, id_value: int, tarea_updates: dict, rev: int | None = None) -> dict | None:
+        """
+        Actualiza una tarea por id. Conviene pasar solo los campos que
+        cambiaron (ver diff()); sin cambios no se escribe nada.
+
+        Con `rev` (la revisión de la tarea que se editó) la escritura es
+        condicional: si otro cliente la modificó antes se lanza Conflicto con
+        la tarea actual, en lugar de pisar sus cambios.
 
-        # No permitir modificar el ID
+        Sin conexión (o si se cae antes de enviarlos) los cambios quedan en
+        el registro local (al sincronizarse gana el updated_at más reciente,
+        no se compara `rev`) y se devuelve la tarea de la caché con los
+        cambios aplicados (o solo los cambios).
+        """
+        # No permitir modificar el ID ni la revisión
         tarea_updates.pop("id", None)
+        tarea_updates.pop("rev", None)
+        if not tarea_updates:
+            return cls.get(id_value)
+        tarea_updates["updated_at"] = _now()
+
+        if cls._offline():
+            return cls._update_local(id_value, tarea_updates)
 
-        result = cls._collection.update_one(
-            {"id": id_value},
-            {"$set": tarea_updates}
-        )
+        # El backend devuelve la tarea ya actualizada: sin un get() extra
+        try:
+            tarea = cls.backend.update(id_value, tarea_updates, rev)
+        except Conflicto as e:
+            cls.cache.put(e.actual)
+            raise
+        except ConnectionFailure as e:
+            cls._caida(e)
+            return cls._update_local(id_value, tarea_updates)
+        if tarea is None:
+            return None
+        cls._touch(added=[tarea])
+
+        cls.cache.put(tarea)
+        return tarea
 
-        return cls.get(id_value) if result.modified_count > 0 else None
+
+    @classmethod
+    def diff(cls, tarea: dict, datos: dict) -> dict:
+        """
+        Los campos de `datos` (p.ej. el formulario completo) que difieren de
+        `tarea`, comparados ya normalizados: "hecho" es "completado" y
+        "2025-01-31" es la fecha.
+        """
+        datos = TareaBackend.normalize({campo: valor for campo, valor in datos.items()
+                                        if campo not in ("id", "rev", "updated_at")})
+        return {campo: valor for campo, valor in datos.items() if tarea.get(campo) != valor}
 
 
     # ----------------------------------------------------------------------
@@ -103,9 +570,331 @@ class TareaService:
     # ----------------------------------------------------------------------
     @classmethod
     def delete(cls, id_value: int) -> bool:
-        """Elimina una tarea por id."""
-        if cls._collection is None:
+        """Elimina una tarea por id (sin conexión o si se cae antes de enviarla, en el registro local)."""
+        if cls._offline():
+            return cls._delete_local(id_value)
+
+        try:
+            deleted = cls.backend.delete(id_value)
+        except ConnectionFailure as e:
+            cls._caida(e)
+            return cls._delete_local(id_value)
+        cls.cache.invalidate(id_value)
+        if not deleted:
             return False
+        cls._touch(removed=[id_value])
+        return True
+
+
+    # ----------------------------------------------------------------------
+    # OPERACIONES MASIVAS (por lotes)
+    # ----------------------------------------------------------------------
+    @classmethod
+    def existing_ids(cls, ids: list[int]) -> set[int]:
+        """IDs de la lista que existen en la colección (una sola consulta)."""
+        if not cls.backend.available():
+            return set()
+        return cls.backend.existing_ids(ids)
+
+    @classmethod
+    def insert_many(cls, tareas: Iterable[dict], batch_size: int | None = None,
+                    ordered: bool = True, conservar_ids: bool = False) -> list[dict]:
+        """
+        Inserta tareas en lotes; cada lote reserva sus IDs en una sola llamada.
+
+        Con `ordered` se detiene en el primer error (p.ej. un id duplicado).
+        Con `conservar_ids` se usa el `id` de cada tarea (p.ej. al restaurar
+        un respaldo) y el contador se adelanta al mayor id insertado.
+
+        Devuelve, en el mismo orden de entrada, la tarea insertada o {} si falló.
+        """
+        if not cls.backend.available():
+            return [{} for _ in tareas]
+
+        results: list[dict] = []
+        stop = False
+        for chunk in _chunks(tareas, batch_size or cls.BATCH_SIZE):
+            if stop:
+                results.extend({} for _ in chunk)
+                continue
+
+            first_id = 0 if conservar_ids else cls.reserve_ids(len(chunk))
+            now = _now()
+            nuevas = [TareaBackend.normalize({**tarea, "id": tarea["id"] if conservar_ids else first_id + i,
+                                              "updated_at": now, "rev": 1})
+                      for i, tarea in enumerate(chunk)]
+            ok = cls.backend.insert_many(nuevas, ordered)
+            if conservar_ids:
+                cls.backend.advance_ids(max(tarea["id"] for tarea in nuevas))
+            if any(ok):
+                cls._touch(added=[tarea for tarea, applied in zip(nuevas, ok) if applied])
+
+            results.extend(tarea if applied else {} for tarea, applied in zip(nuevas, ok))
+            stop = ordered and not all(ok)
+
+        return results
+
+    @classmethod
+    def update_many(cls, updates: Iterable[tuple[int, dict]],
+                    batch_size: int | None = None, ordered: bool = True) -> list[bool]:
+        """
+        Aplica pares (id, cambios) en lotes.
+
+        Devuelve, por par, True si la tarea existía y los cambios se aplicaron.
+        """
+        if not cls.backend.available():
+            return [False for _ in updates]
+
+        results: list[bool] = []
+        for chunk in _chunks(updates, batch_size or cls.BATCH_SIZE):
+            now = _now()
+            # No permitir modificar el ID
+            chunk = [(id_value, {**{k: v for k, v in fields.items() if k != "id"}, "updated_at": now})
+                     for id_value, fields in chunk]
+            ok = cls.backend.update_many(chunk, ordered)
+            if any(ok):
+                cls._touch()
+
+            results.extend(ok)
+            for id_value, _ in chunk:
+                cls.cache.invalidate(id_value)
+            if any("titulo" in fields or "descripcion" in fields for _, fields in chunk):
+                # Solo se tienen los cambios, no las tareas completas
+                cls.text_index.version = None
+
+        return results
+
+    @classmethod
+    def delete_many(cls, ids: Iterable[int], batch_size: int | None = None,
+                    ordered: bool = True) -> list[bool]:
+        """
+        Elimina tareas por id en lotes.
+
+        Devuelve, por id, True si la tarea existía y fue eliminada.
+        """
+        if not cls.backend.available():
+            return [False for _ in ids]
+
+        results: list[bool] = []
+        for chunk in _chunks(ids, batch_size or cls.BATCH_SIZE):
+            ok = cls.backend.delete_many(chunk, ordered)
+            if any(ok):
+                cls._touch(removed=[id_value for id_value, applied in zip(chunk, ok) if applied])
+
+            results.extend(ok)
+            for id_value in chunk:
+                cls.cache.invalidate(id_value)
+
+        return results
+
+
+    # ----------------------------------------------------------------------
+    # ARCHIVO (tareas completadas antiguas, fuera de la colección principal)
+    # ----------------------------------------------------------------------
+    ARCHIVE_DAYS = int(os.getenv("TAREAS_ARCHIVE_DAYS", "90"))
+    ARCHIVE_BUCKET = os.getenv("TAREAS_ARCHIVE_BUCKET") or None    # None, "year" o "month"
+
+    @classmethod
+    def _archivos(cls) -> list[TareaBackend.TareaBackend]:
+        return [cls.backend.archive(nombre) for nombre in cls.backend.archives()]
+
+    @classmethod
+    def archive(cls, dias: int | None = None, bucket: str | None = None,
+                batch_size: int | None = None, pausa: float = 0.0, progreso=None,
+                hoy: date | None = None) -> dict:
+        """
+        Mueve al archivo las tareas completadas con fecha de hace más de
+        `dias` días:
+
+            {"archivadas": n, "omitidas": n}
+
+        - Van a TareaBackend.ARCHIVE o, con `bucket` ("year"/"month"), a un
+          archivo por periodo de su fecha (TareaBackend.archive_name()).
+        - Por lotes sobre el índice (status, fecha, id), con `pausa` segundos
+          entre lotes: la aplicación puede seguir en uso.
+        - Cada tarea se copia al archivo y se elimina de la colección principal
+          solo si nadie la modificó desde que se leyó (last writer wins sobre
+          updated_at); si la modificaron, la copia se descarta (omitidas).
+          Si se interrumpe, lo que quedó en ambos lados se repite en la
+          siguiente pasada: las lecturas con include_archived prefieren la
+          colección principal.
+        - Los ids no cambian y el contador no retrocede: una tarea nueva
+          nunca recibe el id de una archivada.
+
+        `progreso(archivadas, omitidas)` se llama tras cada lote.
+        """
+        if cls._offline():
+            return {}   # Con escrituras pendientes primero va sync()
+
+        dias = cls.ARCHIVE_DAYS if dias is None else dias
+        bucket = bucket or cls.ARCHIVE_BUCKET
+        batch_size = batch_size or cls.BATCH_SIZE
+        filtros = {"status": "completado",
+                   "hasta": (hoy or date.today()) - timedelta(days=dias + 1)}
+
+        resultado = {"archivadas": 0, "omitidas": 0}
+        after = None
+        while lote := cls.backend.query(filtros, "fecha", batch_size, after):
+            after = lote[-1]
+            por_archivo = {}
+            for tarea in lote:
+                por_archivo.setdefault(TareaBackend.archive_name(tarea["fecha"], bucket), []).append(tarea)
+            for nombre, tareas in por_archivo.items():
+                movidas = cls._archive_batch(nombre, tareas)
+                resultado["archivadas"] += movidas
+                resultado["omitidas"] += len(tareas) - movidas
+
+            if progreso is not None:
+                progreso(resultado["archivadas"], resultado["omitidas"])
+            if pausa:
+                time.sleep(pausa)
+        return resultado
+
+    @classmethod
+    def _archive_batch(cls, nombre: str, tareas: list[dict]) -> int:
+        """Copia `tareas` al archivo `nombre` y las elimina de la principal; devuelve cuántas se movieron."""
+        archivo = cls.backend.archive(nombre)
+        ids = [tarea["id"] for tarea in tareas]
+        # Copias de una pasada interrumpida: se reemplazan
+        archivo.delete_many(ids, ordered=False)
+        archivo.insert_many(tareas, ordered=False)
+
+        # Solo las que siguen como se leyeron (sin updated_at = la más antigua posible)
+        ok = cls.backend.delete_many(ids, ordered=False,
+                                     lww=[tarea.get("updated_at") or datetime.min for tarea in tareas])
+        movidas = [id_value for id_value, applied in zip(ids, ok) if applied]
+        if len(movidas) < len(ids):
+            # Modificadas (o eliminadas) mientras tanto: su copia ya no vale
+            archivo.delete_many([id_value for id_value, applied in zip(ids, ok) if not applied],
+                                ordered=False)
+        if movidas:
+            cls._touch(removed=movidas)
+        for id_value in ids:
+            cls.cache.invalidate(id_value)
+        return len(movidas)
+
+
+    # ----------------------------------------------------------------------
+    # ESCRITURAS SIN CONEXIÓN
+    # ----------------------------------------------------------------------
+    @classmethod
+    def pending(cls) -> int:
+        """Escrituras en el registro local que aún no llegan al backend."""
+        return cls.write_log.pending()
+
+    @classmethod
+    def _insert_local(cls, tarea_dict: dict) -> dict:
+        tarea = TareaBackend.normalize({**tarea_dict, "updated_at": _now(), "rev": 1})
+        tarea["id"] = cls.write_log.append("insert", None, tarea, tarea["updated_at"])
+        cls.cache.put(tarea)
+        return tarea
+
+    @classmethod
+    def _update_local(cls, id_value: int, tarea_updates: dict) -> dict:
+        cambios = TareaBackend.normalize(tarea_updates)
+        cls.write_log.append("update", id_value, cambios, cambios["updated_at"])
+        cached = cls.cache.get(id_value)
+        if cached is None:
+            return {**cambios, "id": id_value}
+        tarea = {**cached, **cambios}
+        cls.cache.put(tarea)
+        return tarea
+
+    @classmethod
+    def _delete_local(cls, id_value: int) -> bool:
+        cls.write_log.append("delete", id_value, {}, _now())
+        cls.cache.invalidate(id_value)
+        return True
+
+    @classmethod
+    def sync(cls, batch_size: int | None = None) -> dict:
+        """
+        Reproduce en el backend, en orden y por lotes, las escrituras del
+        registro local:
+
+            {"aplicadas": n, "descartadas": n, "pendientes": n}
+
+        Descartadas son las que perdieron contra una escritura más reciente
+        (last writer wins sobre updated_at) o tocaban una tarea que ya no
+        existe. Repetir una entrada no cambia nada: el insert guarda en el
+        registro su id definitivo antes de insertar (la repetición choca con
+        ese id) y update/delete son condicionales sobre updated_at. Si la
+        conexión se cae a media sincronización, lo no confirmado se reproduce
+        en la siguiente.
+        """
+        resultado = {"aplicadas": 0, "descartadas": 0}
+        with cls._sync_lock:
+            while cls.backend.available() and (entradas := cls.write_log.batch(batch_size or cls.BATCH_SIZE)):
+                # Las entradas consecutivas de la misma operación van en un lote
+                for op, grupo in groupby(entradas, key=lambda entrada: entrada["op"]):
+                    grupo = list(grupo)
+                    if op == "insert":
+                        cls._remap_inserts(grupo, entradas)
+                    ok = getattr(cls, f"_replay_{op}")(grupo)
+                    cls.write_log.remove([entrada["clave"] for entrada in grupo])
+                    resultado["aplicadas"] += sum(ok)
+                    resultado["descartadas"] += len(ok) - sum(ok)
+
+        resultado["pendientes"] = cls.write_log.pending()
+        return resultado
+
+    @classmethod
+    def _remap_inserts(cls, grupo: list[dict], entradas: list[dict]):
+        """Reserva ids definitivos para los provisionales y los anota en el registro."""
+        provisionales = [entrada["id"] for entrada in grupo if entrada["id"] < 0]
+        if not provisionales:
+            return
+        first_id = cls.backend.reserve_ids(len(provisionales))
+        reales = {provisional: first_id + i for i, provisional in enumerate(provisionales)}
+        cls.write_log.remap(reales)
+        for entrada in entradas:
+            entrada["id"] = reales.get(entrada["id"], entrada["id"])
+        for provisional in provisionales:
+            cls.cache.invalidate(provisional)
+
+    @classmethod
+    def _replay_insert(cls, grupo: list[dict]) -> list[bool]:
+        tareas = [TareaBackend.normalize({**entrada["datos"], "id": entrada["id"],
+                                          "updated_at": entrada["updated_at"]})
+                  for entrada in grupo]
+        ok = cls.backend.insert_many(tareas, ordered=False)
+        if any(ok):
+            cls._touch(added=[tarea for tarea, applied in zip(tareas, ok) if applied])
+        # Un id ya ocupado solo puede ser de esta misma entrada (los ids se
+        # reservan): se insertó en una sincronización que no terminó
+        fallidas = [tarea["id"] for tarea, applied in zip(tareas, ok) if not applied]
+        repetidos = cls.backend.existing_ids(fallidas) if fallidas else set()
+        return [applied or tarea["id"] in repetidos for tarea, applied in zip(tareas, ok)]
+
+    @classmethod
+    def _replay_update(cls, grupo: list[dict]) -> list[bool]:
+        updates = [(entrada["id"], {**entrada["datos"], "updated_at": entrada["updated_at"]})
+                   for entrada in grupo]
+        # En orden: dos ediciones de la misma tarea se aplican como se hicieron
+        ok = cls.backend.update_many(updates, ordered=True, lww=True)
+        if any(ok):
+            cls._touch()
+            cls.text_index.version = None
+        for id_value, _ in updates:
+            cls.cache.invalidate(id_value)
+        return ok
+
+    @classmethod
+    def _replay_delete(cls, grupo: list[dict]) -> list[bool]:
+        ids = [entrada["id"] for entrada in grupo]
+        ok = cls.backend.delete_many(ids, ordered=True, lww=[entrada["updated_at"] for entrada in grupo])
+        if any(ok):
+            cls._touch(removed=[id_value for id_value, applied in zip(ids, ok) if applied])
+        for id_value in ids:
+            cls.cache.invalidate(id_value)
+        return ok
+
 
-        result = cls._collection.delete_one({"id": id_value})
-        return result.deleted_count > 0
+# Con TAREAS_METRICS (o desde la pantalla de métricas) se mide toda la
+# superficie pública y cada llamada al backend; apagado no cuesta nada
+Metrics.registro.objetivo(TareaService, "servicio",
+                          [nombre for nombre, valor in vars(TareaService).items()
+                           if isinstance(valor, classmethod) and not nombre.startswith("_")])
+Metrics.registro.objetivo(type(TareaService.backend), "backend", TareaBackend.OPERACIONES)
+Metrics.registro.contador("cache", lambda: TareaService.cache.stats(),
+                          lambda: TareaService.cache.reset_stats())
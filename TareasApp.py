@@ -0,0 +1,18 @@
+# TareasApp.py
+from textual.app import App
+
+from MainScreen import MainScreen
+
+
+class TareasApp(App):
+    CSS_PATH = "style.css" 
+    BINDINGS = [
+        ("q", "app.quit", "Quit")
+    ]
+
+    def on_mount(self):
+        # Pantalla Pricipal e Inicial
+        self.push_screen(MainScreen())
+
+    def action_quit(self):
+        self.exit()
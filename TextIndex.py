@@ -0,0 +1,125 @@
+# TextIndex.py
+import heapq
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections.abc import Iterable
+
+_TOKEN = re.compile(r"\w+")
+
+# Peso de cada campo en el puntaje (el título pesa más, como en el índice
+# de texto de MongoDB definido en db.INDEXES)
+PESOS = {"titulo": 2, "descripcion": 1}
+
+
+def tokenize(texto: str) -> list[str]:
+    """Minúsculas y sin acentos: "Revisión" y "revision" son el mismo término."""
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return _TOKEN.findall(texto)
+
+
+class TextIndex:
+    """
+    Índice invertido en memoria sobre titulo/descripcion: respaldo de la
+    búsqueda para servidores sin índice de texto (o sin MongoDB).
+
+    El último término de la búsqueda se trata como prefijo, para que la
+    búsqueda mientras se escribe encuentre "tare" → "tarea". Los demás
+    términos deben aparecer completos (semántica AND).
+    """
+
+    def __init__(self):
+        self._postings: dict[str, dict[int, int]] = {}   # término -> {id: peso}
+        self._terms: dict[int, set[str]] = {}            # id -> términos (para borrar)
+        self._vocab: list[str] = []                      # términos ordenados (prefijos)
+        self._vocab_dirty = False
+        self._lock = threading.Lock()
+        self.version: int | None = None    # Versión de la colección indexada
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def build(self, tareas: Iterable[dict], version: int | None = None):
+        with self._lock:
+            self._postings.clear()
+            self._terms.clear()
+            for tarea in tareas:
+                self._add(tarea)
+            self.version = version
+
+    def add(self, tarea: dict):
+        with self._lock:
+            self._remove(tarea["id"])
+            self._add(tarea)
+
+    def remove(self, id_value: int):
+        with self._lock:
+            self._remove(id_value)
+
+    def _add(self, tarea: dict):
+        pesos: dict[str, int] = {}
+        for campo, peso in PESOS.items():
+            for termino in tokenize(tarea.get(campo) or ""):
+                pesos[termino] = pesos.get(termino, 0) + peso
+
+        for termino, peso in pesos.items():
+            postings = self._postings.get(termino)
+            if postings is None:
+                postings = self._postings[termino] = {}
+                self._vocab_dirty = True
+            postings[tarea["id"]] = peso
+        self._terms[tarea["id"]] = set(pesos)
+
+    def _remove(self, id_value: int):
+        for termino in self._terms.pop(id_value, ()):
+            postings = self._postings[termino]
+            del postings[id_value]
+            if not postings:
+                del self._postings[termino]
+                self._vocab_dirty = True
+
+    def _prefixed(self, prefijo: str) -> list[str]:
+        if self._vocab_dirty:
+            self._vocab = sorted(self._postings)
+            self._vocab_dirty = False
+        inicio = bisect_left(self._vocab, prefijo)
+        fin = bisect_left(self._vocab, prefijo + "￿")
+        return self._vocab[inicio:fin]
+
+    def search(self, texto: str, limit: int = 50) -> list[tuple[int, int]]:
+        """Devuelve [(id, puntaje)] de mayor a menor puntaje."""
+        terminos = tokenize(texto)
+        if not terminos:
+            return []
+
+        with self._lock:
+            listas = []
+            for i, termino in enumerate(terminos):
+                variantes = self._prefixed(termino) if i == len(terminos) - 1 else [termino]
+                if len(variantes) == 1:
+                    listas.append(self._postings.get(variantes[0], {}))   # Sin copiar
+                else:
+                    unidas: dict[int, int] = {}
+                    for variante in variantes:
+                        for id_value, peso in self._postings[variante].items():
+                            unidas[id_value] = unidas.get(id_value, 0) + peso
+                    listas.append(unidas)
+                if not listas[-1]:
+                    return []
+
+            # Intersección con operaciones de conjuntos, desde la lista más corta
+            listas.sort(key=len)
+            base, resto = listas[0], listas[1:]
+            if resto:
+                comunes = base.keys()
+                for lista in resto:
+                    comunes = comunes & lista.keys()
+                if len(resto) == 1:
+                    otra = resto[0]
+                    base = {id_value: base[id_value] + otra[id_value] for id_value in comunes}
+                else:
+                    base = {id_value: base[id_value] + sum(lista[id_value] for lista in resto)
+                            for id_value in comunes}
+            return heapq.nlargest(limit, base.items(), key=lambda item: (item[1], -item[0]))
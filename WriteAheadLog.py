@@ -0,0 +1,137 @@
+# WriteAheadLog.py
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pendientes (
+    seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+    clave      TEXT NOT NULL UNIQUE,    -- llave de idempotencia
+    op         TEXT NOT NULL,           -- insert | update | delete
+    id         INTEGER NOT NULL,        -- < 0: id provisional de un insert
+    datos      TEXT NOT NULL,           -- JSON: la tarea o los cambios
+    updated_at TEXT NOT NULL
+);
+"""
+
+OPS = ("insert", "update", "delete")
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} no es serializable")
+
+
+class WriteAheadLog:
+    """
+    Escrituras pendientes de llegar al backend, en un archivo SQLite local.
+
+    TareaService anota aquí insert/update/delete cuando el backend no
+    responde y los confirma al momento; sync() las reproduce después en
+    orden. Cada entrada lleva una llave de idempotencia (`clave`) y el
+    `updated_at` de la escritura, que decide los conflictos (gana la más
+    reciente).
+
+    Un insert sin conexión no puede reservar un id: recibe uno provisional
+    negativo (-seq de su entrada, único en el archivo) que remap() cambia
+    por el definitivo en esa entrada y en las posteriores que lo usen.
+    """
+
+    def __init__(self, path: str | Path = ":memory:"):
+        self.path = path if path == ":memory:" else Path(path).expanduser()
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.RLock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Abre el archivo en el primer uso (como SQLiteBackend.conn)."""
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    if self.path != ":memory:":
+                        self.path.parent.mkdir(parents=True, exist_ok=True)
+                    conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    # Confirmar una escritura es prometer que no se pierde:
+                    # cada append llega al disco antes de volver
+                    conn.execute("PRAGMA synchronous=FULL")
+                    conn.executescript(SCHEMA)
+                    self._conn = conn
+        return self._conn
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            conn = self.conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = None
+
+    def append(self, op: str, id_value: int | None, datos: dict, updated_at: datetime,
+               clave: str | None = None) -> int:
+        """
+        Anota una escritura y devuelve su id (el provisional si `id_value`
+        es None). Repetir una `clave` ya anotada no agrega nada.
+        """
+        if op not in OPS:
+            raise ValueError(f"operación inválida: {op!r}")
+        clave = clave or uuid.uuid4().hex
+        datos = {k: v for k, v in datos.items() if k not in ("id", "updated_at")}
+        with self._transaction() as conn:
+            fila = conn.execute(
+                "INSERT INTO pendientes (clave, op, id, datos, updated_at) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (clave) DO NOTHING RETURNING seq",
+                (clave, op, id_value or 0, json.dumps(datos, default=_json_default),
+                 updated_at.isoformat(timespec="microseconds")),
+            ).fetchone()
+            if fila is None:
+                return conn.execute("SELECT id FROM pendientes WHERE clave = ?", (clave,)).fetchone()[0]
+            if id_value is None:
+                id_value = -fila[0]
+                conn.execute("UPDATE pendientes SET id = ? WHERE seq = ?", (id_value, fila[0]))
+        return id_value
+
+    def pending(self) -> int:
+        """Número de escrituras sin reproducir."""
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM pendientes").fetchone()[0]
+
+    def batch(self, limit: int) -> list[dict]:
+        """Las `limit` entradas más antiguas, en el orden en que se escribieron."""
+        with self._lock:
+            filas = self.conn.execute(
+                "SELECT clave, op, id, datos, updated_at FROM pendientes ORDER BY seq LIMIT ?", (limit,)
+            ).fetchall()
+        return [
+            {"clave": clave, "op": op, "id": id_value, "datos": json.loads(datos),
+             "updated_at": datetime.fromisoformat(updated_at)}
+            for clave, op, id_value, datos, updated_at in filas
+        ]
+
+    def remap(self, ids: dict[int, int]):
+        """Cambia ids provisionales por los definitivos en todas las entradas (una transacción)."""
+        with self._transaction() as conn:
+            conn.executemany("UPDATE pendientes SET id = ? WHERE id = ?",
+                             [(real, provisional) for provisional, real in ids.items()])
+
+    def remove(self, claves: list[str]):
+        """Descarta las entradas ya reproducidas."""
+        with self._transaction() as conn:
+            conn.executemany("DELETE FROM pendientes WHERE clave = ?", [(clave,) for clave in claves])
@@ -1,58 +1,190 @@
 #!/usr/bin/env python3.14
 import sys
 import argparse
-from textual.app import App
-from MainScreen import MainScreen
-from TareaService import TareaService
 
+# Cada modo importa solo lo que necesita: `--conky` no debe cargar textual,
+# pydantic ni pendulum, ni abrir la conexión a MongoDB si el snapshot sirve.
 
-class TareasApp(App):
-    CSS_PATH = "style.css" 
-    BINDINGS = [
-        ("q", "app.quit", "Quit")
-    ]
 
-    def on_mount(self):
-        # Pantalla Pricipal e Inicial
-        self.push_screen(MainScreen())
+def show_conky():
+    import ConkyCache
 
-    def action_quit(self):
-        self.exit()
+    # Del snapshot en disco si está vigente; solo consulta MongoDB si cambió algo
+    print(ConkyCache.output(), end="")
 
-def show_conky():
-    tareas = TareaService.list()
-    font = "DejaVu Sans Mono"
-    color_date = "white"
-
-    for t in tareas:
-        sp = 30 - len(t['titulo'])
-        if sp < 1:
-            sp = 1
-        sp = "." * sp
-        print(
-            f"${{color green}}{t['id']}${{color}} "
-            f"${{color yellow}}{t['titulo']}${{color}}"
-            f"${{color gray}}{sp}${{color}}"
-        )
-        sp = (" " * 30)
-        print(
-            f"   ${{font {font}:size=10}}{sp}"
-            f"${{color {color_date}}}{t['fecha']}${{color}}${{font}}"
-        )
+
+def run_conky_daemon():
+    import ConkyCache
+
+    ConkyCache.daemon()
+
+
+def run_setup():
+    """Configuración única: índices y contador de IDs (idempotente)."""
+    from TareaService import TareaService
+
+    if not TareaService.setup():
+        sys.exit(1)
+    print(f"Índices creados ({TareaService.backend.name}).")
+    # Sincroniza el contador con las tareas existentes
+    print(f"Contador de IDs inicializado en {TareaService.seed_counter()}")
+    # Convierte las tareas de esquemas anteriores (no hace nada si no hay)
+    run_migrate()
+
+
+def run_migrate(batch_size: int | None = None, pausa: float = 0.0):
+    """Migra las tareas al esquema actual; reanudable si se interrumpe."""
+    from TareaCodec import SCHEMA_VERSION
+    from TareaService import TareaService
+
+    def progreso(last_id, migradas):
+        print(f"\r  id {last_id}: {migradas} tareas migradas", end="", flush=True)
+
+    resultado = TareaService.migrate(batch_size=batch_size, pausa=pausa, progreso=progreso)
+    if not resultado:
+        sys.exit(1)
+    print(f"\nEsquema v{SCHEMA_VERSION}: {resultado['migradas']} tareas migradas.")
+    if resultado["invalidas"]:
+        print(f"Tareas con status o fecha inválidos (sin migrar): {resultado['invalidas']}")
+        sys.exit(1)
+
+
+def run_archive(dias: int | None, bucket: str | None, batch_size: int | None = None, pausa: float = 0.0):
+    """Mueve al archivo las tareas completadas antiguas; se puede repetir (p.ej. desde cron)."""
+    from TareaService import TareaService
+
+    def progreso(archivadas, omitidas):
+        print(f"\r  {archivadas} archivadas, {omitidas} omitidas", end="", flush=True)
+
+    resultado = TareaService.archive(dias, bucket, batch_size, pausa, progreso)
+    if not resultado:
+        sys.exit(f"Sin conexión a la base ({TareaService.backend.name}) o con escrituras pendientes"
+                 f" (ver --sync): no se archivó nada.")
+    print(f"\r{resultado['archivadas']} tareas archivadas, {resultado['omitidas']} omitidas"
+          f" (modificadas durante el archivado).")
+
+
+def run_import(archivo: str, rechazadas: str | None, batch_size: int | None, conservar_ids: bool):
+    from pathlib import Path
+    import TareaIO
+
+    def progreso(stats):
+        print(f"\r  {stats['leidas']} leídas, {stats['importadas']} importadas, "
+              f"{stats['rechazadas']} rechazadas", end="", flush=True)
+
+    try:
+        stats = TareaIO.importar(Path(archivo), Path(rechazadas) if rechazadas else None,
+                                 batch_size, conservar_ids, progreso)
+    except (OSError, ValueError) as e:
+        sys.exit(f"ERROR: {e}")
+    print(f"\r{stats['leidas']} leídas, {stats['importadas']} importadas, "
+          f"{stats['rechazadas']} rechazadas")
+    if stats["archivo_rechazadas"]:
+        print(f"Rechazadas (con el motivo) en {stats['archivo_rechazadas']}")
+
+
+def run_export(archivo: str, batch_size: int | None):
+    from pathlib import Path
+    import TareaIO
+
+    try:
+        n = TareaIO.exportar(Path(archivo), batch_size,
+                             lambda n: print(f"\r  {n} tareas", end="", flush=True))
+    except (OSError, ValueError) as e:
+        sys.exit(f"ERROR: {e}")
+    print(f"\r{n} tareas exportadas a {archivo}")
+
+
+def run_sync():
+    """Reproduce en el backend las escrituras hechas sin conexión."""
+    from TareaService import TareaService
+
+    if not TareaService.available():
+        sys.exit(f"Sin conexión a la base ({TareaService.backend.name}): "
+                 f"{TareaService.pending()} escrituras siguen pendientes.")
+    resultado = TareaService.sync()
+    print(f"{resultado['aplicadas']} escrituras aplicadas, {resultado['descartadas']} descartadas "
+          f"(había una más reciente), {resultado['pendientes']} pendientes.")
+    if resultado["pendientes"]:
+        sys.exit(1)
+
+
+def start_metrics(archivo: str):
+    """Activa Metrics antes de importar el resto: cada módulo se instrumenta al cargarse."""
+    import atexit
+    import Metrics
+
+    Metrics.registro.activar()
+    atexit.register(lambda: print(f"Métricas guardadas en {Metrics.registro.dump(archivo)}"))
+
+
+def run_tui():
+    from TareasApp import TareasApp
+
+    try:
+        TareasApp().run()
+    except Exception as e:
+        print(f"\nFATAL: La aplicación ha fallado al iniciarse: {e}")
+        print("Asegúrate de que MongoDB esté corriendo y tu archivo .env sea correcto.")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Gestor de Tareas')
     parser.add_argument('--conky', action='store_true', help='Modo salida para Conky')
+    parser.add_argument('--conky-daemon', action='store_true',
+                        help='Mantiene actualizado el snapshot que imprime --conky')
+    parser.add_argument('--setup', action='store_true',
+                        help='Crea los índices e inicializa el contador de IDs (una sola vez)')
+    parser.add_argument('--migrate', action='store_true',
+                        help='Convierte las tareas al esquema actual (en línea, reanudable)')
+    parser.add_argument('--sync', action='store_true',
+                        help='Envía a la base las escrituras hechas sin conexión')
+    parser.add_argument('--archive', nargs='?', type=int, const=-1, metavar='DIAS',
+                        help='Mueve al archivo las tareas completadas de hace más de DIAS días '
+                             '(por defecto TAREAS_ARCHIVE_DAYS)')
+    parser.add_argument('--bucket', choices=['year', 'month'],
+                        help='--archive: un archivo por año o por mes (por defecto TAREAS_ARCHIVE_BUCKET)')
+    parser.add_argument('--metrics', metavar='ARCHIVO',
+                        help='Mide latencias y las guarda al salir (.prom: Prometheus, si no JSON)')
+    parser.add_argument('--batch-size', type=int, default=None, help='Tareas por lote de --migrate/--archive')
+    parser.add_argument('--pausa', type=float, default=0.0,
+                        help='Segundos de espera entre lotes de --migrate/--archive')
+
+    formatos = 'Formato según la extensión: .jsonl, .csv o .bson (con .gz opcional)'
+    comandos = parser.add_subparsers(dest='comando')
+    importar = comandos.add_parser('import', help='Importa tareas desde un archivo', description=formatos)
+    importar.add_argument('archivo')
+    importar.add_argument('--rechazadas', help='Archivo para los registros rechazados '
+                                                '(por defecto ARCHIVO.rechazadas.jsonl)')
+    importar.add_argument('--batch-size', type=int, default=None, help='Tareas por lote')
+    importar.add_argument('--conservar-ids', action='store_true',
+                          help='Usa el id de cada registro en lugar de asignar uno nuevo')
+    exportar = comandos.add_parser('export', help='Exporta todas las tareas a un archivo',
+                                   description=formatos)
+    exportar.add_argument('archivo')
+    exportar.add_argument('--batch-size', type=int, default=None, help='Tareas por lote del cursor')
+
     args = parser.parse_args()
-    if args.conky:
+    if args.metrics:
+        start_metrics(args.metrics)
+    if args.comando == 'import':
+        run_import(args.archivo, args.rechazadas, args.batch_size, args.conservar_ids)
+    elif args.comando == 'export':
+        run_export(args.archivo, args.batch_size)
+    elif args.setup:
+        run_setup()
+    elif args.migrate:
+        run_migrate(args.batch_size, args.pausa)
+    elif args.sync:
+        run_sync()
+    elif args.archive is not None:
+        run_archive(None if args.archive < 0 else args.archive, args.bucket, args.batch_size, args.pausa)
+    elif args.conky_daemon:
+        run_conky_daemon()
+    elif args.conky:
         # Modo Conky completo
         show_conky()
     else:
         # Modo aplicación Textual normal
-        try:
-            TareasApp().run()
-        except Exception as e:
-            print(f"\nFATAL: La aplicación ha fallado al iniciarse: {e}")
-            print("Asegúrate de que MongoDB esté corriendo y tu archivo .env sea correcto.")
-            sys.exit(1)
+        run_tui()
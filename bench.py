@@ -0,0 +1,1019 @@
+#!/usr/bin/env python3.14
+# bench.py
+"""
+Benchmarks de TareaService.
+
+¡Los benchmarks escriben y borran tareas! Por defecto corren en memoria;
+`--mock` usa mongomock y solo `--backend mongo` toca la base configurada en
+.env (apúntala a una base de pruebas).
+"""
+import argparse
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+from datetime import date, datetime, timedelta
+from itertools import islice
+
+import TareaBackend
+from TareaService import TareaService
+from WriteAheadLog import WriteAheadLog
+
+
+def mongo_backend(database):
+    """MongoBackend sobre `database`, configurado como con --setup (índices y esquema)."""
+    import db
+    from MongoBackend import MongoBackend
+
+    for coleccion, llaves, opciones in db.INDEXES:
+        database[coleccion].create_index(llaves, **opciones)
+    backend = MongoBackend(collection=database.tareas, counters=database.counters)
+    backend.migrate()   # Colección vacía: solo marca el esquema como actual
+    return backend
+
+
+def mongomock_backend():
+    """MongoBackend sobre un stand-in en memoria de MongoDB."""
+    try:
+        import mongomock
+    except ImportError:
+        raise SystemExit("mongomock no está instalado: pip install mongomock")
+    return mongo_backend(mongomock.MongoClient().tareas)
+
+
+@contextmanager
+def mongod_local(dbpath: str):
+    """
+    Lanza un mongod desechable (puerto libre, datos en `dbpath`) y entrega un
+    MongoClient conectado; lo detiene al salir.
+    """
+    import shutil
+    import socket
+    from pymongo import MongoClient
+
+    ejecutable = shutil.which("mongod")
+    if ejecutable is None:
+        raise SystemExit("mongod no está instalado (usa --mock o --backend memory)")
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        puerto = sock.getsockname()[1]
+
+    proc = subprocess.Popen([ejecutable, "--dbpath", dbpath, "--port", str(puerto),
+                             "--bind_ip", "127.0.0.1", "--quiet"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        client = MongoClient(port=puerto, serverSelectionTimeoutMS=15_000)
+        client.admin.command("ping")
+        yield client
+        client.close()
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def usar_mongomock():
+    """Sustituye la base de TareaService por un stand-in en memoria."""
+    TareaService.use(mongomock_backend())
+
+
+def requiere_mongo(bench: str):
+    if TareaService.backend.name != "mongo":
+        raise SystemExit(f"{bench}: solo aplica al backend de MongoDB (usa --backend mongo o --mock)")
+
+
+PALABRAS = ("revisar", "comprar", "llamar", "enviar", "reunión", "factura",
+            "médico", "reporte", "servidor", "mudanza", "correo", "presupuesto")
+
+
+def tareas_sinteticas(n: int, inicio: int = 0):
+    """Genera `n` tareas falsas sin materializarlas todas en memoria."""
+    hoy = date.today()
+    estados = ("pendiente", "en_progreso", "completado")
+    for i in range(inicio, inicio + n):
+        yield {
+            "titulo": f"Tarea {i} {PALABRAS[i % len(PALABRAS)]} {PALABRAS[i * 7 % len(PALABRAS)]}",
+            "descripcion": f"Descripción de la tarea sintética {i}",
+            "status": estados[i % len(estados)],
+            "fecha": (hoy + timedelta(days=i % 365)).strftime("%Y-%m-%d"),
+        }
+
+
+def cronometrar(etiqueta: str, n: int, fn):
+    inicio = time.perf_counter()
+    resultado = fn()
+    total = time.perf_counter() - inicio
+    print(f"{etiqueta:<28} {total:8.3f} s  {n / total:10.0f} docs/s")
+    return resultado
+
+
+# ----------------------------------------------------------------------
+# BULK vs POR DOCUMENTO
+# ----------------------------------------------------------------------
+def bench_bulk(n: int, batch_size: int):
+    """Compara insert/update/delete por documento contra los métodos *_many."""
+    nuevas = cronometrar("insert (loop)", n,
+                         lambda: [TareaService.insert(t) for t in tareas_sinteticas(n)])
+    ids = [t["id"] for t in nuevas]
+    cronometrar("update (loop)", n,
+                lambda: [TareaService.update(i, {"status": "en_progreso"}) for i in ids])
+    cronometrar("delete (loop)", n, lambda: [TareaService.delete(i) for i in ids])
+
+    nuevas = cronometrar("insert_many", n,
+                         lambda: TareaService.insert_many(tareas_sinteticas(n), batch_size))
+    ids = [t["id"] for t in nuevas]
+    cronometrar("update_many", n,
+                lambda: TareaService.update_many(((i, {"status": "en_progreso"}) for i in ids),
+                                                 batch_size))
+    cronometrar("delete_many", n, lambda: TareaService.delete_many(ids, batch_size))
+
+
+# ----------------------------------------------------------------------
+# MEMORIA: list() vs stream()
+# ----------------------------------------------------------------------
+def pico_memoria(fn) -> tuple[float, int]:
+    """Ejecuta `fn` y devuelve (segundos, pico de memoria en bytes)."""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    fn()
+    total = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return total, pico
+
+
+def bench_list(n: int, batch_size: int):
+    """Pico de memoria al recorrer `n` tareas con list() y con stream()."""
+    ids = [t["id"] for t in TareaService.insert_many(tareas_sinteticas(n), batch_size)]
+
+    def recorrer(tareas):
+        for tarea in tareas:
+            pass
+
+    for etiqueta, fn in (
+        ("list()", lambda: recorrer(TareaService.list())),
+        ("stream()", lambda: recorrer(TareaService.stream())),
+    ):
+        total, pico = pico_memoria(fn)
+        print(f"{etiqueta:<28} {total:8.3f} s  pico {pico / 2**20:8.1f} MiB")
+
+    TareaService.delete_many(ids, batch_size)
+
+
+# ----------------------------------------------------------------------
+# CONKY: costo por invocación de `app.py --conky`
+# ----------------------------------------------------------------------
+def bench_conky(n: int):
+    """Tiempo de pared y CPU por llamada, con y sin snapshot en disco."""
+    import ConkyCache
+
+    def invocar(con_cache: bool) -> tuple[float, float]:
+        if not con_cache:
+            ConkyCache.invalidate()
+        antes = resource.getrusage(resource.RUSAGE_CHILDREN)
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, "app.py", "--conky"], stdout=subprocess.DEVNULL, check=True)
+        pared = time.perf_counter() - inicio
+        despues = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu = (despues.ru_utime - antes.ru_utime) + (despues.ru_stime - antes.ru_stime)
+        return pared, cpu
+
+    for etiqueta, con_cache in (("sin snapshot", False), ("con snapshot", True)):
+        muestras = [invocar(con_cache) for _ in range(n)]
+        pared = sum(m[0] for m in muestras) / n
+        cpu = sum(m[1] for m in muestras) / n
+        print(f"{etiqueta:<28} pared {pared * 1000:8.1f} ms  CPU {cpu * 1000:8.1f} ms")
+
+
+# ----------------------------------------------------------------------
+# ARRANQUE: costo de imports por modo (-X importtime)
+# ----------------------------------------------------------------------
+MODOS_ARRANQUE = {
+    "--help": ["app.py", "--help"],
+    "--conky (snapshot)": ["app.py", "--conky"],
+    "tui (solo imports)": ["-c", "import TareasApp"],
+}
+
+
+def costo_imports(args: list[str]) -> tuple[float, float, int]:
+    """Devuelve (pared s, imports s, número de módulos) de un proceso nuevo."""
+    inicio = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", *args],
+                          capture_output=True, text=True)
+    pared = time.perf_counter() - inicio
+
+    total_us, modulos = 0, 0
+    for linea in proc.stderr.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        _, acumulado, nombre = linea.removeprefix("import time:").split("|")
+        modulos += 1
+        if not nombre[1:].startswith(" "):   # Solo los imports de primer nivel
+            total_us += int(acumulado)
+    return pared, total_us / 1e6, modulos
+
+
+def bench_startup(n: int):
+    for modo, args in MODOS_ARRANQUE.items():
+        muestras = [costo_imports(args) for _ in range(n)]
+        pared = min(m[0] for m in muestras)
+        imports = min(m[1] for m in muestras)
+        print(f"{modo:<28} pared {pared * 1000:8.1f} ms  imports {imports * 1000:8.1f} ms"
+              f"  {muestras[0][2]:5d} módulos")
+
+
+# ----------------------------------------------------------------------
+# BÚSQUEDA: latencia tecla → resultados
+# ----------------------------------------------------------------------
+def bench_search(n: int, batch_size: int, consulta: str = "reporte comprar"):
+    """
+    Simula escribir `consulta` letra por letra y mide cada búsqueda (lo que
+    tarda en llegar el resultado tras el debounce de MainScreen), con el
+    índice de texto de MongoDB y con el índice invertido local.
+    """
+    TareaService.setup()
+    ids = [t["id"] for t in TareaService.insert_many(tareas_sinteticas(n), batch_size)]
+    prefijos = [consulta[:i] for i in range(1, len(consulta) + 1) if not consulta[:i].endswith(" ")]
+
+    for backend in ("mongo", "local"):
+        TareaService.SEARCH_BACKEND = backend
+        if backend == "local":
+            TareaService.text_index.version = None
+            total, pico = pico_memoria(lambda: TareaService.search(consulta))
+            print(f"{'índice local (construir)':<28} {total * 1000:8.1f} ms  pico {pico / 2**20:8.1f} MiB")
+
+        latencias = []
+        for prefijo in prefijos:
+            inicio = time.perf_counter()
+            TareaService.search(prefijo, limit=200)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+
+        if TareaService.SEARCH_BACKEND != backend:
+            print(f"{backend:<28} sin índice de texto: se usó {TareaService.SEARCH_BACKEND}")
+            continue
+        p95 = statistics.quantiles(latencias, n=20, method="inclusive")[-1] if len(latencias) > 1 else latencias[0]
+        print(f"{backend:<28} p50 {statistics.median(latencias):8.1f} ms  p95 {p95:8.1f} ms"
+              f"  máx {max(latencias):8.1f} ms  ({len(latencias)} teclas)")
+
+    TareaService.delete_many(ids, batch_size)
+
+
+# ----------------------------------------------------------------------
+# ESQUEMA: v1 (texto) vs v2 (fecha BSON y status numérico)
+# ----------------------------------------------------------------------
+def bench_schema(n: int, batch_size: int, repeticiones: int = 20):
+    """
+    Tamaño de los índices de fecha/status y tiempo de una consulta por rango
+    de fechas con cada formato (colecciones temporales), y duración de la
+    migración de `n` tareas v1 con TareaService.migrate().
+
+    Todo corre en la base `<MONGO_DB>_bench` del mismo servidor, que se borra
+    al terminar: nunca toca las tareas ni el esquema de la base configurada.
+    """
+    import db
+
+    requiere_mongo("schema")
+    anterior = TareaService.backend
+    client = anterior.collection.database.client
+    database = client[f"{db.MONGO_DB_NAME}_bench"]
+    client.drop_database(database.name)
+    try:
+        TareaService.use(mongo_backend(database))
+        _bench_schema(n, batch_size, repeticiones)
+    finally:
+        TareaService.use(anterior)
+        client.drop_database(database.name)
+
+
+def _bench_schema(n: int, batch_size: int, repeticiones: int):
+    from pymongo.errors import OperationFailure
+    import TareaCodec
+
+    backend = TareaService.backend
+    database = backend.collection.database
+    hoy = date.today()
+    desde, hasta = hoy + timedelta(days=30), hoy + timedelta(days=60)
+    formatos = {
+        "v1": (lambda t: t, desde.isoformat(), hasta.isoformat()),
+        "v2": (lambda t: {**TareaCodec.encode(t), "v": TareaCodec.SCHEMA_VERSION},
+               TareaCodec.encode_fecha(desde), TareaCodec.encode_fecha(hasta)),
+    }
+
+    for version, (convertir, inicio, fin) in formatos.items():
+        coleccion = database[f"bench_schema_{version}"]
+        coleccion.drop()
+        coleccion.create_index([("fecha", 1), ("id", 1)])
+        coleccion.create_index([("status", 1), ("fecha", 1), ("id", 1)])
+        tareas = enumerate(tareas_sinteticas(n))
+        while lote := list(islice(tareas, batch_size)):
+            coleccion.insert_many([{**convertir(t), "id": i} for i, t in lote])
+
+        try:
+            tamanos = database.command({"collStats": coleccion.name})["indexSizes"]
+            indices = "  ".join(f"{nombre} {tamano / 2**10:8.0f} KiB"
+                                for nombre, tamano in tamanos.items() if nombre != "_id_")
+        except (OperationFailure, NotImplementedError):
+            indices = "tamaño de índices n/d"
+
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio_t = time.perf_counter()
+            list(coleccion.find({"fecha": {"$gte": inicio, "$lte": fin}}, {"_id": 0})
+                 .sort([("fecha", 1), ("id", 1)]))
+            tiempos.append((time.perf_counter() - inicio_t) * 1000)
+        print(f"{version:<4} rango de 30 días {statistics.median(tiempos):8.1f} ms  {indices}")
+        coleccion.drop()
+
+    # Migración en el lugar de tareas v1 recién insertadas
+    primero = TareaService.reserve_ids(n)
+    tareas = enumerate(tareas_sinteticas(n), start=primero)
+    while lote := list(islice(tareas, batch_size)):
+        backend.collection.insert_many([{**t, "id": i} for i, t in lote])
+    backend.counters.delete_one({"_id": backend.SCHEMA_ID})
+    backend._schema = None
+    resultado = cronometrar("migrate()", n, lambda: TareaService.migrate(batch_size))
+    print(f"{'':<28} {resultado['migradas']} migradas, {len(resultado['invalidas'])} inválidas")
+
+
+# ----------------------------------------------------------------------
+# IMPORTAR / EXPORTAR: throughput de TareaIO
+# ----------------------------------------------------------------------
+def bench_io(n: int, batch_size: int, formatos=("jsonl", "csv", "bson", "jsonl.gz")):
+    """
+    Genera un archivo sintético de `n` tareas por formato y mide importarlo
+    y exportar la colección (docs/s), más el RSS máximo del proceso: con
+    streaming no debe crecer con `n`.
+    """
+    import csv
+    import gzip
+    import json
+    import tempfile
+    from pathlib import Path
+
+    import bson
+    import TareaIO
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for formato in formatos:
+            path = Path(tmp) / f"tareas.{formato}"
+            primero = TareaService.reserve_ids(n)
+            tareas = ({**t, "id": i} for i, t in enumerate(tareas_sinteticas(n), start=primero))
+
+            abrir = gzip.open if formato.endswith(".gz") else open
+            if formato.startswith("bson"):
+                with abrir(path, "wb") as f:
+                    for tarea in tareas:
+                        f.write(bson.encode(tarea))
+            else:
+                with abrir(path, "wt", encoding="utf-8", newline="") as f:
+                    if formato.startswith("csv"):
+                        writer = csv.DictWriter(f, TareaIO.CAMPOS)
+                        writer.writeheader()
+                        writer.writerows(tareas)
+                    else:
+                        f.writelines(json.dumps(tarea) + "\n" for tarea in tareas)
+
+            print(f"{formato} ({path.stat().st_size / 2**20:.1f} MiB)")
+            cronometrar("  import", n, lambda: TareaIO.importar(path, batch_size=batch_size,
+                                                                conservar_ids=True))
+            salida = path.with_name(f"export.{formato}")
+            exportadas = TareaService.count()
+            cronometrar("  export", exportadas, lambda: TareaIO.exportar(salida, batch_size))
+            TareaService.delete_many(range(primero, primero + n), batch_size)
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"RSS máximo {rss / 2**10:8.1f} MiB")
+
+
+# ----------------------------------------------------------------------
+# BACKENDS: el mismo trabajo sobre MongoDB, SQLite y memoria
+# ----------------------------------------------------------------------
+def crear_backends(nombres, mock: bool, tmp: str) -> dict:
+    """Backends nuevos (vacíos donde se puede) por nombre; omite MongoDB si no responde."""
+    from pathlib import Path
+    from MemoryBackend import MemoryBackend
+    from SQLiteBackend import SQLiteBackend
+
+    backends = {}
+    for nombre in nombres:
+        match nombre:
+            case "memory":
+                backends[nombre] = MemoryBackend()
+            case "sqlite":
+                backends[nombre] = SQLiteBackend(Path(tmp) / f"{nombre}.db")
+            case "mongo":
+                backend = mongomock_backend() if mock else TareaBackend.create("mongo")
+                if backend.available():
+                    backends[nombre] = backend
+                else:
+                    print("mongo: sin conexión, se omite (usa --mock para mongomock)")
+    return backends
+
+
+def bench_backends(n: int, batch_size: int, nombres=TareaBackend.BACKENDS, mock: bool = False,
+                   lecturas: int = 1000):
+    """
+    Operaciones por segundo de cada backend con `n` tareas: escrituras por
+    lotes, get() por id (sin la caché de TareaService), recorrer una consulta
+    filtrada página por página, count() y stats().
+    """
+    import random
+    import tempfile
+
+    page_size = 100
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = crear_backends(nombres, mock, tmp)
+        tasas: dict[str, dict[str, float]] = {}
+        for nombre, backend in backends.items():
+            TareaService.use(backend)
+            tasa = tasas[nombre] = {}
+
+            def medir(operacion: str, ops: int, fn):
+                inicio = time.perf_counter()
+                resultado = fn()
+                tasa[operacion] = ops / (time.perf_counter() - inicio)
+                return resultado
+
+            ids = [t["id"] for t in medir("insert_many", n, lambda: TareaService.insert_many(
+                tareas_sinteticas(n), batch_size))]
+            muestra = random.Random(0).choices(ids, k=lecturas)
+            medir("get", lecturas, lambda: [backend.get(i) for i in muestra])
+
+            def recorrer():
+                vistas, after = 0, None
+                while page := TareaService.query(status="pendiente", sort="fecha", limit=page_size,
+                                                 after=after):
+                    vistas += len(page)
+                    after = page[-1]
+                return vistas
+            pendientes = TareaService.count(status="pendiente")
+            medir("query (páginas)", pendientes, recorrer)
+            medir("count (filtro)", 100, lambda: [TareaService.count(status="en_progreso",
+                                                                     desde=date.today()) for _ in range(100)])
+            medir("stats", 10, lambda: [backend.stats(4, date.today()) for _ in range(10)])
+            medir("update_many", n, lambda: TareaService.update_many(
+                ((i, {"status": "en_progreso"}) for i in ids), batch_size))
+            medir("delete_many", n, lambda: TareaService.delete_many(ids, batch_size))
+
+    print(f"{'ops/s':<20}" + "".join(f"{nombre:>14}" for nombre in tasas))
+    for operacion in next(iter(tasas.values()), {}):
+        print(f"{operacion:<20}" + "".join(f"{tasa[operacion]:>14,.0f}" for tasa in tasas.values()))
+
+
+# ----------------------------------------------------------------------
+# METRICS: costo de la instrumentación
+# ----------------------------------------------------------------------
+def bench_metrics(n: int, batch_size: int):
+    """
+    get() (desde la caché: casi todo es la envoltura) y update() (servicio y
+    backend medidos) con Metrics apagado, activo y de nuevo desactivado. Apagado debe costar
+    lo mismo antes y después: desactivar() devuelve los métodos originales.
+    """
+    import Metrics
+
+    ids = [t["id"] for t in TareaService.insert_many(tareas_sinteticas(n), batch_size)]
+    try:
+        for etapa in ("apagado", "activo", "desactivado"):
+            if etapa == "activo":
+                Metrics.registro.activar()
+            elif etapa == "desactivado":
+                Metrics.registro.desactivar()
+            cronometrar(f"get ({etapa})", n, lambda: [TareaService.get(i) for i in ids])
+            cronometrar(f"update ({etapa})", n,
+                        lambda: [TareaService.update(i, {"status": "en_progreso"}) for i in ids])
+    finally:
+        Metrics.registro.desactivar()
+        TareaService.delete_many(ids, batch_size)
+
+
+# ----------------------------------------------------------------------
+# SUITE: línea base por tamaño de colección (JSON para comparar cambios)
+# ----------------------------------------------------------------------
+TAMANOS_SUITE = (1_000, 100_000, 1_000_000)
+LISTAR_HASTA = 100_000      # list()/stream() recorren todo: arriba de esto se omiten
+SEMBRAR_LOTE = 10_000       # Tareas por llamada a insert_many() al sembrar
+
+
+def resumen(tiempos: list[float]) -> dict:
+    """Percentiles en ms y throughput (ops/s) de una serie de duraciones en segundos."""
+    ms = sorted(t * 1000 for t in tiempos)
+    q = statistics.quantiles(ms, n=100, method="inclusive") if len(ms) > 1 else ms * 99
+    total = sum(ms) / 1000
+    return {"n": len(ms), "p50": q[49], "p90": q[89], "p99": q[98], "max": ms[-1],
+            "ops_s": len(ms) / total if total else None}
+
+
+def latencias(fn, argumentos) -> dict:
+    """Llama a `fn(argumento)` por cada argumento y resume la duración de cada llamada."""
+    tiempos = []
+    for argumento in argumentos:
+        inicio = time.perf_counter()
+        fn(argumento)
+        tiempos.append(time.perf_counter() - inicio)
+    return resumen(tiempos)
+
+
+async def medir_tabla(repeticiones: int) -> dict:
+    """
+    MainScreen en modo headless (run_test de Textual): lo que tarda la primera
+    pantalla con la tabla llena, cada refresh_table() y cargar la página
+    siguiente al bajar con el cursor.
+    """
+    from MainScreen import MainScreen
+    from TareasApp import TareasApp
+
+    app = TareasApp()
+    inicio = time.perf_counter()
+    async with app.run_test(size=(120, 40)) as pilot:
+        await pilot.pause()
+        montaje = time.perf_counter() - inicio
+        screen = app.screen
+        assert isinstance(screen, MainScreen), screen
+
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            await screen.refresh_table()
+            tiempos.append(time.perf_counter() - inicio)
+
+        # Cursor a la última fila: la ventana pide la página siguiente
+        inicio = time.perf_counter()
+        filas = screen.table.row_count
+        screen.table.move_cursor(row=filas - 1)
+        await pilot.pause()
+        await app.workers.wait_for_complete()
+        paginar = time.perf_counter() - inicio
+
+        return {
+            "tabla (montaje)": {"s": montaje, "filas": filas},
+            "tabla (refresh_table)": resumen(tiempos),
+            "tabla (bajar una página)": {"s": paginar, "filas": screen.table.row_count},
+        }
+
+
+def suite_tamano(n: int, muestras: int, batch_size: int) -> dict:
+    """Mide las operaciones de TareaService sobre un backend vacío sembrado con `n` tareas."""
+    import asyncio
+    import random
+
+    ops: dict[str, dict] = {}
+    generador = tareas_sinteticas(n)
+    inicio = time.perf_counter()
+    while lote := list(islice(generador, SEMBRAR_LOTE)):
+        TareaService.insert_many(lote, batch_size)
+    total = time.perf_counter() - inicio
+    ops["sembrar (insert_many)"] = {"s": total, "docs_s": n / total}
+
+    # Backend recién creado: los ids son 1..n
+    rng = random.Random(n)
+    ids = rng.sample(range(1, n + 1), min(muestras, n))
+    pocas = ids[:max(muestras // 10, 5)]   # Para las operaciones que recorren la colección
+
+    def get_sin_cache(id_value):
+        TareaService.cache.invalidate(id_value)
+        TareaService.get(id_value)
+
+    ops["get"] = latencias(get_sin_cache, ids)
+    ops["get (caché)"] = latencias(TareaService.get, ids)
+    tareas = [TareaService.get(id_value) for id_value in ids]
+    ops["query (página por fecha)"] = latencias(
+        lambda tarea: TareaService.query(status="pendiente", sort="fecha", limit=100, after=tarea), tareas)
+    ops["query (página por id)"] = latencias(
+        lambda tarea: TareaService.page(after=tarea["id"], limit=100), tareas)
+    ops["count (filtro)"] = latencias(lambda _: TareaService.count(status="pendiente"), pocas)
+
+    def stats_sin_cache(_):
+        TareaService._stats_cache = {}
+        TareaService.stats()
+    ops["stats"] = latencias(stats_sin_cache, pocas)
+
+    nuevas = []
+    ops["insert"] = latencias(lambda tarea: nuevas.append(TareaService.insert(tarea)["id"]),
+                              tareas_sinteticas(len(ids), inicio=n))
+    ops["update"] = latencias(lambda id_value: TareaService.update(id_value, {"status": "completado"}), nuevas)
+    ops["delete"] = latencias(TareaService.delete, nuevas)
+
+    if n <= LISTAR_HASTA:
+        for nombre, fn in (("list()", TareaService.list),
+                           ("stream()", lambda: sum(1 for _ in TareaService.stream()))):
+            total, pico = pico_memoria(fn)
+            ops[nombre] = {"s": total, "docs_s": n / total, "pico_mib": pico / 2**20}
+
+    ops.update(asyncio.run(medir_tabla(max(muestras // 10, 5))))
+    ops["rss_max_mib"] = {"valor": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10}
+    return ops
+
+
+def metrica(valores: dict) -> float | None:
+    """El número que se compara entre corridas: p50 de una serie o duración total."""
+    return valores.get("p50", valores.get("s"))
+
+
+def imprimir_suite(n: int, ops: dict):
+    print(f"\n{n:,} tareas")
+    for nombre, valores in ops.items():
+        if "p50" in valores:
+            print(f"  {nombre:<26} p50 {valores['p50']:8.2f} ms  p90 {valores['p90']:8.2f} ms"
+                  f"  p99 {valores['p99']:8.2f} ms  {valores['ops_s']:10,.0f} ops/s")
+        elif "s" in valores:
+            extra = "".join(f"  {k} {v:,.1f}" if isinstance(v, float) else f"  {k} {v:,}"
+                            for k, v in valores.items() if k != "s")
+            print(f"  {nombre:<26} {valores['s']:8.3f} s{extra}")
+        else:
+            print(f"  {nombre:<26} {valores['valor']:8.1f}")
+
+
+def comparar_suite(anterior: dict, actual: dict, tolerancia: float) -> list[str]:
+    """
+    Compara cada operación con la corrida `anterior` (p50 o duración) y
+    devuelve las que empeoraron más de `tolerancia` (0.2 = 20 %).
+    """
+    print(f"\nComparación con {anterior.get('fecha')} ({anterior.get('backend')})")
+    regresiones = []
+    for n, ops in actual["tamanos"].items():
+        for nombre, valores in ops.items():
+            previo = anterior.get("tamanos", {}).get(n, {}).get(nombre)
+            antes, ahora = metrica(previo or {}), metrica(valores)
+            if not antes or ahora is None:
+                continue
+            cambio = ahora / antes - 1
+            marca = "  ← regresión" if cambio > tolerancia else ""
+            print(f"  {int(n):>9,} {nombre:<26} {cambio:+7.1%}{marca}")
+            if marca:
+                regresiones.append(f"{n} {nombre}")
+    return regresiones
+
+
+def bench_suite(fabrica, nombre: str, tamanos, muestras: int, batch_size: int,
+                salida: str | None = None, comparar: str | None = None, tolerancia: float = 0.2):
+    """
+    Línea base de TareaService y MainScreen: por cada tamaño siembra un
+    backend nuevo (`fabrica(n)`) y mide latencias (p50/p90/p99), throughput,
+    memoria y el llenado del DataTable. Con `salida` guarda el JSON; con
+    `comparar` lo contrasta con uno anterior y falla (exit 1) si algo empeoró
+    más de `tolerancia`.
+    """
+    import json
+    from datetime import datetime
+
+    resultado = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "backend": nombre,
+        "python": sys.version.split()[0],
+        "muestras": muestras,
+        "tamanos": {},
+    }
+    for n in tamanos:
+        TareaService.use(fabrica(n))
+        ops = resultado["tamanos"][str(n)] = suite_tamano(n, muestras, batch_size)
+        imprimir_suite(n, ops)
+
+    if salida:
+        with open(salida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        print(f"\nResultados en {salida}")
+    if comparar:
+        with open(comparar, encoding="utf-8") as f:
+            regresiones = comparar_suite(json.load(f), resultado, tolerancia)
+        if regresiones:
+            raise SystemExit(f"Regresiones: {', '.join(regresiones)}")
+
+
+def fabrica_suite(args, stack: ExitStack, tmp: str):
+    """(fabrica(n) -> backend vacío, nombre) según --mongod, --mock o --backend (memory por defecto)."""
+    from pathlib import Path
+
+    if args.mongod:
+        client = stack.enter_context(mongod_local(tmp))
+        return (lambda n: mongo_backend(client[f"bench_{n}"])), "mongod local"
+    if args.mock:
+        return (lambda n: mongomock_backend()), "mongomock"
+
+    match args.backend or "memory":
+        case "memory":
+            from MemoryBackend import MemoryBackend
+            return (lambda n: MemoryBackend()), "memory"
+        case "sqlite":
+            from SQLiteBackend import SQLiteBackend
+            return (lambda n: SQLiteBackend(Path(tmp) / f"suite_{n}.db")), "sqlite"
+        case "mongo":
+            import db
+            if db.manager.database() is None:
+                raise SystemExit("mongo: sin conexión (usa --mongod, --mock o --backend memory)")
+
+            def fabrica(n):
+                # Nunca la base configurada: una por tamaño, vacía
+                database = db.manager.client[f"{db.MONGO_DB_NAME}_bench_{n}"]
+                database.client.drop_database(database.name)
+                stack.callback(database.client.drop_database, database.name)
+                return mongo_backend(database)
+            return fabrica, "mongo"
+
+
+# ----------------------------------------------------------------------
+# FORMULARIO: costo por tecla de la validación de TareaFormScreen
+# ----------------------------------------------------------------------
+def validacion_completa(form) -> bool:
+    """La validación de todo el formulario en cada tecla (como antes del debounce)."""
+    title = form.query_one("#titulo_input").value.strip()
+    desc = form.query_one("#descripcion_textarea").text.strip()
+    status = form.query_one("#select_status").value
+    year = form.query_one("#date_year").value
+    month = form.query_one("#date_month").value
+    day = form.query_one("#date_day").value
+    form.query_one("#btn_accept")
+    try:
+        date(int(year or 0), int(month or 0), int(day or 0))
+    except ValueError:
+        return False
+    return bool(title) and bool(desc) and status is not None
+
+
+async def medir_formulario(kb: int, por_pausa: int = 200) -> dict:
+    """
+    Escribe `kb` KB en la descripción de TareaFormScreen, un carácter por
+    evento (headless, run_test de Textual), y cronometra el manejador de
+    TextArea.Changed de cada tecla.
+    """
+    from textual.app import App
+    from textual.widgets import Input, TextArea
+    from TareaFormScreen import TareaFormScreen
+
+    tiempos = []
+    cruzadas = 0
+    manejador = TareaFormScreen.on_text_area_changed
+    validar_cruzado = TareaFormScreen._validar_cruzado
+
+    def medido(self, event):
+        inicio = time.perf_counter()
+        manejador(self, event)
+        tiempos.append(time.perf_counter() - inicio)
+
+    def contar(self):
+        nonlocal cruzadas
+        cruzadas += 1
+        validar_cruzado(self)
+
+    TareaFormScreen.on_text_area_changed = medido
+    TareaFormScreen._validar_cruzado = contar
+    try:
+        app = App()
+        async with app.run_test(size=(120, 40)) as pilot:
+            form = TareaFormScreen(mode="create")
+            await app.push_screen(form)
+            await pilot.pause()
+            form.query_one("#titulo_input", Input).value = "Tarea larga"
+            descripcion = form.query_one("#descripcion_textarea", TextArea)
+            descripcion.focus()
+            texto = (" ".join(PALABRAS) + "\n") * (kb * 1024 // (len(" ".join(PALABRAS)) + 1) + 1)
+            inicio = time.perf_counter()
+            for i, caracter in enumerate(texto[:kb * 1024], 1):
+                descripcion.insert(caracter)
+                if i % por_pausa == 0:
+                    await pilot.pause()
+            await pilot.pause()
+            total = time.perf_counter() - inicio
+            await pilot.pause(form.VALIDACION_DEBOUNCE * 2)
+
+            anterior = latencias(lambda _: validacion_completa(form), range(200))
+            return {"teclas": len(tiempos), "total_s": total, "cruzadas": cruzadas,
+                    "manejador": resumen(tiempos), "anterior": anterior,
+                    "aceptar": not form.query_one("#btn_accept").disabled}
+    finally:
+        TareaFormScreen.on_text_area_changed = manejador
+        TareaFormScreen._validar_cruzado = validar_cruzado
+
+
+def bench_form(kb: int = 50):
+    import asyncio
+
+    r = asyncio.run(medir_formulario(kb))
+    print(f"{r['teclas']} teclas ({kb} KB) en {r['total_s']:.2f} s; "
+          f"validación cruzada: {r['cruzadas']} veces; Aceptar habilitado: {r['aceptar']}")
+    print(f"{'ms por tecla':<32}{'p50':>8}{'p90':>8}{'p99':>8}{'máx':>8}")
+    for etiqueta, valores in (("on_text_area_changed", r["manejador"]),
+                              (f"validación completa ({kb} KB)", r["anterior"])):
+        print(f"{etiqueta:<32}" + "".join(f"{valores[k]:8.3f}" for k in ("p50", "p90", "p99", "max")))
+
+
+# ----------------------------------------------------------------------
+# REGISTROS: Tarea (slots, desde BSON crudo) vs dict + TareaSchema
+# ----------------------------------------------------------------------
+def bench_records(n: int, batch_size: int):
+    """
+    Memoria retenida por 100k tareas y docs/s al decodificar lotes de BSON
+    (como los de find_raw_batches) a dicts o a registros Tarea, y al validar
+    con TareaImportSchema registro por registro o con validar_lote(). Sin
+    base de datos: los documentos se generan en memoria.
+    """
+    import gc
+    import bson
+    import TareaCodec
+    from Tarea import Tarea
+    from TareaSchema import TareaImportSchema, validar_lote
+
+    ahora = datetime.now()
+    registros = [{**tarea, "id": i} for i, tarea in enumerate(tareas_sinteticas(n), 1)]
+    lotes = [
+        b"".join(bson.encode({**TareaCodec.encode({**tarea, "updated_at": ahora, "rev": 1}), "v": 2})
+                 for tarea in registros[i:i + batch_size])
+        for i in range(0, n, batch_size)
+    ]
+
+    print(f"{'decodificar':<30}{'s':>9}{'docs/s':>12}{'MiB/100k':>10}")
+    for etiqueta, fn in (
+        ("dict (TareaCodec.decode)",
+         lambda: [TareaCodec.decode(doc) for lote in lotes for doc in bson.decode_all(lote)]),
+        ("Tarea.from_raw_batch", lambda: [tarea for lote in lotes for tarea in Tarea.from_raw_batch(lote)]),
+    ):
+        inicio = time.perf_counter()
+        tareas = fn()
+        total = time.perf_counter() - inicio
+        del tareas
+        gc.collect()
+        # La memoria se mide aparte: tracemalloc hace más lenta la decodificación
+        tracemalloc.start()
+        tareas = fn()
+        retenida, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del tareas
+        print(f"{etiqueta:<30}{total:9.3f}{n / total:12,.0f}{retenida / 2**20 * 100_000 / n:10.1f}")
+
+    print(f"\n{'validar':<30}{'s':>9}{'docs/s':>12}")
+    for etiqueta, fn in (
+        ("TareaImportSchema (uno a uno)",
+         lambda: [TareaImportSchema(**tarea).model_dump(exclude_none=True) for tarea in registros]),
+        ("validar_lote (TypeAdapter)",
+         lambda: [validar_lote(registros[i:i + batch_size]) for i in range(0, n, batch_size)]),
+    ):
+        inicio = time.perf_counter()
+        fn()
+        total = time.perf_counter() - inicio
+        print(f"{etiqueta:<30}{total:9.3f}{n / total:12,.0f}")
+
+
+# ----------------------------------------------------------------------
+# ARCHIVO: latencia del camino principal con y sin archivar
+# ----------------------------------------------------------------------
+def historia_sintetica(n: int, anos: int):
+    """`n` tareas con fechas repartidas en `anos` años hasta el mes próximo; casi todas las pasadas, completadas."""
+    hoy = date.today()
+    dias = anos * 365
+    for i, tarea in enumerate(tareas_sinteticas(n)):
+        fecha = hoy + timedelta(days=30 - dias * (n - i) // n)
+        vieja = fecha < hoy - timedelta(days=30)
+        yield {**tarea, "fecha": fecha,
+               "status": "completado" if vieja and i % 20 else ("pendiente", "en_progreso")[i % 2]}
+
+
+async def montar_tabla() -> float:
+    """Segundos hasta la primera pantalla con la tabla llena."""
+    from TareasApp import TareasApp
+
+    inicio = time.perf_counter()
+    async with TareasApp().run_test(size=(120, 40)) as pilot:
+        await pilot.pause()
+        total = time.perf_counter() - inicio
+        pilot.app.screen._live_stop.set()   # El hilo de LiveSync no termina solo al salir de run_test
+        return total
+
+
+def medir_lecturas(muestras: int, include_archived: bool) -> dict[str, float | None]:
+    """p50 en ms de las lecturas de la pantalla principal, conky y estadísticas."""
+    import asyncio
+
+    activas = ["pendiente", "en_progreso"]
+
+    def stats_sin_cache(_):
+        TareaService._stats_cache = {}
+        TareaService.stats()
+
+    ops = {
+        "page (id)": lambda _: TareaService.page(limit=100, include_archived=include_archived),
+        "query activas (fecha)": lambda _: TareaService.query(status=activas, sort="fecha", limit=100,
+                                                              include_archived=include_archived),
+        "count (activas)": lambda _: TareaService.count(status=activas, include_archived=include_archived),
+    }
+    p50 = {op: latencias(fn, range(muestras))["p50"] for op, fn in ops.items()}
+    # Solo existen sobre la colección principal
+    for op, fn, veces in (("list()", lambda _: TareaService.list(), 3), ("stats", stats_sin_cache, 5)):
+        p50[op] = None if include_archived else latencias(fn, range(veces))["p50"]
+    p50["tabla (montaje)"] = None if include_archived else asyncio.run(montar_tabla()) * 1000
+    return p50
+
+
+def bench_archive(n: int, batch_size: int, anos: int = 5, nombres=TareaBackend.BACKENDS,
+                  mock: bool = False, muestras: int = 50):
+    """
+    Historia de `anos` años (`n` tareas) en backends nuevos: lecturas del
+    camino principal antes y después de TareaService.archive(), y las mismas
+    con include_archived. MongoDB usa la base `<MONGO_DB>_bench_archive`, que
+    se borra al terminar: nunca archiva las tareas de la base configurada.
+    """
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp, ExitStack() as stack:
+        backends = crear_backends([nombre for nombre in nombres if nombre != "mongo" or mock], mock, tmp)
+        if "mongo" in nombres and not mock:
+            import db
+
+            if db.manager.database() is None:
+                print("mongo: sin conexión, se omite (usa --mock para mongomock)")
+            else:
+                database = db.manager.client[f"{db.MONGO_DB_NAME}_bench_archive"]
+                database.client.drop_database(database.name)
+                stack.callback(database.client.drop_database, database.name)
+                backends["mongo"] = mongo_backend(database)
+
+        for nombre, backend in backends.items():
+            TareaService.use(backend)
+            generador = historia_sintetica(n, anos)
+            while lote := list(islice(generador, SEMBRAR_LOTE)):
+                TareaService.insert_many(lote, batch_size)
+
+            antes = medir_lecturas(muestras, False)
+            inicio = time.perf_counter()
+            resultado = TareaService.archive(batch_size=batch_size)
+            total = time.perf_counter() - inicio
+            despues = medir_lecturas(muestras, False)
+            archivo = medir_lecturas(muestras, True)
+
+            print(f"{nombre}: {n} tareas en {anos} años; archive() movió {resultado['archivadas']}"
+                  f" a {len(backend.archives())} archivos en {total:.2f} s"
+                  f" ({resultado['archivadas'] / total:,.0f} docs/s)")
+            print(f"  {'p50 ms':<24}{'sin archivar':>14}{'archivadas':>14}{'include_archived':>18}")
+            for op in antes:
+                columnas = [f"{valor:.2f}" if valor is not None else "-"
+                            for valor in (antes[op], despues[op], archivo[op])]
+                print(f"  {op:<24}{columnas[0]:>14}{columnas[1]:>14}{columnas[2]:>18}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks de TareaService")
+    parser.add_argument("bench", choices=["bulk", "list", "conky", "startup", "search", "schema", "io", "backends", "suite", "metrics", "form", "records", "archive"], help="Benchmark a ejecutar")
+    parser.add_argument("-n", type=int, default=5000, help="Número de tareas")
+    parser.add_argument("--batch-size", type=int, default=TareaService.BATCH_SIZE)
+    parser.add_argument("--mock", action="store_true", help="Usar mongomock en lugar de MongoDB")
+    parser.add_argument("--backend", choices=TareaBackend.BACKENDS,
+                        help="Backend a usar (por defecto memory; mongo usa la base de .env);"
+                             " en `backends` y `archive`, solo ese")
+    parser.add_argument("--mongod", action="store_true", help="suite: lanzar un mongod local desechable")
+    parser.add_argument("--tamanos", default=",".join(map(str, TAMANOS_SUITE)),
+                        help="suite: tamaños de colección separados por comas")
+    parser.add_argument("--muestras", type=int, default=200, help="suite: operaciones medidas por tipo")
+    parser.add_argument("--json", help="suite: archivo donde guardar los resultados")
+    parser.add_argument("--comparar", help="suite: JSON de una corrida anterior")
+    parser.add_argument("--kb", type=int, default=50, help="form: KB a escribir en la descripción")
+    parser.add_argument("--anos", type=int, default=5, help="archive: años de historia sintética")
+    parser.add_argument("--tolerancia", type=float, default=0.2,
+                        help="suite: empeoramiento aceptado al comparar (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    # Un registro vacío y en memoria: con escrituras sin conexión pendientes
+    # en el real, TareaService las reproduciría en la base del benchmark
+    TareaService.write_log = WriteAheadLog()
+    # Los benchmarks escriben y borran tareas: sin --backend corren en memoria
+    # y la base configurada en .env solo se usa con `--backend mongo` explícito
+    if args.bench not in ("backends", "suite", "archive"):
+        if args.mock and args.backend in (None, "mongo"):
+            usar_mongomock()
+        else:
+            TareaService.use(TareaBackend.create(args.backend or "memory"))
+
+    match args.bench:
+        case "bulk":
+            bench_bulk(args.n, args.batch_size)
+        case "list":
+            bench_list(args.n, args.batch_size)
+        case "conky":
+            bench_conky(args.n)
+        case "startup":
+            bench_startup(min(args.n, 10))
+        case "search":
+            bench_search(args.n, args.batch_size)
+        case "schema":
+            bench_schema(args.n, args.batch_size)
+        case "io":
+            bench_io(args.n, args.batch_size)
+        case "backends":
+            bench_backends(args.n, args.batch_size, [args.backend] if args.backend else TareaBackend.BACKENDS,
+                           mock=args.mock)
+        case "metrics":
+            bench_metrics(args.n, args.batch_size)
+        case "form":
+            bench_form(args.kb)
+        case "records":
+            bench_records(args.n, args.batch_size)
+        case "archive":
+            bench_archive(args.n, args.batch_size, args.anos,
+                          [args.backend] if args.backend else TareaBackend.BACKENDS, mock=args.mock)
+        case "suite":
+            import tempfile
+
+            with ExitStack() as stack:
+                tmp = stack.enter_context(tempfile.TemporaryDirectory())
+                fabrica, nombre = fabrica_suite(args, stack, tmp)
+                bench_suite(fabrica, nombre, [int(n) for n in args.tamanos.split(",")], args.muestras,
+                            args.batch_size, args.json, args.comparar, args.tolerancia)
@@ -0,0 +1,477 @@
+#!/usr/bin/env python3.14
+# conformance.py
+"""
+Verificación de los backends de TareaService (ver TareaBackend).
+
+Corre los mismos casos contra cada backend, a través de TareaService, y
+falla (exit 1) si alguno se comporta distinto:
+
+    ./conformance.py                  # memory, sqlite y mongo (si responde)
+    ./conformance.py --mock           # mongo sobre mongomock
+    ./conformance.py --backend sqlite
+
+Cada caso parte de un backend vacío (y un registro de escrituras sin
+conexión vacío): SQLite en un archivo temporal y MongoDB en la base
+`<MONGO_DB>_conformance`, que se borra al terminar (nunca toca la base
+configurada).
+"""
+import argparse
+import sys
+import tempfile
+import traceback
+from datetime import date, timedelta
+from pathlib import Path
+
+from pymongo.errors import ConnectionFailure
+
+import TareaBackend
+from TareaBackend import SORTS, Conflicto, compute_stats, matches, sort_key
+from TareaService import TareaService, _now
+from WriteAheadLog import WriteAheadLog
+
+HOY = date.today()
+
+
+def tarea(i: int, **campos) -> dict:
+    """Tarea de prueba determinista (varía status, fecha y texto con `i`)."""
+    estados = ("pendiente", "en_progreso", "completado")
+    return {
+        "titulo": f"Tarea {i} {'Revisión' if i % 4 == 0 else 'compra'}",
+        "descripcion": f"Descripción {i} {'URGENTE' if i % 5 == 0 else 'normal'}",
+        "status": estados[i % 3],
+        "fecha": HOY + timedelta(days=i % 40 - 10),
+        **campos,
+    }
+
+
+def poblar(n: int = 60) -> list[dict]:
+    return TareaService.insert_many(tarea(i) for i in range(n))
+
+
+def sin_updated_at(tareas):
+    return [{k: v for k, v in t.items() if k != "updated_at"} for t in tareas]
+
+
+class Desconectable:
+    """
+    Stand-in de red: envuelve un backend y simula caídas. Con `online` en
+    False no está disponible y toda llamada lanza `error` (ConnectionFailure);
+    `fallar_en` hace fallar una sola vez ese método (caída a media operación).
+
+    Con `sin_detectar` la caída aún no se nota: available() sigue en True
+    hasta que alguien llama report_failure(), como con el ConnectionManager.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.online = True
+        self.sin_detectar = False
+        self.fallar_en: str | None = None
+        self.error: type[ConnectionFailure] = ConnectionFailure
+
+    def available(self) -> bool:
+        return (self.online or self.sin_detectar) and self.backend.available()
+
+    def report_failure(self):
+        self.sin_detectar = False
+
+    def __getattr__(self, nombre):
+        atributo = getattr(self.backend, nombre)
+        if not callable(atributo):
+            return atributo
+
+        def llamada(*args, **kwargs):
+            if not self.online or nombre == self.fallar_en:
+                self.fallar_en = None
+                raise self.error(f"{nombre}: sin conexión (simulada)")
+            return atributo(*args, **kwargs)
+
+        return llamada
+
+
+# ----------------------------------------------------------------------
+# CASOS
+# ----------------------------------------------------------------------
+def caso_insert_get():
+    nueva = TareaService.insert(tarea(1, fecha=HOY.isoformat(), status="hecho"))
+    assert nueva["id"] == 1, nueva
+    assert nueva["fecha"] == HOY and nueva["status"] == "completado", nueva
+    TareaService.cache.invalidate()
+    leida = TareaService.get(nueva["id"])
+    assert leida == nueva, (leida, nueva)
+    assert TareaService.get(999) is None
+
+
+def caso_status_invalido():
+    try:
+        TareaService.insert(tarea(1, status="archivada"))
+    except ValueError:
+        return
+    raise AssertionError("se aceptó un status inválido")
+
+
+def caso_ids_consecutivos():
+    tareas = poblar(10)
+    assert [t["id"] for t in tareas] == list(range(1, 11))
+    assert TareaService.existing_ids([0, 3, 10, 11]) == {3, 10}
+    assert TareaService.next_id() == 11
+
+
+def caso_update():
+    original = TareaService.insert(tarea(1))
+    actualizada = TareaService.update(original["id"], {"id": 50, "titulo": "Otro", "status": "completado"})
+    assert actualizada["id"] == original["id"], "se modificó el id"
+    assert actualizada["titulo"] == "Otro" and actualizada["status"] == "completado"
+    assert actualizada["descripcion"] == original["descripcion"]
+    assert actualizada["updated_at"] >= original["updated_at"]
+    TareaService.cache.invalidate()
+    assert TareaService.get(original["id"]) == actualizada
+    assert TareaService.update(999, {"titulo": "x"}) is None
+
+
+def caso_conflicto():
+    original = TareaService.insert(tarea(1))
+    assert original["rev"] == 1, original
+
+    # El formulario completo sin cambios no escribe nada
+    version = TareaService.version()
+    formulario = {**original, "fecha": original["fecha"].isoformat()}
+    assert TareaService.diff(original, formulario) == {}
+    assert TareaService.update(original["id"], {}, rev=original["rev"]) == original
+    assert TareaService.version() == version
+    assert TareaService.diff(original, {**formulario, "titulo": "A"}) == {"titulo": "A"}
+
+    # Dos ediciones desde la misma lectura: la segunda no pisa a la primera
+    primera = TareaService.update(original["id"], {"titulo": "A"}, rev=original["rev"])
+    assert primera["rev"] == 2
+    try:
+        TareaService.update(original["id"], {"status": "completado"}, rev=original["rev"])
+        raise AssertionError("se aceptó una revisión vieja")
+    except Conflicto as e:
+        actual = e.actual
+    assert actual["titulo"] == "A" and actual["rev"] == 2, actual
+    assert TareaService.get(original["id"]) == actual
+
+    # Sobrescribir: los cambios propios sobre la revisión actual
+    segunda = TareaService.update(original["id"], {"status": "completado"}, rev=actual["rev"])
+    assert (segunda["titulo"], segunda["status"], segunda["rev"]) == ("A", "completado", 3), segunda
+
+    # Sin `rev` la escritura es incondicional; toda escritura sube la revisión
+    assert TareaService.update(original["id"], {"titulo": "B"})["rev"] == 4
+    assert TareaService.update_many([(original["id"], {"titulo": "C"})]) == [True]
+    TareaService.cache.invalidate()
+    assert TareaService.get(original["id"])["rev"] == 5
+    assert TareaService.update(999, {"titulo": "x"}, rev=1) is None
+
+
+def caso_delete():
+    nueva = TareaService.insert(tarea(1))
+    assert TareaService.delete(nueva["id"]) is True
+    assert TareaService.delete(nueva["id"]) is False
+    assert TareaService.get(nueva["id"]) is None
+    assert TareaService.count() == 0
+
+
+def caso_bulk():
+    poblar(10)
+    # Ordenado: se detiene en el id duplicado (5)
+    lote = [tarea(i, id=i) for i in (20, 5, 21)]
+    assert [bool(t) for t in TareaService.insert_many(lote, conservar_ids=True)] == [True, False, False]
+    assert TareaService.existing_ids([20, 21]) == {20}
+    # Sin orden: solo falla el duplicado
+    lote = [tarea(i, id=i) for i in (30, 5, 31)]
+    assert [bool(t) for t in TareaService.insert_many(lote, ordered=False, conservar_ids=True)] == [True, False, True]
+    # Con conservar_ids el contador se adelanta al mayor id
+    assert TareaService.next_id() == 32
+
+    assert TareaService.update_many([(1, {"status": "completado"}), (99, {"status": "completado"}),
+                                     (2, {"titulo": "Dos"})]) == [True, False, True]
+    TareaService.cache.invalidate()
+    assert TareaService.get(1)["status"] == "completado" and TareaService.get(2)["titulo"] == "Dos"
+    assert TareaService.delete_many([3, 99, 4, 3], ordered=False) == [True, False, True, False]
+    assert TareaService.count() == 10 + 3 - 2
+
+
+def caso_query_orden():
+    todas = sin_updated_at(poblar())
+    for sort in SORTS:
+        esperado = sorted(todas, key=lambda t: sort_key(t, sort))
+        assert sin_updated_at(TareaService.query(sort=sort, limit=1000)) == esperado, sort
+
+        # Keyset hacia adelante y hacia atrás: las páginas cubren todo sin repetir
+        paginas, after = [], None
+        while page := TareaService.query(sort=sort, limit=7, after=after):
+            paginas += page
+            after = page[-1]
+        assert sin_updated_at(paginas) == esperado, f"{sort}: keyset after"
+
+        paginas, before = [], {**esperado[-1], "id": esperado[-1]["id"] + 1}
+        while page := TareaService.query(sort=sort, limit=7, before=before):
+            paginas = page + paginas
+            before = page[0]
+        assert sin_updated_at(paginas) == esperado, f"{sort}: keyset before"
+
+
+def caso_filtros():
+    todas = sin_updated_at(poblar())
+    casos = [
+        {"status": "pendiente"},
+        {"status": ["pendiente", "completado"]},
+        {"desde": HOY},
+        {"hasta": HOY},
+        {"desde": HOY, "hasta": HOY + timedelta(days=7)},
+        {"texto": "revisión"},
+        {"texto": "URGENTE"},
+        {"texto": "urgente", "status": "en_progreso", "desde": HOY - timedelta(days=3)},
+    ]
+    for filtros in casos:
+        esperado = [t for t in todas if matches(t, filtros)]
+        assert esperado, f"caso sin resultados: {filtros}"
+        for sort in SORTS:
+            obtenido = sin_updated_at(TareaService.query(**filtros, sort=sort, limit=1000))
+            assert obtenido == sorted(esperado, key=lambda t: sort_key(t, sort)), (filtros, sort)
+        assert TareaService.count(**filtros) == len(esperado), filtros
+    assert TareaService.count() == len(todas)
+
+
+def caso_stats():
+    todas = poblar()
+    TareaService.delete_many([t["id"] for t in todas[:5]])
+    esperado = compute_stats(TareaService.list(), 4, HOY)
+    assert TareaService.stats(4, HOY) == esperado, (TareaService.stats(4, HOY), esperado)
+    # Se recalcula tras una escritura
+    TareaService.update(todas[10]["id"], {"status": "completado"})
+    assert TareaService.stats(4, HOY) == compute_stats(TareaService.list(), 4, HOY)
+
+
+def caso_busqueda():
+    poblar()
+    resultados = TareaService.search("revis")
+    assert resultados, "la búsqueda por prefijo no encontró nada"
+    assert all("revisión" in t["titulo"].lower() for t in resultados)
+    puntajes = [t["score"] for t in resultados]
+    assert puntajes == sorted(puntajes, reverse=True)
+    assert all(t["status"] == "pendiente" for t in TareaService.search("tarea", status="pendiente"))
+    # El índice local sigue las escrituras
+    nueva = TareaService.insert(tarea(100, titulo="Zanahoria"))
+    assert [t["id"] for t in TareaService.search("zanahoria")] == [nueva["id"]]
+
+
+def caso_version():
+    inicial = TareaService.version()
+    TareaService.list()
+    TareaService.query(status="pendiente")
+    assert TareaService.version() == inicial, "una lectura cambió la versión"
+    nueva = TareaService.insert(tarea(1))
+    TareaService.update(nueva["id"], {"titulo": "x"})
+    TareaService.delete(nueva["id"])
+    assert TareaService.version() == inicial + 3
+
+
+def caso_cursor():
+    todas = poblar(25)
+    assert list(TareaService.cursor(batch_size=7)) == todas
+    assert list(TareaService.stream(page_size=7)) == todas
+    assert [TareaBackend.normalize(dict(doc)) for doc in TareaService.cursor(raw=True, batch_size=7)] == todas
+    assert TareaService.list() == todas
+
+
+def caso_archivo():
+    todas = poblar(30)
+    completadas = {t["id"] for t in todas if t["status"] == "completado"}
+    assert TareaService.archive(dias=30, hoy=HOY) == {"archivadas": 0, "omitidas": 0}
+
+    # Editada después de leerse: no sale de la colección principal
+    editada = todas[2]
+    TareaService.backend.update(editada["id"], {"titulo": "Editada", "updated_at": _now() + timedelta(seconds=1)})
+    assert TareaService._archive_batch(TareaBackend.ARCHIVE, [editada]) == 0
+    assert TareaService.get(editada["id"])["titulo"] == "Editada"
+    assert TareaService.count(include_archived=True) == 30
+
+    # Dentro de 400 días todas las completadas son viejas
+    resultado = TareaService.archive(dias=30, bucket="year", batch_size=3, hoy=HOY + timedelta(days=400))
+    assert resultado == {"archivadas": len(completadas), "omitidas": 0}, resultado
+    assert TareaService.backend.archives() == sorted({TareaBackend.ARCHIVE} | {
+        TareaBackend.archive_name(t["fecha"], "year") for t in todas if t["id"] in completadas})
+    assert TareaService.count() == 30 - len(completadas)
+    assert TareaService.count(include_archived=True) == 30
+    assert TareaService.count(status="completado", include_archived=True) == len(completadas)
+    assert not TareaService.query(status="completado")
+
+    actuales = sin_updated_at([TareaService.get(t["id"], include_archived=True) for t in todas])
+    assert sin_updated_at(todas[:2]) == actuales[:2]
+    for sort in SORTS:
+        esperado = sorted(actuales, key=lambda t: sort_key(t, sort))
+        assert sin_updated_at(TareaService.query(sort=sort, limit=1000, include_archived=True)) == esperado
+        paginas, after = [], None
+        while page := TareaService.query(sort=sort, limit=4, after=after, include_archived=True):
+            paginas += page
+            after = page[-1]
+        assert sin_updated_at(paginas) == esperado, f"{sort}: keyset con archivo"
+
+    archivada = min(completadas)
+    assert TareaService.get(archivada) is None
+    assert TareaService.get(archivada, include_archived=True)["id"] == archivada
+    # Los ids archivados no se reutilizan
+    assert TareaService.seed_counter() == 30 and TareaService.next_id() == 31
+
+    # Copia a medio archivar (en ambos lados): se ve una sola vez
+    pendiente = TareaService.get(todas[0]["id"])
+    TareaService.backend.archive(TareaBackend.ARCHIVE).insert_many([pendiente], ordered=False)
+    assert [t["id"] for t in TareaService.query(include_archived=True, limit=1000)].count(pendiente["id"]) == 1
+
+
+def caso_sin_conexion():
+    tareas = poblar(5)
+    red = Desconectable(TareaService.backend)
+    TareaService.use(red)
+    with tempfile.TemporaryDirectory() as tmp:
+        TareaService.write_log = WriteAheadLog(Path(tmp) / "pendientes.db")
+
+        # Sin conexión las escrituras se confirman desde el registro local
+        red.online = False
+        nueva = TareaService.insert(tarea(10))
+        assert nueva["id"] < 0 and nueva["status"] == "en_progreso", nueva
+        assert TareaService.update(nueva["id"], {"titulo": "Sin red"})["titulo"] == "Sin red"
+        assert TareaService.get(nueva["id"])["titulo"] == "Sin red"
+        TareaService.update(tareas[0]["id"], {"status": "completado"})
+        TareaService.update(tareas[1]["id"], {"titulo": "Vieja"})
+        assert TareaService.delete(tareas[2]["id"]) is True
+        assert TareaService.pending() == 5
+        # La misma llave de idempotencia no se anota dos veces
+        for _ in range(2):
+            TareaService.write_log.append("update", tareas[3]["id"], {"titulo": "Una vez"}, _now(),
+                                          clave="llave-repetida")
+        assert TareaService.pending() == 6
+
+        # Otro cliente edita después, directo en el backend: su cambio gana
+        red.backend.update(tareas[1]["id"], {"titulo": "Nueva", "updated_at": _now() + timedelta(seconds=1)})
+        assert red.backend.count({}) == 5, "se escribió sin conexión"
+
+        # El registro sobrevive a un reinicio
+        TareaService.write_log.close()
+        TareaService.write_log = WriteAheadLog(Path(tmp) / "pendientes.db")
+        assert TareaService.pending() == 6
+
+        # Caída a media sincronización: lo ya confirmado no se repite
+        red.online = True
+        red.fallar_en = "update_many"
+        try:
+            TareaService.sync()
+            raise AssertionError("sync() ocultó la caída")
+        except ConnectionFailure:
+            pass
+        assert TareaService.pending() == 5, "el insert reproducido sigue pendiente"
+        assert TareaService.sync() == {"aplicadas": 4, "descartadas": 1, "pendientes": 0}
+
+        real = max(TareaService.existing_ids(list(range(1, 10))))
+        assert real == 6 and TareaService.get(nueva["id"]) is None
+        assert TareaService.get(real)["titulo"] == "Sin red"
+        assert TareaService.get(tareas[0]["id"])["status"] == "completado"
+        assert TareaService.get(tareas[1]["id"])["titulo"] == "Nueva"
+        assert TareaService.get(tareas[2]["id"]) is None
+        assert TareaService.get(tareas[3]["id"])["titulo"] == "Una vez"
+
+        # Reproducir de nuevo un insert ya aplicado no lo duplica
+        TareaService.write_log.append("insert", real, tarea(10), TareaService.get(real)["updated_at"])
+        assert TareaService.sync() == {"aplicadas": 1, "descartadas": 0, "pendientes": 0}
+        assert TareaService.count() == 5
+
+        # Con conexión y sin pendientes se escribe directo en el backend
+        assert TareaService.insert(tarea(11))["id"] == 7 and TareaService.pending() == 0
+        TareaService.write_log.close()
+
+
+CASOS = [valor for nombre, valor in globals().items() if nombre.startswith("caso_")]
+
+
+# ----------------------------------------------------------------------
+# BACKENDS
+# ----------------------------------------------------------------------
+def fabricas(nombres, mock: bool, tmp: Path) -> dict:
+    """Por backend, una función que devuelve una instancia vacía (None = omitido)."""
+    from MemoryBackend import MemoryBackend
+    from SQLiteBackend import SQLiteBackend
+
+    contador = iter(range(1_000_000))
+    fabricas = {}
+    for nombre in nombres:
+        match nombre:
+            case "memory":
+                fabricas[nombre] = MemoryBackend
+            case "sqlite":
+                fabricas[nombre] = lambda: SQLiteBackend(tmp / f"caso{next(contador)}.db")
+            case "mongo":
+                fabricas[nombre] = mongo_mock if mock else mongo_real()
+    return fabricas
+
+
+def mongo_backend(database):
+    """MongoBackend sobre `database` con los índices de db.INDEXES (el id es único)."""
+    import db
+    from MongoBackend import MongoBackend
+
+    for coleccion, llaves, opciones in db.INDEXES:
+        database[coleccion].create_index(llaves, **opciones)
+    return MongoBackend(collection=database.tareas, counters=database.counters)
+
+
+def mongo_mock():
+    import mongomock
+
+    return mongo_backend(mongomock.MongoClient().tareas)
+
+
+def mongo_real():
+    import db
+
+    if db.manager.database() is None:
+        return None
+    database = db.manager.client[f"{db.MONGO_DB_NAME}_conformance"]
+
+    def fabrica():
+        database.client.drop_database(database.name)
+        return mongo_backend(database)
+
+    fabrica.limpiar = lambda: database.client.drop_database(database.name)
+    return fabrica
+
+
+def verificar(fabrica) -> int:
+    """Corre CASOS con backends nuevos; devuelve cuántos fallaron."""
+    fallidos = 0
+    for caso in CASOS:
+        TareaService.use(fabrica())
+        TareaService.write_log = WriteAheadLog()
+        try:
+            TareaService.migrate()     # Como `./app.py --setup`: base vacía = esquema actual
+            caso()
+            print(f"  ✓ {caso.__name__.removeprefix('caso_')}")
+        except Exception:
+            fallidos += 1
+            print(f"  ✗ {caso.__name__.removeprefix('caso_')}")
+            print("    " + traceback.format_exc().strip().replace("\n", "\n    "))
+    return fallidos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verifica que los backends se comporten igual")
+    parser.add_argument("--backend", choices=TareaBackend.BACKENDS, help="Solo este backend")
+    parser.add_argument("--mock", action="store_true", help="MongoDB sobre mongomock")
+    args = parser.parse_args()
+
+    fallidos = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for nombre, fabrica in fabricas([args.backend] if args.backend else TareaBackend.BACKENDS,
+                                        args.mock, Path(tmp)).items():
+            if fabrica is None:
+                print(f"{nombre}: sin conexión, se omite (usa --mock para mongomock)")
+                continue
+            print(nombre)
+            fallidos += verificar(fabrica)
+            if hasattr(fabrica, "limpiar"):
+                fabrica.limpiar()
+
+    if fallidos:
+        sys.exit(f"{fallidos} casos fallidos")
+    print("Todos los backends cumplen.")
@@ -1,55 +1,247 @@
 # db.py
 import os
+import threading
+import time
+from collections.abc import Callable
 from dotenv import load_dotenv
 from pymongo import MongoClient
-from pymongo import ASCENDING
+from pymongo import ASCENDING, TEXT
+from pymongo.collection import Collection
 from pymongo.errors import ConnectionFailure, OperationFailure
 from pymongo.database import Database
 
+import Metrics
+import TareaCodec
+
 # Cargar configuración desde .env
 load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI")
 MONGO_DB_NAME = os.getenv("MONGO_DB")
 
-# Inicialización por defecto
-client: MongoClient | None = None
-db: Database | None = None
-
-if not MONGO_URI or not MONGO_DB_NAME:
-    print("FATAL: Faltan variables MONGO_URI o MONGO_DB en el archivo .env")
-else:
-    try:
-        # Establecer la conexión a MongoDB (timeout de 5 segundos)
-        client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=5000)
-        
-        # El comando 'server_info()' fuerza la conexión para detectar errores tempranamente
-        client.admin.command('serverStatus')
-        
-        # Crear la base de datos (lazy creation)
-        db = client[MONGO_DB_NAME]
-        # Obtener la colección
-        
-        # Configurar índice único sobre el campo 'id'
-        # Esto se ejecuta solo si la conexión es exitosa
-        db.tareas.create_index(
-            [("id", ASCENDING)], 
-            unique=True,
-            background=True
-        )
-        
-    except ConnectionFailure:
-        print(f"ERROR: No se pudo conectar a MongoDB en {MONGO_URI}. Asegúrate de que el servidor esté corriendo.")
-        client = None
-        db = None
-    except OperationFailure as e:
-        print(f"ERROR: Fallo en la operación de MongoDB (ej. autenticación, permisos): {e}")
-        client = None
-        db = None
-    except Exception as e:
-        print(f"ERROR: Ocurrió un error inesperado durante la inicialización de MongoDB: {e}")
-        client = None
-        db = None
-
-# Exportar las variables de conexión. Otros módulos deben verificar si 'db' es None.
-# Acceso a la colección: if db is not None: collection = db.tareas
+# Índices de la aplicación: (colección, llaves, opciones). Los crea
+# ConnectionManager.ensure_indexes() (`./app.py --setup`), nunca el arranque.
+INDEXES = [
+    # Índice único sobre el campo 'id'
+    ("tareas", [("id", ASCENDING)], {"unique": True}),
+    # Índice para el polling de cambios (LiveSync sin change streams)
+    ("tareas", [("updated_at", ASCENDING)], {}),
+    # Consultas de TareaService.query(): filtros por status/fecha y los
+    # órdenes de TareaService.SORTS (id al final como desempate)
+    ("tareas", [("status", ASCENDING), ("fecha", ASCENDING), ("id", ASCENDING)], {}),
+    ("tareas", [("status", ASCENDING), ("id", ASCENDING)], {}),
+    ("tareas", [("fecha", ASCENDING), ("id", ASCENDING)], {}),
+    # Búsqueda de texto de TareaService.search(); el título pesa el doble
+    ("tareas", [("titulo", TEXT), ("descripcion", TEXT)],
+     {"name": "tareas_texto", "weights": {"titulo": 2, "descripcion": 1},
+      "default_language": "spanish"}),
+]
+
+# Índices de las colecciones de archivo (ver TareaService.archive()): el id
+# único y los de query(); sin búsqueda de texto ni polling de LiveSync. Los
+# crea MongoBackend.archive() al usar cada colección.
+ARCHIVE_INDEXES = [
+    ([("id", ASCENDING)], {"unique": True}),
+    ([("status", ASCENDING), ("fecha", ASCENDING), ("id", ASCENDING)], {}),
+    ([("fecha", ASCENDING), ("id", ASCENDING)], {}),
+]
+
+# Validación de documentos del esquema actual (ver TareaCodec). Con nivel
+# "moderate" las tareas aún sin migrar se pueden seguir actualizando.
+VALIDATORS = {
+    "tareas": {
+        "$jsonSchema": {
+            "bsonType": "object",
+            "required": ["id", "titulo", "status", "fecha"],
+            "properties": {
+                "id": {"bsonType": ["int", "long"]},
+                "titulo": {"bsonType": "string"},
+                "status": {"enum": list(TareaCodec.STATUS_CODES.values())},
+                "fecha": {"bsonType": "date"},
+                "v": {"bsonType": "int"},
+                "rev": {"bsonType": ["int", "long"]},
+            },
+        },
+    },
+}
+
+
+def _env_int(name: str, default: int | None) -> int | None:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+class ConnectionManager:
+    """
+    Ciclo de vida de la conexión a MongoDB.
+
+    - Conecta de forma perezosa en el primer database()/collection().
+    - Si la conexión falla (o alguien reporta una caída con report_failure())
+      devuelve None y reintenta con backoff exponencial, sin bloquear en cada
+      llamada mientras el servidor sigue caído.
+    - Las opciones del pool se leen de .env (MONGO_MAX_POOL_SIZE, ...).
+    - Es thread-safe: un lock serializa conectar y reiniciar. Tras una caída
+      el cliente no se cierra (otros hilos pueden estar usándolo; pymongo
+      reconecta solo): se vuelve a hacer ping con él al terminar el backoff.
+      Solo close() lo cierra.
+
+    `client_factory` permite usar un stand-in local en lugar de MongoClient.
+    """
+
+    BACKOFF_INITIAL = 1.0
+    BACKOFF_MAX = 60.0
+
+    def __init__(self, uri: str | None, db_name: str | None,
+                 client_factory: Callable[..., MongoClient] = MongoClient,
+                 **client_options):
+        self.uri = uri
+        self.db_name = db_name
+        self.client_factory = client_factory
+        self.client_options = client_options
+        self.client: MongoClient | None = None
+        self._db: Database | None = None
+        self._backoff = self.BACKOFF_INITIAL
+        self._next_attempt = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ConnectionManager":
+        options = {
+            "maxPoolSize": _env_int("MONGO_MAX_POOL_SIZE", 100),
+            "minPoolSize": _env_int("MONGO_MIN_POOL_SIZE", 0),
+            "maxIdleTimeMS": _env_int("MONGO_MAX_IDLE_TIME_MS", None),
+            "connectTimeoutMS": _env_int("MONGO_CONNECT_TIMEOUT_MS", 5000),
+            "socketTimeoutMS": _env_int("MONGO_SOCKET_TIMEOUT_MS", None),
+            "serverSelectionTimeoutMS": _env_int("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000),
+        }
+        # Tiempos por comando del driver para Metrics (TAREAS_METRICS_MONGO)
+        if listeners := Metrics.event_listeners():
+            options["event_listeners"] = listeners
+        return cls(MONGO_URI, MONGO_DB_NAME, **options)
+
+    # ----------------------------------------------------------------------
+    # CONEXIÓN
+    # ----------------------------------------------------------------------
+    @property
+    def connected(self) -> bool:
+        return self._db is not None
+
+    def database(self) -> Database | None:
+        """Devuelve la base de datos, conectando si hace falta. None si no hay servidor."""
+        if self._db is not None:
+            return self._db
+        with self._lock:
+            if self._db is not None:
+                return self._db     # Otro hilo conectó mientras se esperaba el lock
+            if time.monotonic() < self._next_attempt:
+                return None     # Aún en backoff: no bloquear otra vez
+            return self._connect()
+
+    def collection(self, name: str) -> Collection | None:
+        database = self.database()
+        return database[name] if database is not None else None
+
+    def _connect(self) -> Database | None:
+        if not self.uri or not self.db_name:
+            print("FATAL: Faltan variables MONGO_URI o MONGO_DB en el archivo .env")
+            self._next_attempt = float("inf")   # Sin configuración no hay reintento
+            return None
+
+        try:
+            if self.client is None:
+                self.client = self.client_factory(self.uri, **self.client_options)
+
+            # 'ping' fuerza la conexión para detectar errores tempranamente
+            self.client.admin.command('ping')
+
+            # Crear la base de datos (lazy creation)
+            self._db = self.client[self.db_name]
+            self._backoff = self.BACKOFF_INITIAL
+            return self._db
+
+        except ConnectionFailure:
+            print(f"ERROR: No se pudo conectar a MongoDB en {self.uri}. Asegúrate de que el servidor esté corriendo.")
+        except OperationFailure as e:
+            print(f"ERROR: Fallo en la operación de MongoDB (ej. autenticación, permisos): {e}")
+        except Exception as e:
+            print(f"ERROR: Ocurrió un error inesperado durante la inicialización de MongoDB: {e}")
+
+        self._schedule_retry()
+        return None
+
+    def report_failure(self):
+        """Una operación detectó que el servidor se cayó: reconectar con backoff."""
+        with self._lock:
+            if self._db is not None:    # Varios hilos reportan la misma caída
+                self._schedule_retry()
+
+    def _schedule_retry(self):
+        """Con el lock tomado. Conserva el cliente: otras operaciones pueden estar en curso."""
+        self._db = None
+        self._next_attempt = time.monotonic() + self._backoff
+        self._backoff = min(self._backoff * 2, self.BACKOFF_MAX)
+
+    def close(self):
+        with self._lock:
+            if self.client is not None:
+                self.client.close()
+            self.client = None
+            self._db = None
+
+    # ----------------------------------------------------------------------
+    # ÍNDICES
+    # ----------------------------------------------------------------------
+    def ensure_indexes(self) -> bool:
+        """
+        Crea los índices de INDEXES que falten (idempotente: los existentes se
+        omiten sin enviar create_index). Devuelve False si no hay conexión.
+        """
+        database = self.database()
+        if database is None:
+            return False
+
+        # Llaves y nombres de los índices existentes. Los índices de texto se
+        # reconocen por nombre: MongoDB los reporta como (_fts, _ftsx).
+        existing: dict[str, set] = {}
+        for collection, keys, options in INDEXES:
+            if collection not in existing:
+                info = database[collection].index_information()
+                existing[collection] = set(info) | {tuple(map(tuple, i["key"])) for i in info.values()}
+            if tuple(keys) in existing[collection] or options.get("name") in existing[collection]:
+                continue
+            database[collection].create_index(keys, **options)
+            existing[collection].add(tuple(keys))
+        return True
+
+    def ensure_validators(self) -> bool:
+        """Aplica VALIDATORS (crea la colección si no existe). False si no hay conexión."""
+        database = self.database()
+        if database is None:
+            return False
+
+        existing = set(database.list_collection_names())
+        for collection, validator in VALIDATORS.items():
+            if collection in existing:
+                database.command("collMod", collection, validator=validator,
+                                 validationLevel="moderate")
+            else:
+                database.create_collection(collection, validator=validator,
+                                           validationLevel="moderate")
+        return True
+
+
+# Conexión compartida de la aplicación
+manager = ConnectionManager.from_env()
+
+
+def get_db() -> Database | None:
+    """Devuelve la base de datos, conectando si hace falta. None si no hay servidor."""
+    return manager.database()
+
+
+def setup() -> bool:
+    """Configuración única de la base (`./app.py --setup`): índices y validación."""
+    return manager.ensure_indexes() and manager.ensure_validators()
+
+# Otros módulos deben verificar si get_db() devuelve None.
+# Acceso a la colección: manager.collection("tareas")
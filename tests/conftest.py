@@ -0,0 +1,68 @@
+# tests/conftest.py
+"""
+Fixtures comunes: cada prueba recibe un backend vacío (ver conformance.py)
+ya instalado en TareaService, con un registro de escrituras en memoria.
+
+MongoDB corre sobre mongomock (si está instalado); las pruebas nunca tocan
+la base configurada en .env.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import conformance  # noqa: E402
+from TareaService import TareaService  # noqa: E402
+from WriteAheadLog import WriteAheadLog  # noqa: E402
+
+BACKENDS = ("memory", "sqlite", "mongo")
+
+
+def crear_backend(nombre: str, tmp_path: Path):
+    if nombre == "mongo":
+        pytest.importorskip("mongomock")
+    return conformance.fabricas([nombre], mock=True, tmp=tmp_path)[nombre]()
+
+
+def instalar(backend):
+    """Deja `backend` como backend de TareaService, sin escrituras pendientes."""
+    TareaService.use(backend)
+    TareaService.write_log = WriteAheadLog()
+    return backend
+
+
+class Contador(conformance.Desconectable):
+    """Desconectable que además cuenta las llamadas que llegan al backend."""
+
+    def __init__(self, backend):
+        super().__init__(backend)
+        self.llamadas: dict[str, int] = {}
+
+    def __getattr__(self, nombre):
+        llamada = super().__getattr__(nombre)
+        if not callable(llamada):
+            return llamada
+
+        def contada(*args, **kwargs):
+            self.llamadas[nombre] = self.llamadas.get(nombre, 0) + 1
+            return llamada(*args, **kwargs)
+
+        return contada
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, tmp_path):
+    anterior, registro = TareaService.backend, TareaService.write_log
+    yield instalar(crear_backend(request.param, tmp_path))
+    TareaService.use(anterior)
+    TareaService.write_log = registro
+
+
+@pytest.fixture
+def red(backend):
+    """El backend de la prueba detrás de un Contador (caídas simuladas y llamadas)."""
+    red = Contador(backend)
+    TareaService.use(red)
+    return red
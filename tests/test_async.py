@@ -0,0 +1,79 @@
+# tests/test_async.py
+"""
+AsyncTareaService tras una caída: se repiten las lecturas; las escrituras
+que no llegaron al servidor quedan pendientes y las que pudieron aplicarse
+se informan sin repetirlas. Los recorridos (cursor...) corren en un hilo.
+"""
+import asyncio
+import threading
+
+import pytest
+from pymongo.errors import AutoReconnect, NetworkTimeout, ServerSelectionTimeoutError
+
+from AsyncTareaService import AsyncTareaService
+from conformance import poblar, tarea
+from TareaService import TareaService
+
+
+def test_lectura_se_repite(backend, red):
+    creada = TareaService.insert(tarea(1))
+    TareaService.cache.invalidate()     # Que get() llegue al backend
+    red.fallar_en = "get"
+    assert asyncio.run(AsyncTareaService.get(creada["id"]))["id"] == creada["id"]
+    assert red.llamadas["get"] == 2
+
+
+def test_escritura_enviada_no_se_repite(backend, red):
+    red.fallar_en, red.error = "insert", AutoReconnect
+    with pytest.raises(AutoReconnect):
+        asyncio.run(AsyncTareaService.insert(tarea(1)))
+    assert red.llamadas["insert"] == 1
+    assert backend.count({}) == 0 and TareaService.pending() == 0
+
+
+# mongomock no acepta el bulk_write de sync() con pymongo 4.x (UpdateOne con sort)
+@pytest.mark.parametrize("backend", ["memory", "sqlite"], indirect=True)
+def test_caida_entre_escrituras(backend, red):
+    primera = asyncio.run(AsyncTareaService.insert(tarea(1)))
+
+    # El servidor se cae sin que nadie lo note: la siguiente escritura no llega
+    red.online, red.sin_detectar, red.error = False, True, ServerSelectionTimeoutError
+    editada = asyncio.run(AsyncTareaService.update(primera["id"], {"titulo": "Sin red"}, rev=primera["rev"]))
+    assert editada["titulo"] == "Sin red" and TareaService.pending() == 1
+    assert not TareaService.available(), "no se avisó de la caída"
+    nueva = asyncio.run(AsyncTareaService.insert(tarea(2)))
+    assert nueva["id"] < 0 and TareaService.pending() == 2
+
+    red.online = True
+    assert TareaService.sync() == {"aplicadas": 2, "descartadas": 0, "pendientes": 0}
+    assert TareaService.get(primera["id"])["titulo"] == "Sin red"
+    assert backend.count({}) == 2
+
+
+def test_caida_al_reservar_id(backend, red):
+    # Aunque el $inc pudo aplicarse, solo se pierde un id: la tarea queda pendiente
+    red.fallar_en, red.error = "reserve_ids", NetworkTimeout
+    nueva = asyncio.run(AsyncTareaService.insert(tarea(1)))
+    assert nueva["id"] < 0 and TareaService.pending() == 1
+    assert "insert" not in red.llamadas
+
+
+def test_cursor_fuera_del_event_loop(backend, monkeypatch):
+    poblar(25)
+    hilos = set()
+    original = backend.cursor
+
+    def cursor(*args, **kwargs):
+        for tarea in original(*args, **kwargs):
+            hilos.add(threading.get_ident())
+            yield tarea
+
+    monkeypatch.setattr(backend, "cursor", cursor)
+    monkeypatch.setattr(AsyncTareaService, "LOTE", 7)
+
+    async def recorrer():
+        return [t["id"] async for t in AsyncTareaService.cursor()], threading.get_ident()
+
+    ids, event_loop = asyncio.run(recorrer())
+    assert ids == list(range(1, 26))
+    assert hilos and event_loop not in hilos
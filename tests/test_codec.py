@@ -0,0 +1,27 @@
+# tests/test_codec.py
+"""Lectura de tareas del esquema v1 con valores inválidos: se muestran tal cual."""
+from datetime import date, datetime
+
+import bson
+
+import TareaCodec
+from Tarea import Tarea
+
+V1 = {"_id": 1, "id": 1, "titulo": "t", "descripcion": "d", "status": "archivada", "fecha": "2024-02-30"}
+
+
+def test_decode_conserva_valores_invalidos():
+    tarea = TareaCodec.decode(dict(V1))
+    assert tarea["fecha"] == "2024-02-30" and tarea["status"] == "archivada"
+
+
+def test_decode_v1_y_v2():
+    assert TareaCodec.decode({**V1, "fecha": "2024-02-29", "status": "hecho"})["fecha"] == date(2024, 2, 29)
+    v2 = TareaCodec.encode({**V1, "fecha": date(2024, 2, 29), "status": "completado"})
+    assert isinstance(v2["fecha"], datetime)
+    assert TareaCodec.decode(v2)["status"] == "completado"
+
+
+def test_tarea_conserva_valores_invalidos():
+    tarea = Tarea.from_bson(bson.encode(V1))
+    assert tarea.fecha == "2024-02-30" and tarea.status == "archivada"
@@ -0,0 +1,96 @@
+# tests/test_conexion.py
+"""Caída y recuperación del servidor: ConnectionManager y escrituras sin conexión."""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pymongo.errors import ConnectionFailure
+
+from conformance import Desconectable, tarea
+from db import ConnectionManager
+from TareaService import TareaService
+
+
+# mongomock no acepta el bulk_write de sync() con pymongo 4.x (UpdateOne con sort)
+@pytest.mark.parametrize("backend", ["memory", "sqlite"], indirect=True)
+def test_caida_y_recuperacion(backend):
+    guardada = TareaService.insert(tarea(1))
+    red = Desconectable(backend)
+    TareaService.use(red)
+
+    red.online = False
+    assert not TareaService.available()
+    nueva = TareaService.insert(tarea(2))
+    TareaService.update(guardada["id"], {"titulo": "Sin red"})
+    assert TareaService.pending() == 2
+    assert backend.count({}) == 1, "se escribió sin conexión"
+
+    red.online = True
+    assert TareaService.sync() == {"aplicadas": 2, "descartadas": 0, "pendientes": 0}
+    assert TareaService.get(guardada["id"])["titulo"] == "Sin red"
+    assert TareaService.get(nueva["id"]) is None, "el id provisional no se reasignó"
+    assert TareaService.count() == 2
+
+
+class Servidor:
+    """Stand-in de MongoClient: `online` decide si responde al ping."""
+
+    def __init__(self):
+        self.online = True
+        self.clientes = 0
+        self.cerrados = 0
+
+    def __call__(self, uri, **options):
+        self.clientes += 1
+        return Cliente(self)
+
+
+class Cliente:
+    def __init__(self, servidor):
+        self.servidor = servidor
+        self.admin = self
+
+    def command(self, nombre):
+        if not self.servidor.online:
+            raise ConnectionFailure("sin servidor (simulado)")
+        return {"ok": 1}
+
+    def close(self):
+        self.servidor.cerrados += 1
+
+    def __getitem__(self, nombre):
+        return {"nombre": nombre}
+
+
+@pytest.fixture
+def servidor():
+    return Servidor()
+
+
+@pytest.fixture
+def manager(servidor):
+    manager = ConnectionManager("mongodb://stand-in", "tareas", client_factory=servidor)
+    manager.BACKOFF_INITIAL = manager._backoff = 0.0   # Reintento inmediato
+    return manager
+
+
+def test_conexion_concurrente(manager, servidor):
+    with ThreadPoolExecutor(8) as pool:
+        bases = list(pool.map(lambda _: manager.database(), range(32)))
+    assert all(base == {"nombre": "tareas"} for base in bases)
+    assert servidor.clientes == 1
+
+
+def test_caida_no_cierra_el_cliente(manager, servidor):
+    manager.database()
+    cliente = manager.client
+    servidor.online = False
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda _: manager.report_failure(), range(8)))
+    assert manager.client is cliente and servidor.cerrados == 0
+    assert manager.database() is None
+
+    servidor.online = True
+    assert manager.database() == {"nombre": "tareas"}
+    assert manager.client is cliente and servidor.clientes == 1
+    manager.close()
+    assert servidor.cerrados == 1 and not manager.connected
@@ -0,0 +1,23 @@
+# tests/test_conformance.py
+"""Los casos de conformance.py (incluido el de sin conexión) con cada backend."""
+import pytest
+
+import conformance
+from TareaService import TareaService
+
+# Diferencias de mongomock con MongoDB: el caso no aplica sobre el stand-in
+MONGOMOCK = {
+    "caso_conflicto": "mongomock re-busca con el filtro original en find_one_and_update sin _id",
+    "caso_bulk": "mongomock no acepta el bulk_write de pymongo 4.x (UpdateOne con sort)",
+    "caso_sin_conexion": "mongomock no acepta el bulk_write de sync() con pymongo 4.x (UpdateOne con sort)",
+    "caso_stats": "mongomock no implementa $convert",
+    "caso_cursor": "mongomock no implementa document_class=RawBSONDocument",
+}
+
+
+@pytest.mark.parametrize("caso", conformance.CASOS, ids=lambda caso: caso.__name__.removeprefix("caso_"))
+def test_caso(backend, caso):
+    if backend.name == "mongo" and caso.__name__ in MONGOMOCK:
+        pytest.xfail(MONGOMOCK[caso.__name__])
+    TareaService.migrate()     # Como verificar(): base vacía = esquema actual
+    caso()
@@ -0,0 +1,101 @@
+# tests/test_formulario.py
+"""
+TareaFormScreen: sigue respondiendo al teclado con una consulta lenta en
+curso y abre tareas v1 con fecha inválida.
+"""
+import asyncio
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from conformance import Desconectable, tarea
+from TareaFormScreen import TareaFormScreen
+from TareasApp import TareasApp
+from TareaService import TareaService
+
+RETARDO = 1.0   # Segundos que tarda cada llamada al backend lento
+
+
+class Lento(Desconectable):
+    """Stand-in de un servidor lento: cada llamada tarda `retardo` segundos."""
+
+    retardo = 0.0
+
+    def __getattr__(self, nombre):
+        llamada = super().__getattr__(nombre)
+        if not callable(llamada):
+            return llamada
+
+        def lenta(*args, **kwargs):
+            time.sleep(self.retardo)
+            return llamada(*args, **kwargs)
+
+        return lenta
+
+
+@pytest.mark.parametrize("backend", ["memory"], indirect=True)
+def test_escribir_con_consulta_en_curso(backend):
+    TareaService.insert_many(tarea(i) for i in range(20))
+    lento = Lento(backend)
+    TareaService.use(lento)
+
+    async def correr():
+        app = TareasApp()
+        async with app.run_test(size=(120, 40)) as pilot:
+            await pilot.pause()
+            pantalla = app.screen
+
+            lento.retardo = RETARDO
+            recarga = pantalla.run_worker(pantalla.refresh_table())
+            inicio = time.monotonic()
+            await pilot.press("c")
+            await pilot.pause()
+            form = app.screen
+            assert isinstance(form, TareaFormScreen)
+            form.query_one("#titulo_input").focus()
+            await pilot.press(*"Hola")
+            escrito = form.query_one("#titulo_input").value
+            transcurrido = time.monotonic() - inicio
+
+            assert escrito == "Hola"
+            assert not recarga.is_finished, "la consulta lenta terminó antes de escribir"
+            assert transcurrido < RETARDO
+            await recarga.wait()
+            pantalla._live_stop.set()
+
+    asyncio.run(correr())
+
+
+@pytest.mark.parametrize("backend", ["mongo"], indirect=True)
+def test_editar_fecha_v1_invalida(backend):
+    # Tarea del esquema v1 con una fecha que no existe: se lee tal cual
+    backend.collection.insert_one({"id": 1, "titulo": "Vieja", "descripcion": "v1",
+                                   "status": "pendiente", "fecha": "2025-02-30"})
+    TareaService.insert(tarea(2))
+    assert TareaService.get(1)["fecha"] == "2025-02-30"
+
+    async def correr():
+        app = TareasApp()
+        async with app.run_test(size=(120, 40)) as pilot:
+            await pilot.pause()
+            pantalla = app.screen
+            pantalla._live_stop.set()
+            assert [row.value for row in pantalla.table.rows] == ["1", "2"]
+
+            await pilot.press("u")
+            await pilot.pause()
+            form = app.screen
+            assert isinstance(form, TareaFormScreen)
+            assert form.query_one("#titulo_input").value == "Vieja"
+            semana = date.today() + timedelta(weeks=1)
+            assert form.query_one("#date_year").value == str(semana.year)
+            assert any("fecha almacenada" in n.message for n in app._notifications)
+
+            # Con el filtro de la semana la tarea inválida no aparece
+            await form.dismiss({"ok": False})
+            await pilot.pause()
+            await pantalla.action_toggle_week()
+            assert "1" not in [row.value for row in pantalla.table.rows]
+
+    asyncio.run(correr())
@@ -0,0 +1,44 @@
+# tests/test_ids.py
+"""TareaService.reserve_ids: bloques sin duplicados, también con contador ausente."""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conformance import tarea
+from TareaBackend import ARCHIVE
+from TareaService import TareaService
+
+HILOS = 8
+RESERVAS = 50
+
+
+# mongomock no es atómico entre hilos: en MongoDB lo garantiza el servidor
+@pytest.mark.parametrize("backend", ["memory", "sqlite"], indirect=True)
+def test_reserve_ids_concurrente(backend):
+    def reservar(hilo):
+        ids = []
+        for i in range(RESERVAS):
+            n = (hilo + i) % 3 + 1
+            inicio = TareaService.reserve_ids(n)
+            ids.extend(range(inicio, inicio + n))
+        return ids
+
+    with ThreadPoolExecutor(HILOS) as pool:
+        ids = [i for bloque in pool.map(reservar, range(HILOS)) for i in bloque]
+    assert len(ids) == len(set(ids))
+    assert sorted(ids) == list(range(1, len(ids) + 1))
+
+
+def test_contador_ausente(backend):
+    # Colección anterior al contador: tareas guardadas sin pasar por reserve_ids
+    for i in (1, 2, 7):
+        backend.insert({**tarea(i), "id": i})
+    assert TareaService.insert(tarea(8))["id"] == 8
+    assert TareaService.reserve_ids(2) == 9
+
+
+def test_contador_ausente_con_archivo(backend):
+    # Los ids archivados tampoco se vuelven a asignar
+    backend.insert({**tarea(1), "id": 1})
+    backend.archive(ARCHIVE).insert({**tarea(2), "id": 9})
+    assert TareaService.insert(tarea(3))["id"] == 10
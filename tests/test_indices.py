@@ -0,0 +1,72 @@
+# tests/test_indices.py
+"""
+Las consultas de TareaService.query() y la búsqueda de texto usan índices
+(ningún COLLSCAN en el plan). Corre contra un mongod desechable (mongomock no
+tiene explain); sin mongod instalado se omite.
+"""
+import shutil
+from datetime import date, timedelta
+
+import pytest
+
+import bench
+from TareaService import TareaService
+from WriteAheadLog import WriteAheadLog
+
+HOY = date.today()
+CONSULTAS = {
+    "orden id": {},
+    "orden fecha": {"sort": "fecha"},
+    "orden status": {"sort": "status"},
+    "pendientes por fecha": {"status": "pendiente", "sort": "fecha"},
+    "pendientes por id": {"status": "pendiente"},
+    "semana por fecha": {"desde": HOY, "hasta": HOY + timedelta(days=7), "sort": "fecha"},
+    "pendientes semana": {"status": "pendiente", "desde": HOY,
+                          "hasta": HOY + timedelta(days=7), "sort": "fecha"},
+}
+BUSQUEDAS = {
+    "texto": {},
+    "texto pendientes": {"status": "pendiente"},
+}
+
+
+def etapas(plan: dict) -> list[str]:
+    """Aplana las etapas (stage) de un plan de ejecución."""
+    resultado = [plan.get("stage", "?")]
+    for hijo in ("inputStage", "queryPlan"):
+        if hijo in plan:
+            resultado += etapas(plan[hijo])
+    for hijo in plan.get("inputStages", []):
+        resultado += etapas(hijo)
+    return resultado
+
+
+@pytest.fixture(scope="module")
+def mongod(tmp_path_factory):
+    """Base vacía en un mongod desechable, con los índices de db.INDEXES y tareas de ejemplo."""
+    if shutil.which("mongod") is None:
+        pytest.skip("mongod no está instalado")
+    anterior, registro = TareaService.backend, TareaService.write_log
+    with bench.mongod_local(str(tmp_path_factory.mktemp("mongod"))) as client:
+        backend = bench.mongo_backend(client.tareas_indices)
+        TareaService.use(backend)
+        TareaService.write_log = WriteAheadLog()
+        TareaService.insert_many(bench.tareas_sinteticas(2000), 500)
+        yield backend
+    TareaService.use(anterior)
+    TareaService.write_log = registro
+
+
+@pytest.mark.parametrize("kwargs", CONSULTAS.values(), ids=CONSULTAS.keys())
+def test_query_usa_indice(mongod, kwargs):
+    pasos = etapas(TareaService.explain_query(**kwargs)["queryPlanner"]["winningPlan"])
+    assert "COLLSCAN" not in pasos
+    assert "IXSCAN" in pasos
+
+
+@pytest.mark.parametrize("filtros", BUSQUEDAS.values(), ids=BUSQUEDAS.keys())
+def test_busqueda_usa_indice(mongod, filtros):
+    plan = mongod.explain_search("reporte comprar", TareaService.SEARCH_LIMIT, filtros)
+    pasos = etapas(plan["queryPlanner"]["winningPlan"])
+    assert "COLLSCAN" not in pasos
+    assert "IXSCAN" in pasos
@@ -0,0 +1,69 @@
+# tests/test_livesync.py
+"""LiveSync en modo polling: un evento por cambio real y ninguno si nada cambió."""
+import threading
+import time
+
+import pytest
+
+from conformance import poblar, tarea
+from LiveSync import LiveSync
+from TareaService import TareaService
+
+pytestmark = pytest.mark.parametrize("backend", ["mongo"], indirect=True)
+
+
+@pytest.fixture
+def eventos(backend, monkeypatch):
+    """Corre _poll() en un hilo (cada 20 ms) y devuelve la lista de eventos."""
+    monkeypatch.setattr(LiveSync, "POLL_INTERVAL", 0.02)
+    poblar(10)
+    recibidos = []
+    sync = LiveSync(lambda op, id_value, t: recibidos.append((op, id_value)))
+    stop = threading.Event()
+    hilo = threading.Thread(target=sync._poll, args=(backend.collection, stop))
+    hilo.start()
+    time.sleep(0.1)
+    yield recibidos
+    stop.set()
+    hilo.join()
+
+
+def esperar(eventos, n: int) -> list:
+    """Los eventos tras unas vueltas de polling (al menos `n`)."""
+    limite = time.monotonic() + 2
+    while len(eventos) < n and time.monotonic() < limite:
+        time.sleep(0.01)
+    time.sleep(0.1)     # Unas vueltas más: no debe llegar nada extra
+    return list(eventos)
+
+
+def test_sin_cambios_no_avisa(eventos):
+    assert esperar(eventos, 0) == []
+
+
+def test_insert_y_update(eventos):
+    nueva = TareaService.insert(tarea(10))
+    TareaService.update(3, {"titulo": "Otra"})
+    assert sorted(esperar(eventos, 2)) == [("insert", nueva["id"]), ("update", 3)]
+
+
+def test_mismo_milisegundo(eventos, backend):
+    # Otra escritura con el mismo updated_at que la última ya vista
+    TareaService.update(3, {"titulo": "Otra"})
+    assert esperar(eventos, 1) == [("update", 3)]
+    ultima = backend.collection.find_one({"id": 3})
+    backend.collection.update_one({"id": 4}, {"$set": {"updated_at": ultima["updated_at"], "rev": 9}})
+    assert esperar(eventos, 2) == [("update", 3), ("update", 4)]
+
+
+def test_borrado(eventos, backend):
+    TareaService.get(5)     # En caché: se sabe cuál se borró
+    TareaService.get(7)
+    backend.collection.delete_one({"id": 5})
+    assert esperar(eventos, 1) == [("delete", 5)]
+    assert TareaService.cache.get(5) is None
+
+    # Fuera de la caché no se sabe cuál fue: se revalida lo visible
+    backend.collection.delete_one({"id": 6})
+    assert esperar(eventos, 2) == [("delete", 5), ("resync", None)]
+    assert TareaService.cache.get(7) is not None    # El resync no vacía la caché
@@ -0,0 +1,18 @@
+# tests/test_records.py
+"""TareaService.records(): los mismos datos que cursor(), como registros Tarea."""
+from conformance import poblar
+from Tarea import Tarea
+from TareaService import TareaService
+
+
+def test_records_como_cursor(backend):
+    poblar(25)
+    registros = list(TareaService.records(batch_size=7))
+    assert all(isinstance(registro, Tarea) for registro in registros)
+    assert [registro.as_dict() for registro in registros] == list(TareaService.cursor(batch_size=7))
+
+
+def test_records_con_campos(backend):
+    poblar(5)
+    for registro, tarea in zip(TareaService.records(campos=("titulo",)), TareaService.cursor(), strict=True):
+        assert (registro.id, registro["titulo"]) == (tarea["id"], tarea["titulo"])
@@ -0,0 +1,71 @@
+# tests/test_search.py
+"""MongoBackend.search: solo la falta de índice de texto activa el índice local."""
+import pytest
+from pymongo.errors import ExecutionTimeout, OperationFailure
+
+import TareaCodec
+from conformance import tarea
+from MongoBackend import MongoBackend
+from TareaService import TareaService
+
+
+class Cursor:
+    """Cursor de find() que entrega `docs` y luego falla con `error`."""
+
+    def __init__(self, error, docs=()):
+        self.error, self.docs = error, docs
+
+    def sort(self, *args):
+        return self
+
+    def limit(self, n):
+        return self
+
+    def max_time_ms(self, ms):
+        return self
+
+    def __iter__(self):
+        yield from self.docs
+        raise self.error
+
+
+@pytest.fixture
+def buscar(backend, monkeypatch):
+    """TareaService.search() con el find() de $text fallando con el error dado."""
+    TareaService.insert(tarea(1, titulo="Comprar leche"))
+    TareaService.SEARCH_BACKEND = "mongo"
+
+    def buscar(error, docs=()):
+        find = backend.collection.find
+
+        def find_texto(filtro=None, *args, **kwargs):
+            if "$text" in str(filtro):
+                return Cursor(error, docs)
+            return find(filtro, *args, **kwargs)
+
+        monkeypatch.setattr(backend.collection, "find", find_texto)
+        return TareaService.search("leche")
+
+    return buscar
+
+
+@pytest.mark.parametrize("backend", ["mongo"], indirect=True)
+def test_sin_indice_de_texto(buscar):
+    error = OperationFailure("text index required for $text query", code=MongoBackend.INDEX_NOT_FOUND)
+    assert [t["titulo"] for t in buscar(error)] == ["Comprar leche"]
+    assert TareaService.SEARCH_BACKEND == "local"
+
+
+@pytest.mark.parametrize("backend", ["mongo"], indirect=True)
+def test_timeout_no_cambia_de_indice(buscar):
+    parcial = TareaCodec.encode({**tarea(2), "id": 2})
+    assert [t["id"] for t in buscar(ExecutionTimeout("operation exceeded time limit", code=50), [parcial])] == [2]
+    assert buscar(ExecutionTimeout("operation exceeded time limit", code=50)) == []
+    assert TareaService.SEARCH_BACKEND == "mongo"
+
+
+@pytest.mark.parametrize("backend", ["mongo"], indirect=True)
+def test_otros_errores_se_propagan(buscar):
+    with pytest.raises(OperationFailure):
+        buscar(OperationFailure("bad $search", code=2))
+    assert TareaService.SEARCH_BACKEND == "mongo"
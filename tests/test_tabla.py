@@ -0,0 +1,82 @@
+# tests/test_tabla.py
+"""
+MainScreen tras crear/actualizar/borrar: costo O(1) por acción.
+
+Se cuentan las llamadas al backend y las operaciones sobre el DataTable con
+50 y con 5000 tareas: son las mismas y la tabla nunca se recarga.
+"""
+import asyncio
+from collections import Counter
+
+import pytest
+
+from conformance import tarea
+from MainScreen import MainScreen
+from TareasApp import TareasApp
+from TareaService import TareaService
+
+OPERACIONES_TABLA = ("clear", "add_row", "update_cell", "remove_row")
+
+
+def espiar(table) -> Counter:
+    """Cuenta las llamadas a OPERACIONES_TABLA de `table`."""
+    llamadas = Counter()
+    for nombre in OPERACIONES_TABLA:
+        def contada(*args, _original=getattr(table, nombre), _nombre=nombre, **kwargs):
+            llamadas[_nombre] += 1
+            return _original(*args, **kwargs)
+        setattr(table, nombre, contada)
+    return llamadas
+
+
+def costo_por_accion(red, n: int) -> dict:
+    TareaService.insert_many(tarea(i) for i in range(n))
+    costos = {}
+
+    async def correr():
+        app = TareasApp()
+        async with app.run_test(size=(120, 40)) as pilot:
+            await pilot.pause()
+            pantalla = app.screen
+            tabla = espiar(pantalla.table)
+
+            async def formulario(screen):
+                return {"ok": True, "data": datos}
+
+            app.push_screen_wait = formulario
+            acciones = {
+                "insert": pantalla._worker_create_task,
+                "update": pantalla._worker_update_task,
+                "delete": pantalla.action_delete_task,
+            }
+            for accion, worker in acciones.items():
+                # El formulario devuelve la tarea seleccionada (o una nueva) con otro título
+                actual = TareaService.get(int(pantalla._selected_row_key().value))
+                datos = {**(tarea(n) if accion == "insert" else actual), "titulo": f"{accion} {n}"}
+                red.llamadas.clear()
+                tabla.clear()
+                await worker()
+                costos[accion] = (dict(red.llamadas), dict(tabla))
+            pantalla._live_stop.set()
+
+    asyncio.run(correr())
+    return costos
+
+
+# Por acción: llamadas al backend (la escritura, el id y la versión) y
+# operaciones sobre la tabla. Con 5000 tareas la nueva cae fuera de la ventana.
+CONSULTAS = {
+    "insert": {"reserve_ids": 1, "insert": 1, "touch": 1},
+    "update": {"update": 1, "touch": 1},
+    "delete": {"delete": 1, "touch": 1},
+}
+
+
+@pytest.mark.parametrize("backend", ["memory"], indirect=True)
+@pytest.mark.parametrize("n", [50, 5000])
+def test_acciones_o1(red, n):
+    costos = costo_por_accion(red, n)
+    assert {accion: consultas for accion, (consultas, _) in costos.items()} == CONSULTAS
+    assert costos["insert"][1] == ({"add_row": 1} if n < MainScreen.PAGE_SIZE else {})
+    assert costos["update"][1] == {"update_cell": 1}
+    assert costos["delete"][1] == {"remove_row": 1}